@@ -0,0 +1,154 @@
+"""
+Program Export Benchmark
+Compares the original list-building writers (json.dumps of the whole list
+plus the hand-quoted TypeScript renderer) against the streaming
+ProgramExporter at growing program counts: wall time and peak Python
+memory, plus how many records the old renderer leaves unescaped
+
+Usage:
+    python scripts/benchmark-export.py
+    python scripts/benchmark-export.py --sizes 1000 100000 --output /tmp/export-bench
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from program_export import export_programs
+
+# ============================================================================
+# BASELINE (original md-to-programs writers)
+# ============================================================================
+
+def render_typescript(programs: list) -> str:
+    lines = []
+    lines.append("// Auto-generated from journal PDFs\n")
+    lines.append(f"// Total programs: {len(programs)}\n\n")
+    lines.append("export const programs: Program[] = [\n")
+    
+    for i, prog in enumerate(programs):
+        lines.append("  {\n")
+        lines.append(f"    id: '{prog['id']}',\n")
+        lines.append(f"    name: '{prog['name']}',\n")
+        lines.append(f"    category: '{prog['category']}',\n")
+        lines.append(f"    description: '{prog['description']}',\n")
+        lines.append(f"    location: {{\n")
+        lines.append(f"      lat: {prog['location']['lat']},\n")
+        lines.append(f"      lng: {prog['location']['lng']},\n")
+        lines.append(f"      address: '{prog['location']['address']}',\n")
+        lines.append(f"    }},\n")
+        lines.append(f"    images: {json.dumps(prog['images'])},\n")
+        if prog['videoUrl']:
+            lines.append(f"    videoUrl: '{prog['videoUrl']}',\n")
+        lines.append(f"    detailsUrl: '{prog['detailsUrl']}',\n")
+        lines.append(f"    year: {prog['year']},\n")
+        lines.append(f"    status: '{prog['status']}',\n")
+        lines.append("  },\n" if i < len(programs) - 1 else "  }\n")
+    
+    lines.append("];\n")
+    return ''.join(lines)
+
+def legacy_export(programs, ts_path: str, json_path: str):
+    programs = list(programs)
+    with open(json_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(programs, indent=2, ensure_ascii=False))
+    with open(ts_path, 'w', encoding='utf-8') as f:
+        f.write(render_typescript(programs))
+
+# ============================================================================
+# SYNTHETIC DATA
+# ============================================================================
+
+PLACES = ["Pulau Ngenang's Mangrove", 'Tanjung Uma', 'Sekupang', 'Pulau Jemare', 'Nongsa', 'Kampung Tua Tanjung Riau']
+CATEGORIES = ['Pendidikan', 'Kesehatan', 'Teknologi', 'Lingkungan', 'Pariwisata', 'Kelautan']
+
+def synthetic_programs(count: int, seed: int = 0):
+    """Programs generated on the fly, the way generate-programs.py yields them"""
+    rng = random.Random(seed)
+    for i in range(count):
+        place = rng.choice(PLACES)
+        yield {
+            'id': f'p2m-{2020 + i % 5}-{i:06x}',
+            'name': f"Pemberdayaan Masyarakat {place} {i}",
+            'category': rng.choice(CATEGORIES),
+            'description': ' '.join(rng.choice(['pelatihan', 'warga', 'UMKM', 'digital', 'pesisir', 'kader'])
+                                    for _ in range(60)) + ('\nTahap kedua.' if i % 7 == 0 else ''),
+            'location': {'lat': 1.0 + rng.random() / 5, 'lng': 104.0 + rng.random() / 5,
+                         'address': f"{place}, Batam"},
+            'images': [f'https://images.unsplash.com/photo-{i}{k}?w=800' for k in range(3)],
+            'videoUrl': 'https://www.youtube.com/embed/LaXoDxyhc_8' if i % 3 == 0 else None,
+            'detailsUrl': 'https://jurnal.polibatam.ac.id',
+            'year': 2020 + i % 5,
+            'status': rng.choice(['Planned', 'In Progress', 'Completed']),
+        }
+
+def needs_escaping(program: dict) -> bool:
+    """Would break (or silently change) the hand-quoted TypeScript"""
+    texts = [program['name'], program['description'], program['location']['address']]
+    return any(char in text for text in texts for char in "'\\\n")
+
+# ============================================================================
+# MEASUREMENT
+# ============================================================================
+
+def measure(export, count: int, output_dir: str):
+    """
+    (seconds, peak MB) for writing `count` programs
+    
+    Timed over a prebuilt list, so generating the synthetic data is not
+    counted; memory is traced over the generator, as a real export streams.
+    """
+    ts_path = os.path.join(output_dir, 'programs.ts')
+    json_path = os.path.join(output_dir, 'programs.json')
+    
+    programs = list(synthetic_programs(count))
+    start = time.perf_counter()
+    export(iter(programs), ts_path, json_path)
+    seconds = time.perf_counter() - start
+    del programs
+    
+    tracemalloc.start()
+    export(synthetic_programs(count), ts_path, json_path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak / 1024 / 1024
+
+def streaming_export(programs, ts_path: str, json_path: str):
+    export_programs(programs, ts_path=ts_path, json_path=json_path)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark program export')
+    parser.add_argument('--sizes', type=int, nargs='*', default=[1000, 10000, 100000], help='Program counts')
+    parser.add_argument('--output', help='Folder for the output files (default: a temporary folder)')
+    args = parser.parse_args()
+    
+    print("⏱️  Program Export Benchmark")
+    print("=" * 60)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_dir = args.output or tmp_dir
+        os.makedirs(output_dir, exist_ok=True)
+        
+        for size in args.sizes:
+            legacy_seconds, legacy_peak = measure(legacy_export, size, output_dir)
+            stream_seconds, stream_peak = measure(streaming_export, size, output_dir)
+            size_mb = sum(os.path.getsize(os.path.join(output_dir, name))
+                          for name in ('programs.ts', 'programs.json')) / 1024 / 1024
+            broken = sum(1 for program in synthetic_programs(size) if needs_escaping(program))
+            
+            print(f"\n📦 {size:,} programs ({size_mb:,.1f} MB of TS + JSON)")
+            print(f"  Legacy writers:   {legacy_seconds:8.2f} s  {legacy_peak:10.1f} MB peak")
+            print(f"  ProgramExporter:  {stream_seconds:8.2f} s  {stream_peak:10.1f} MB peak")
+            print(f"  Speedup:          {legacy_seconds / stream_seconds:8.1f}x  "
+                  f"{legacy_peak / stream_peak:8.1f}x less memory")
+            print(f"  Unescaped in legacy TS: {broken:,} records")
+
+if __name__ == "__main__":
+    main()
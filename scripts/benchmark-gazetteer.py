@@ -0,0 +1,126 @@
+"""
+Gazetteer Lookup Benchmark
+Compares the original linear partial-match scan in geocode_from_database
+against GazetteerIndex at growing gazetteer sizes, plus fuzzy matching
+of misspelled names inside hint-length text
+
+Usage:
+    python scripts/benchmark-gazetteer.py
+    python scripts/benchmark-gazetteer.py --sizes 20 2000 20000 --queries 500
+"""
+
+import os
+import sys
+import time
+import random
+import string
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from gazetteer_index import GazetteerIndex
+
+# ============================================================================
+# BASELINE (original geocode_from_database matching)
+# ============================================================================
+
+def legacy_lookup(locations: dict, location_name: str):
+    location_lower = location_name.lower().strip()
+    
+    # Direct match
+    if location_lower in locations:
+        return location_lower
+    
+    # Partial match
+    for key in locations:
+        if key in location_lower or location_lower in key:
+            return key
+    
+    return None
+
+# ============================================================================
+# SYNTHETIC GAZETTEER
+# ============================================================================
+
+PREFIXES = ['kelurahan', 'desa', 'kampung', 'pulau', 'tanjung', 'sei', 'batu', 'teluk']
+
+def synthetic_gazetteer(size: int, rng: random.Random) -> dict:
+    """`size` distinct two-word place names with dummy coordinates"""
+    locations = {}
+    while len(locations) < size:
+        name = rng.choice(PREFIXES) + ' ' + ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 9)))
+        locations[name] = {'lat': 1.0, 'lng': 104.0, 'address': name.title()}
+    return locations
+
+def synthetic_queries(locations: dict, count: int, rng: random.Random) -> list:
+    """Mix of exact names, names inside longer hints, name fragments and misses"""
+    names = list(locations)
+    queries = []
+    for i in range(count):
+        name = rng.choice(names)
+        kind = i % 4
+        if kind == 0:
+            queries.append(name.title())
+        elif kind == 1:
+            queries.append(f"Kegiatan di {name.title()}, Kota Batam")
+        elif kind == 2:
+            queries.append(name.split()[1][1:6])
+        else:
+            queries.append('zz' + ''.join(rng.choices(string.ascii_lowercase, k=8)))
+    return queries
+
+def misspell(name: str, rng: random.Random) -> str:
+    """Drop or double one letter of the last word"""
+    head, _, word = name.rpartition(' ')
+    i = rng.randrange(1, len(word))
+    word = word[:i] + word[i + 1:] if rng.random() < 0.5 else word[:i] + word[i] + word[i:]
+    return f"{head} {word}".strip()
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def time_per_query(lookup, queries: list) -> float:
+    """Average microseconds per query"""
+    start = time.perf_counter()
+    for query in queries:
+        lookup(query)
+    return (time.perf_counter() - start) / len(queries) * 1_000_000
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark gazetteer lookups')
+    parser.add_argument('--sizes', type=int, nargs='*', default=[20, 2000, 20000], help='Gazetteer sizes')
+    parser.add_argument('--queries', type=int, default=400, help='Queries per size')
+    args = parser.parse_args()
+    
+    print("⏱️  Gazetteer Lookup Benchmark")
+    print("=" * 60)
+    
+    for size in args.sizes:
+        rng = random.Random(size)
+        locations = synthetic_gazetteer(size, rng)
+        queries = synthetic_queries(locations, args.queries, rng)
+        
+        start = time.perf_counter()
+        index = GazetteerIndex(locations)
+        build_ms = (time.perf_counter() - start) * 1000
+        
+        linear = time_per_query(lambda q: legacy_lookup(locations, q), queries)
+        indexed = time_per_query(index.lookup, queries)
+        
+        print(f"\n📚 {size:,} entries (index build {build_ms:,.1f} ms)")
+        print(f"  Linear scan:     {linear:10.1f} µs/query")
+        print(f"  GazetteerIndex:  {indexed:10.1f} µs/query")
+        print(f"  Speedup:         {linear / indexed:10.1f}x")
+        
+        # Misspelled names inside hint-length text, as fuzzy matching sees them
+        hints = [
+            f"Kegiatan pengabdian masyarakat di {misspell(rng.choice(list(locations)), rng).title()}, Kota Batam"
+            for _ in range(min(args.queries, 100))
+        ]
+        fuzzy = time_per_query(index.fuzzy_lookup, hints)
+        found = sum(1 for hint in hints if index.fuzzy_lookup(hint, limit=1))
+        print(f"  Fuzzy (hints):   {fuzzy:10.1f} µs/query ({found}/{len(hints)} resolved)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Spatial Query Benchmark
+Compares filtering the whole programs array (what Map.tsx does on every
+interaction) against SpatialIndex for viewport and nearest-N queries at
+growing program counts
+
+Usage:
+    python scripts/benchmark-spatial.py
+    python scripts/benchmark-spatial.py --sizes 1000 100000 --queries 200
+"""
+
+import os
+import sys
+import math
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from spatial_index import SpatialIndex
+
+# ============================================================================
+# BASELINE (linear scan over every program)
+# ============================================================================
+
+def linear_bbox(points: list, south: float, west: float, north: float, east: float) -> list:
+    return [program_id for program_id, lat, lng in points if south <= lat <= north and west <= lng <= east]
+
+def linear_nearest(points: list, lat: float, lng: float, n: int) -> list:
+    scale = math.cos(math.radians(lat))
+    return sorted(points, key=lambda p: (p[1] - lat) ** 2 + ((p[2] - lng) * scale) ** 2)[:n]
+
+# ============================================================================
+# SYNTHETIC DATA
+# ============================================================================
+
+def synthetic_points(size: int, rng: random.Random) -> list:
+    """Programs spread over Batam, Bintan and Karimun"""
+    return [(f'p2m-{i}', 0.8 + rng.random() * 0.4, 103.3 + rng.random() * 1.2) for i in range(size)]
+
+def viewports(count: int, rng: random.Random) -> list:
+    """City-scale map views (about 5 x 5 km)"""
+    boxes = []
+    for _ in range(count):
+        south = 0.8 + rng.random() * 0.35
+        west = 103.3 + rng.random() * 1.15
+        boxes.append((south, west, south + 0.045, west + 0.045))
+    return boxes
+
+def time_per_query(run, queries: list) -> float:
+    start = time.perf_counter()
+    for query in queries:
+        run(*query)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark spatial queries')
+    parser.add_argument('--sizes', type=int, nargs='*', default=[1000, 10000, 100000], help='Program counts')
+    parser.add_argument('--queries', type=int, default=100, help='Queries per size')
+    args = parser.parse_args()
+    
+    print("⏱️  Spatial Query Benchmark")
+    print("=" * 60)
+    
+    for size in args.sizes:
+        rng = random.Random(size)
+        points = synthetic_points(size, rng)
+        
+        start = time.perf_counter()
+        index = SpatialIndex.build(points)
+        build_ms = (time.perf_counter() - start) * 1000
+        
+        boxes = viewports(args.queries, rng)
+        near = [(0.8 + rng.random() * 0.4, 103.3 + rng.random() * 1.2, 10) for _ in range(args.queries)]
+        
+        linear_box = time_per_query(lambda *box: linear_bbox(points, *box), boxes)
+        indexed_box = time_per_query(index.search, boxes)
+        linear_near = time_per_query(lambda *query: linear_nearest(points, *query), near)
+        indexed_near = time_per_query(index.nearest, near)
+        
+        print(f"\n📍 {size:,} programs (index build {build_ms:,.1f} ms)")
+        print(f"  Viewport, linear:   {linear_box:10.1f} µs/query")
+        print(f"  Viewport, R-tree:   {indexed_box:10.1f} µs/query ({linear_box / indexed_box:.1f}x)")
+        print(f"  Nearest 10, linear: {linear_near:10.1f} µs/query")
+        print(f"  Nearest 10, R-tree: {indexed_near:10.1f} µs/query ({linear_near / indexed_near:.1f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Crawl State
+Persisted per-URL fetch state for incremental scraping
+
+For every page it records the ETag, Last-Modified, a SHA-256 of the body
+and the parsed result, so a rerun:
+    - sends If-None-Match / If-Modified-Since and reuses the stored result
+      on a 304
+    - reuses the stored result when the body hash is unchanged (servers
+      that send no validators)
+    - only re-parses pages whose content actually changed
+    - never downloads bodies it would not parse (e.g. PDFs behind journal
+      links), recording them by their validators alone
+
+Usage:
+    from crawl_state import CrawlState
+
+    state = CrawlState()
+    programs, status = state.fetch(get_session(), url, parse)
+    # status: 'new', 'modified', 'not_modified' or 'unchanged'
+    state.save()
+
+Location:
+    scripts/.cache/crawl_state.json (override with CRAWL_STATE_PATH)
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import requests
+
+DEFAULT_STATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'crawl_state.json')
+
+class CrawlState:
+    """
+    {url: {'etag', 'last_modified', 'hash', 'fetched_at', 'result'}} on disk
+    
+    fetch() is safe to call from several threads at once.
+    """
+    
+    def __init__(self, path: str = None):
+        self.path = path or os.environ.get('CRAWL_STATE_PATH', DEFAULT_STATE_PATH)
+        self.pages = {}
+        if os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.pages = json.load(f)
+        self.stats = Counter()
+        self.lock = threading.Lock()
+    
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        entry = self.pages.get(url, {})
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+    
+    def fetch(self, session, url: str, parse: Callable[[requests.Response], Any], timeout: float = 10,
+              content_types: Optional[Tuple[str, ...]] = None) -> Tuple[Any, str]:
+        """
+        Fetch `url` and return (parsed result, status), re-parsing only on change
+        
+        parse receives the requests.Response. With content_types, a response
+        whose Content-Type contains none of them is neither downloaded nor
+        parsed: its result is None, and its ETag / Last-Modified are kept so
+        the next run can revalidate it with a conditional GET.
+        """
+        entry = self.pages.get(url)
+        # Validators are managed here, so the session's own body store is bypassed;
+        # streamed, so a body that is not parsed is never read
+        response = session.get(url, headers=self.conditional_headers(url), timeout=timeout,
+                               conditional=False, stream=True)
+        try:
+            if response.status_code == 304 and entry:
+                status = 'not_modified'
+                result = entry['result']
+            else:
+                response.raise_for_status()
+                content_type = response.headers.get('Content-Type', '')
+                if content_types and not any(wanted in content_type for wanted in content_types):
+                    digest = None
+                    result = None
+                    status = 'unchanged' if entry and entry['hash'] is None else ('modified' if entry else 'new')
+                else:
+                    digest = hashlib.sha256(response.content).hexdigest()
+                    if entry and entry['hash'] == digest:
+                        status = 'unchanged'
+                        result = entry['result']
+                    else:
+                        status = 'modified' if entry else 'new'
+                        result = parse(response)
+                with self.lock:
+                    self.pages[url] = {
+                        'etag': response.headers.get('ETag'),
+                        'last_modified': response.headers.get('Last-Modified'),
+                        'hash': digest,
+                        'fetched_at': time.time(),
+                        'result': result,
+                    }
+        finally:
+            response.close()
+        
+        with self.lock:
+            self.stats[status] += 1
+        return result, status
+    
+    def save(self):
+        """Write atomically, so an interrupted run never leaves a torn file"""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with self.lock, open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.pages, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+    
+    def print_stats(self):
+        if self.stats:
+            print(f"🔄 Crawl state: {self.stats['new']} new, {self.stats['modified']} modified, "
+                  f"{self.stats['not_modified'] + self.stats['unchanged']} unchanged pages ({self.path})")
@@ -0,0 +1,337 @@
+"""
+Journal PDF Downloader
+Downloads the PDFs behind scraped journal links for pdf-to-md.py
+
+Usage:
+    python scripts/download-pdfs.py
+    python scripts/download-pdfs.py scraped_programs.json --output ./pdfs --workers 6
+
+Then:
+    python scripts/pdf-to-md.py ./pdfs
+
+How links are resolved:
+    1. `pdf_url` from scrape-p2m.py --details, or a link that is already a PDF
+    2. the journal page's citation_pdf_url meta tag
+    3. the first link on the page ending in .pdf or pointing at /download/
+
+Downloads:
+    - run concurrently on --workers threads over the shared HTTP session
+    - stream into a .part file; an interrupted download resumes with an HTTP
+      Range request instead of starting over, guarded by If-Range with the
+      ETag / Last-Modified validator stored next to the .part file
+    - are de-duplicated by SHA-256, so the same PDF linked from two
+      programs is stored once
+
+Output:
+    - <output>/<year>-<title>.pdf
+    - <output>/.downloads.json (source URL -> file, hash and size; reruns
+      skip everything already downloaded)
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from bs4 import BeautifulSoup
+
+from http_session import get_session
+
+MANIFEST_NAME = '.downloads.json'
+VALIDATOR_SUFFIX = '.validator'
+CHUNK_SIZE = 256 * 1024
+DOWNLOAD_TIMEOUT = 60
+
+CONTENT_RANGE_RE = re.compile(r'bytes\s+(?:(\d+)-\d+|\*)/(\d+|\*)')
+
+def slugify(text: str, max_length: int = 60) -> str:
+    slug = re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+    return slug[:max_length].rstrip('-') or 'untitled'
+
+def pdf_filename(program: Dict) -> str:
+    """Year first, so pdf-to-md.py can read it back from the filename"""
+    return f"{program.get('year', 'unknown')}-{slugify(program.get('title', ''))}.pdf"
+
+def looks_like_pdf_url(url: str) -> bool:
+    return urlsplit(url).path.lower().endswith('.pdf')
+
+def find_pdf_link(content: bytes, base_url: str) -> Optional[str]:
+    """PDF link on a journal article page"""
+    soup = BeautifulSoup(content, 'html.parser')
+    meta = soup.find('meta', attrs={'name': 'citation_pdf_url'})
+    if meta and meta.get('content'):
+        return urljoin(base_url, meta['content'].strip())
+    for link in soup.find_all('a', href=True):
+        href = link['href']
+        if looks_like_pdf_url(href) or '/download/' in href:
+            return urljoin(base_url, href)
+    return None
+
+def resolve_pdf_url(program: Dict) -> Optional[str]:
+    url = program.get('pdf_url') or program['url']
+    if looks_like_pdf_url(url):
+        return url
+    # Stream, so a link that turns out to be the PDF itself is not read twice
+    response = get_session().get(url, stream=True)
+    try:
+        response.raise_for_status()
+        if 'pdf' in response.headers.get('Content-Type', ''):
+            return response.url
+        return find_pdf_link(response.content, response.url)
+    finally:
+        response.close()
+
+def response_validator(response) -> Optional[str]:
+    """If-Range value for a response body: its strong ETag, else Last-Modified"""
+    etag = response.headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return response.headers.get('Last-Modified')
+
+def parse_content_range(value: str) -> Tuple[Optional[int], Optional[int]]:
+    """(first byte, total size) of a Content-Range header; None where unknown"""
+    match = CONTENT_RANGE_RE.match(value or '')
+    if not match:
+        return None, None
+    first, total = match.groups()
+    return (int(first) if first else None), (int(total) if total != '*' else None)
+
+def discard(*paths: str):
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+def download_file(url: str, part_path: str) -> Tuple[str, int, int]:
+    """
+    Download `url` into `part_path`, resuming a previous partial download
+    
+    A partial download only resumes when the validator saved next to it
+    (<part>.validator: strong ETag or Last-Modified) is sent as If-Range and
+    the server answers with a range that starts exactly at the partial
+    file's size. Anything else - no validator, a changed file, a server that
+    ignores the range or sends another one - restarts from byte zero.
+    
+    Returns (sha256, size, resumed_bytes). Raises ValueError if the body is
+    not a PDF.
+    """
+    validator_path = part_path + VALIDATOR_SUFFIX
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    validator = None
+    if offset and os.path.exists(validator_path):
+        with open(validator_path, 'r', encoding='utf-8') as f:
+            validator = f.read().strip()
+    if not validator:
+        offset = 0
+    
+    headers = {'Range': f'bytes={offset}-', 'If-Range': validator} if offset else {}
+    response = get_session().get(url, headers=headers, timeout=DOWNLOAD_TIMEOUT, stream=True)
+    try:
+        first, total = parse_content_range(response.headers.get('Content-Range'))
+        if offset and response.status_code == 416 and first is None and total == offset:
+            # The partial file already holds the whole body
+            mode = None
+        elif offset and response.status_code == 206 and first == offset:
+            mode = 'ab'
+        elif offset and response.status_code in (206, 416):
+            # The range does not line up with the partial file
+            mode = 'restart'
+        else:
+            # Not resuming, or If-Range found a changed file: start over
+            response.raise_for_status()
+            offset = 0
+            mode = 'wb'
+            validator = response_validator(response)
+            if validator:
+                with open(validator_path, 'w', encoding='utf-8') as f:
+                    f.write(validator)
+            else:
+                discard(validator_path)
+        
+        if mode in ('ab', 'wb'):
+            with open(part_path, mode) as f:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    f.write(chunk)
+    finally:
+        response.close()
+    
+    if mode == 'restart':
+        discard(part_path, validator_path)
+        return download_file(url, part_path)
+    
+    sha256 = hashlib.sha256()
+    with open(part_path, 'rb') as f:
+        if not f.read(5).startswith(b'%PDF'):
+            discard(part_path, validator_path)
+            raise ValueError("response is not a PDF")
+        f.seek(0)
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            sha256.update(chunk)
+    discard(validator_path)
+    return sha256.hexdigest(), os.path.getsize(part_path), offset
+
+class PdfDownloader:
+    """
+    Concurrent, resumable, de-duplicating PDF downloads into one folder
+    
+    The manifest maps each program URL to {'pdf_url', 'file', 'sha256',
+    'size'} and is rewritten after every completed download, so an
+    interrupted run loses at most the downloads still in flight (and those
+    resume from their .part files).
+    """
+    
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+        os.makedirs(output_dir, exist_ok=True)
+        self.manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+        self.manifest = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        present = [
+            entry for entry in self.manifest.values()
+            if os.path.exists(os.path.join(output_dir, entry['file']))
+        ]
+        self.by_hash = {entry['sha256']: entry['file'] for entry in present}
+        # Another program linking the same PDF needs no request at all
+        self.by_pdf_url = {entry['pdf_url']: entry for entry in present}
+        self.lock = threading.Lock()
+        self.part_locks = {}
+    
+    def is_done(self, program: Dict) -> bool:
+        entry = self.manifest.get(program['url'])
+        return bool(entry) and os.path.exists(os.path.join(self.output_dir, entry['file']))
+    
+    def save_manifest(self):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.manifest_path)
+    
+    def download(self, program: Dict) -> Tuple[str, Dict]:
+        """Returns (status, manifest entry); status is 'downloaded', 'resumed' or 'duplicate'"""
+        pdf_url = resolve_pdf_url(program)
+        if not pdf_url:
+            raise ValueError("no PDF link found")
+        
+        # Named by URL, so a rerun finds the partial file again
+        part_name = '.' + hashlib.sha1(pdf_url.encode('utf-8')).hexdigest()[:16] + '.part'
+        part_path = os.path.join(self.output_dir, part_name)
+        with self.lock:
+            part_lock = self.part_locks.setdefault(part_name, threading.Lock())
+        
+        # Programs sharing a PDF URL must not write the same .part file at once
+        with part_lock:
+            known = self.by_pdf_url.get(pdf_url)
+            if known:
+                with self.lock:
+                    self.manifest[program['url']] = known
+                    self.save_manifest()
+                return 'duplicate', known
+            
+            sha256, size, resumed = download_file(pdf_url, part_path)
+            
+            with self.lock:
+                if sha256 in self.by_hash:
+                    os.remove(part_path)
+                    status = 'duplicate'
+                    filename = self.by_hash[sha256]
+                else:
+                    status = 'resumed' if resumed else 'downloaded'
+                    filename = pdf_filename(program)
+                    stem, counter = filename[:-4], 2
+                    while os.path.exists(os.path.join(self.output_dir, filename)):
+                        filename = f"{stem}-{counter}.pdf"
+                        counter += 1
+                    os.replace(part_path, os.path.join(self.output_dir, filename))
+                    self.by_hash[sha256] = filename
+                
+                entry = {'pdf_url': pdf_url, 'file': filename, 'sha256': sha256, 'size': size}
+                self.manifest[program['url']] = entry
+                self.by_pdf_url[pdf_url] = entry
+                self.save_manifest()
+        return status, entry
+
+def download_all(programs: list, output_dir: str, workers: int = 4) -> Dict:
+    """Download every program's PDF, returning per-status counts"""
+    downloader = PdfDownloader(output_dir)
+    counts = {'downloaded': 0, 'resumed': 0, 'duplicate': 0, 'skipped': 0, 'failed': 0}
+    total_bytes = 0
+    
+    todo = []
+    for program in programs:
+        if downloader.is_done(program):
+            counts['skipped'] += 1
+        else:
+            todo.append(program)
+    
+    print(f"📥 {len(todo)} to download, {counts['skipped']} already present, {workers} workers")
+    start = time.perf_counter()
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(downloader.download, program): program for program in todo}
+        for future in as_completed(futures):
+            program = futures[future]
+            try:
+                status, entry = future.result()
+            except Exception as e:
+                counts['failed'] += 1
+                print(f"  ❌ {program['title'][:60]}: {e}")
+                continue
+            counts[status] += 1
+            if status != 'duplicate':
+                total_bytes += entry['size']
+            label = {'downloaded': '✓', 'resumed': '↻', 'duplicate': '='}[status]
+            print(f"  {label} {entry['file']} ({entry['size'] / 1024:.0f} KB{', duplicate' if status == 'duplicate' else ''})")
+    
+    # Also written when nothing was downloaded, so the pipeline sees the stage as done
+    downloader.save_manifest()
+    
+    elapsed = time.perf_counter() - start
+    print(f"\n⏱️  {elapsed:.2f}s, {total_bytes / 1024 / 1024:.1f} MB "
+          f"({total_bytes / 1024 / 1024 / elapsed if elapsed else 0:.2f} MB/s)")
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description='Download journal PDFs for scraped programs')
+    parser.add_argument('programs', nargs='?', default='scraped_programs.json',
+                        help='Output of scrape-p2m.py (default: scraped_programs.json)')
+    parser.add_argument('--output', default='pdfs',
+                        help='Folder to download into, i.e. the pdf-to-md.py input folder (default: pdfs)')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Concurrent downloads (default: 4)')
+    args = parser.parse_args()
+    
+    if not os.path.exists(args.programs):
+        print(f"❌ File not found: {args.programs}")
+        print("   Run scripts/scrape-p2m.py first")
+        sys.exit(1)
+    if args.workers < 1:
+        print("❌ --workers must be at least 1")
+        sys.exit(1)
+    
+    with open(args.programs, 'r', encoding='utf-8') as f:
+        programs = [program for program in json.load(f) if program.get('url')]
+    
+    print("🚀 Starting PDF download...")
+    print("=" * 60)
+    
+    counts = download_all(programs, args.output, args.workers)
+    
+    print("\n" + "=" * 60)
+    print(f"✅ Download complete!")
+    print(f"📊 {counts['downloaded']} downloaded, {counts['resumed']} resumed, "
+          f"{counts['duplicate']} duplicates, {counts['skipped']} skipped, {counts['failed']} failed")
+    print(f"📁 PDFs in: {args.output}")
+    get_session().print_metrics()
+    print("\n💡 Next step:")
+    print(f"   python scripts/pdf-to-md.py {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""
+Gazetteer Index
+Prebuilt lookup structures over a location table such as BATAM_LOCATIONS
+
+Replaces the linear "is one name inside the other" scan with:
+    - an exact-name dict
+    - a keyword automaton for gazetteer names contained in the query
+      ("Kelurahan Tanjung Uncang, Batu Aji" -> 'tanjung uncang')
+    - a token inverted index plus a sorted suffix array for queries contained
+      in a gazetteer name ("uncang" -> 'tanjung uncang')
+    - a character-trigram index with a bounded edit-distance scorer for
+      misspelled names ("Sembulan" -> 'sembulang'). Only the distinctive
+      part of a name is indexed and scored: generic words such as "pulau"
+      and "tanjung" are shared by too many places ("Pulau Abang" is not
+      Pulau Galang) and must match as words instead.
+
+Names are normalized on both sides first (normalize_location_name, which
+also expands common abbreviations such as "Tg.", "Kel." and "P.").
+
+Ties are broken deterministically (most specific name, then alphabetical),
+never by dict insertion order.
+
+Usage:
+    from gazetteer_index import GazetteerIndex
+
+    index = GazetteerIndex(BATAM_LOCATIONS)
+    index.lookup('Kel. Tanjung Uncang')
+    # ('tanjung uncang', 'contains')
+    index.fuzzy_lookup('Sembulan')
+    # [('sembulang', 0.89)]
+"""
+
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from geocode_cache import normalize_location_name
+from keyword_automaton import KeywordAutomaton
+
+# Place-type words that prefix many names; fuzzy matching compares them as
+# whole words and scores only the rest of the name
+GENERIC_TOKENS = frozenset([
+    'pulau', 'tanjung', 'kelurahan', 'kecamatan', 'kabupaten', 'kota', 'desa',
+    'kampung', 'dusun', 'sei', 'sungai', 'teluk',
+])
+
+# Fuzzy probes skip trigrams shared by more names than this: they would
+# bring in a large slice of the gazetteer as candidates for one typo
+MAX_TRIGRAM_POSTINGS = 64
+
+def split_generic(name: str) -> Tuple[Tuple[str, ...], str]:
+    """('pulau', 'galang') -> (('pulau',), 'galang'); all-generic names stay whole"""
+    tokens = name.split()
+    generic = tuple(token for token in tokens if token in GENERIC_TOKENS)
+    distinctive = ' '.join(token for token in tokens if token not in GENERIC_TOKENS)
+    return (generic, distinctive) if distinctive else ((), name)
+
+def trigrams(text: str) -> List[str]:
+    """Character trigrams of a name, padded so word edges count"""
+    padded = f"  {text} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+def bounded_edit_distance(a: str, b: str, max_distance: int) -> Optional[int]:
+    """
+    Levenshtein distance, or None as soon as it must exceed max_distance
+    
+    Only the diagonal band |i - j| <= max_distance of the table is computed.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+    too_far = max_distance + 1
+    previous = [j if j <= max_distance else too_far for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        low = max(1, i - max_distance)
+        high = min(len(b), i + max_distance)
+        current = [too_far] * (len(b) + 1)
+        current[0] = i if i <= max_distance else too_far
+        char_a = a[i - 1]
+        row_min = current[0]
+        for j in range(low, high + 1):
+            cost = previous[j - 1] + (char_a != b[j - 1])
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if current[j - 1] + 1 < cost:
+                cost = current[j - 1] + 1
+            current[j] = cost
+            if cost < row_min:
+                row_min = cost
+        if row_min > max_distance:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= max_distance else None
+
+class GazetteerIndex:
+    """
+    Read-only index over {name: location} entries
+    
+    lookup() returns (name, match_type) for the best entry, where match_type
+    is 'exact', 'contains' (the query contains the name) or 'within' (the
+    query is part of the name), or None when nothing matches.
+    """
+    
+    def __init__(self, locations: Dict[str, Dict]):
+        self.locations = locations
+        self.source_size = len(locations)
+        self.names = {}
+        for key in locations:
+            # Several raw keys can normalize alike; keep the first alphabetically
+            name = normalize_location_name(key)
+            if name and (name not in self.names or key < self.names[name]):
+                self.names[name] = key
+        
+        self.automaton = KeywordAutomaton(self.names)
+        
+        # Token -> names containing that token
+        self.token_index = {}
+        for name in self.names:
+            for token in set(name.split()):
+                self.token_index.setdefault(token, set()).add(name)
+        
+        # Every suffix of every token, sorted: substring search becomes a
+        # prefix search (bisect) over suffixes
+        self.suffixes = sorted(
+            (token[i:], token)
+            for token in self.token_index
+            for i in range(len(token))
+        )
+        
+        # Distinctive part -> names (e.g. 'galang' -> pulau galang); then
+        # trigram -> part length -> parts. Bucketing by length lets a lookup
+        # skip parts too long or short to be within the edit distance bound
+        self.distinctive = {}
+        for name in self.names:
+            generic, part = split_generic(name)
+            self.distinctive.setdefault(part, []).append((generic, name))
+        self.trigram_index = {}
+        self.trigram_frequency = Counter()
+        self.part_trigrams = {}
+        for part in self.distinctive:
+            self.part_trigrams[part] = set(trigrams(part))
+            for gram in self.part_trigrams[part]:
+                self.trigram_index.setdefault(gram, {}).setdefault(len(part), []).append(part)
+                self.trigram_frequency[gram] += 1
+        self.max_part_tokens = max((len(part.split()) for part in self.distinctive), default=0)
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    def _tokens_containing(self, fragment: str) -> set:
+        """Gazetteer tokens that contain `fragment` as a substring"""
+        tokens = set()
+        i = bisect_left(self.suffixes, (fragment,))
+        while i < len(self.suffixes) and self.suffixes[i][0].startswith(fragment):
+            tokens.add(self.suffixes[i][1])
+            i += 1
+        return tokens
+    
+    def names_containing(self, query: str) -> List[str]:
+        """Gazetteer names that contain `query`, shortest first"""
+        candidates = None
+        for fragment in query.split():
+            names = set()
+            for token in self._tokens_containing(fragment):
+                names |= self.token_index[token]
+            candidates = names if candidates is None else candidates & names
+            if not candidates:
+                return []
+        # The index narrows by token; the substring test checks token order
+        return sorted((name for name in candidates or () if query in name), key=lambda n: (len(n), n))
+    
+    def names_within(self, query: str) -> List[str]:
+        """Gazetteer names found inside `query`, most specific first"""
+        found = {}
+        for start, name in self.automaton.find_all(query):
+            found.setdefault(name, start)
+        return sorted(found, key=lambda n: (-len(n), found[n], n))
+    
+    def fuzzy_lookup(self, location_name: str, limit: int = 5,
+                     min_score: float = 0.85) -> List[Tuple[str, float]]:
+        """
+        Gazetteer entries resembling a word span of the query
+        
+        Spans of up to max_part_tokens distinctive words are matched against
+        the trigram index of the distinctive name parts; a name whose generic
+        words differ from those written right before the span ("Pulau X" vs
+        "Tanjung X") is skipped. Score = 1 - distance / length, so a span
+        can be at most length * (1 - min_score) edits away. Two strings
+        within edit distance k share at least (trigrams - 3k) trigrams, so
+        only the 3k + 1 rarest trigrams of a span need probing; trigrams in
+        more than MAX_TRIGRAM_POSTINGS names are not probed, which keeps the
+        candidate count flat as the gazetteer grows (a typo next to such a
+        trigram can then go unmatched).
+        Returns [(key, score)] best first, only scores >= min_score.
+        """
+        tokens = normalize_location_name(location_name).split()
+        spans = {}
+        for i, token in enumerate(tokens):
+            if token in GENERIC_TOKENS:
+                continue
+            # Generic words right before the span, e.g. ('pulau',) for "pulau abang"
+            start = i
+            while start and tokens[start - 1] in GENERIC_TOKENS:
+                start -= 1
+            generic = tuple(tokens[start:i])
+            for end in range(i + 1, min(len(tokens), i + self.max_part_tokens) + 1):
+                if tokens[end - 1] in GENERIC_TOKENS:
+                    break
+                span = ' '.join(tokens[i:end])
+                spans.setdefault(span, set()).add(generic)
+        
+        best = {}
+        for span, generics in spans.items():
+            max_distance = min(3, int(len(span) * (1 - min_score) + 1e-9))
+            # Too short to tell a typo from a different word
+            if max_distance < 1:
+                continue
+            span_grams = set(trigrams(span))
+            grams = sorted(span_grams, key=lambda gram: self.trigram_frequency.get(gram, 0))
+            required = max(1, len(grams) - 3 * max_distance)
+            
+            candidates = set()
+            for gram in grams[:len(grams) - required + 1]:
+                if self.trigram_frequency.get(gram, 0) > MAX_TRIGRAM_POSTINGS:
+                    break
+                by_length = self.trigram_index.get(gram)
+                if not by_length:
+                    continue
+                for length in range(len(span) - max_distance, len(span) + max_distance + 1):
+                    candidates.update(by_length.get(length, ()))
+            
+            for part in candidates:
+                # Cheap count filter before the edit distance
+                part_grams = self.part_trigrams[part]
+                if len(span_grams & part_grams) < max(len(span_grams), len(part_grams)) - 3 * max_distance:
+                    continue
+                distance = bounded_edit_distance(span, part, max_distance)
+                if distance is None:
+                    continue
+                score = round(1 - distance / max(len(span), len(part)), 2)
+                if score < min_score:
+                    continue
+                for name_generic, name in self.distinctive[part]:
+                    # A bare span ("Sembulan") may be any kind of place
+                    if name_generic and any(generic and generic != name_generic for generic in generics):
+                        continue
+                    if score > best.get(name, 0):
+                        best[name] = score
+        
+        ranked = sorted(best.items(), key=lambda item: (-item[1], -len(item[0]), item[0]))
+        return [(self.names[name], score) for name, score in ranked[:limit]]
+    
+    def lookup(self, location_name: str) -> Optional[Tuple[str, str]]:
+        query = normalize_location_name(location_name)
+        if not query:
+            return None
+        
+        if query in self.names:
+            return self.names[query], 'exact'
+        
+        within = self.names_within(query)
+        if within:
+            return self.names[within[0]], 'contains'
+        
+        containing = self.names_containing(query)
+        if containing:
+            return self.names[containing[0]], 'within'
+        
+        return None
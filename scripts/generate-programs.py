@@ -4,22 +4,31 @@ Generates realistic P2M program data based on templates
 
 Usage:
     python scripts/generate-programs.py --count 50
+    python scripts/generate-programs.py --count 100000 --bundle bundle
 
 Output:
     - generated_programs.json
     - programs.ts (ready to paste into src/data/programs.ts)
+    - with --bundle DIR: the columnar data bundle (see program_export.py)
+    - with --shards DIR: one <id>.json per program plus manifest.json
+
+Count:
+    --count programs are generated (default 50), with the category mix
+    (8 Pendidikan, 6 Kesehatan, 7 Teknologi, ... per 50 programs) scaled to
+    that number. Earlier versions ignored --count and always produced the
+    same 50 programs; --count 50 still gives exactly that mix.
 """
 
-import json
+import os
+import sys
 import random
 import argparse
-from typing import List, Dict
+from typing import Dict, Iterator, List
 from datetime import datetime
 
 # Import geocoding
-import sys
-sys.path.append('.')
 from geocode_locations import BATAM_LOCATIONS
+from program_export import BundleWriter, DEFAULT_CHUNK_SIZE, ShardWriter, bundle_report, export_programs
 
 # ============================================================================
 # PROGRAM TEMPLATES BY CATEGORY
@@ -264,10 +273,10 @@ def generate_program(category: str, index: int, year: int) -> Dict:
     
     return program
 
-def generate_programs(total_count: int = 50) -> List[Dict]:
-    """Generate multiple programs"""
+def iter_programs(total_count: int = 50) -> Iterator[Dict]:
+    """Generate programs one at a time (nothing is held in memory)"""
     
-    # Category distribution
+    # Category distribution (per 50 programs)
     distribution = {
         'Pendidikan': 8,
         'Kesehatan': 6,
@@ -281,51 +290,29 @@ def generate_programs(total_count: int = 50) -> List[Dict]:
         'Kelautan': 2,
     }
     
-    programs = []
+    # Scale to total_count, handing the rounding remainder to the first categories
+    weight = sum(distribution.values())
+    counts = {category: count * total_count // weight for category, count in distribution.items()}
+    for category in list(counts)[:total_count - sum(counts.values())]:
+        counts[category] += 1
+    
+    verbose = total_count <= 100
     index = 1
     
-    for category, count in distribution.items():
+    for category, count in counts.items():
         for i in range(count):
             year = random.choice([2020, 2021, 2022, 2023, 2024])
             program = generate_program(category, index, year)
-            programs.append(program)
+            if verbose:
+                print(f"✓ Generated: {program['name'][:60]}...")
+            elif index % 10000 == 0:
+                print(f"✓ Generated {index}/{total_count}")
             index += 1
-            print(f"✓ Generated: {program['name'][:60]}...")
-    
-    return programs
+            yield program
 
-# ============================================================================
-# EXPORT FUNCTIONS
-# ============================================================================
-
-def export_to_typescript(programs: List[Dict], output_file: str):
-    """Export programs to TypeScript format"""
-    
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write("// Auto-generated program data\n")
-        f.write("// Generated on: " + datetime.now().strftime("%Y-%m-%d %H:%M:%S") + "\n\n")
-        f.write("export const programs: Program[] = [\n")
-        
-        for i, program in enumerate(programs):
-            f.write("  {\n")
-            f.write(f"    id: '{program['id']}',\n")
-            f.write(f"    name: '{program['name']}',\n")
-            f.write(f"    category: '{program['category']}',\n")
-            f.write(f"    description: '{program['description']}',\n")
-            f.write(f"    location: {{\n")
-            f.write(f"      lat: {program['location']['lat']},\n")
-            f.write(f"      lng: {program['location']['lng']},\n")
-            f.write(f"      address: '{program['location']['address']}',\n")
-            f.write(f"    }},\n")
-            f.write(f"    images: {json.dumps(program['images'])},\n")
-            if program['videoUrl']:
-                f.write(f"    videoUrl: '{program['videoUrl']}',\n")
-            f.write(f"    detailsUrl: '{program['detailsUrl']}',\n")
-            f.write(f"    year: {program['year']},\n")
-            f.write(f"    status: '{program['status']}',\n")
-            f.write("  },\n" if i < len(programs) - 1 else "  }\n")
-        
-        f.write("];\n")
+def generate_programs(total_count: int = 50) -> List[Dict]:
+    """Generate multiple programs"""
+    return list(iter_programs(total_count))
 
 # ============================================================================
 # MAIN
@@ -334,27 +321,47 @@ def export_to_typescript(programs: List[Dict], output_file: str):
 def main():
     parser = argparse.ArgumentParser(description='Generate P2M program data')
     parser.add_argument('--count', type=int, default=50, help='Number of programs to generate')
+    parser.add_argument('--bundle', metavar='DIR', help='Also write the columnar data bundle to DIR')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f'Programs per bundle chunk file (default: {DEFAULT_CHUNK_SIZE})')
+    parser.add_argument('--shards', metavar='DIR', help='Also write one <id>.json per program to DIR')
     args = parser.parse_args()
     
+    if args.shards and args.bundle and os.path.abspath(args.shards) == os.path.abspath(args.bundle):
+        print("❌ --shards and --bundle need separate folders")
+        sys.exit(1)
+    
+    targets = []
+    if args.bundle:
+        targets.append(BundleWriter(args.bundle, args.chunk_size))
+    if args.shards:
+        targets.append(ShardWriter(args.shards))
+    
     print("🚀 P2M Program Generator")
     print("=" * 60)
     print(f"Generating {args.count} programs...")
     print()
     
-    programs = generate_programs(args.count)
-    
-    # Save JSON
-    with open('generated_programs.json', 'w', encoding='utf-8') as f:
-        json.dump(programs, f, indent=2, ensure_ascii=False)
-    
-    # Save TypeScript
-    export_to_typescript(programs, 'generated_programs.ts')
+    # Stream straight into JSON and TypeScript
+    exporter = export_programs(
+        iter_programs(args.count),
+        ts_path='generated_programs.ts',
+        json_path='generated_programs.json',
+        header=["Auto-generated program data",
+                "Generated on: " + datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
+        targets=targets,
+    )
     
     print()
     print("=" * 60)
-    print(f"✅ Generated {len(programs)} programs")
+    print(f"✅ Generated {exporter.count} programs")
     print(f"📁 Saved to generated_programs.json")
     print(f"📁 Saved to generated_programs.ts")
+    if args.shards:
+        print(f"📁 Saved {exporter.count} shards to {args.shards}")
+    if args.bundle:
+        print()
+        bundle_report(args.bundle, monolithic=['generated_programs.ts', 'generated_programs.json'])
     print()
     print("💡 Next steps:")
     print("   1. Review generated_programs.json")
@@ -8,13 +8,37 @@ Usage:
 Methods:
     1. Nominatim (OpenStreetMap) - Free, no API key
     2. Manual coordinate database for Batam/Kepri
-    3. Google Maps fallback (requires API key)
+    3. Offline OSM place index (see offline_geocoder.py) - no network
+    4. Google Maps fallback (requires API key)
+
+Providers:
+    GEOCODE_PROVIDERS selects the lookups tried after the database, in order
+    (default "offline,nominatim"). Use "offline" to never touch the network.
+
+Caching:
+    Nominatim answers (found and not found) are kept in a persistent SQLite
+    cache (see geocode_cache.py), so reruns skip the network and rate-limit
+    delay for places that were already looked up.
 """
 
+import os
 import time
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Dict, Optional, Tuple
-import requests
+
+from geocode_cache import GeocodeCache, get_default_cache, normalize_location_name
+from gazetteer_index import GazetteerIndex
+from http_session import get_session
+from offline_geocoder import get_offline_geocoder
+
+# Override (e.g. with a local stub server) via the NOMINATIM_URL environment variable
+NOMINATIM_URL = os.environ.get('NOMINATIM_URL', 'https://nominatim.openstreetmap.org/search')
+
+DEFAULT_PROVIDERS = tuple(
+    p.strip() for p in os.environ.get('GEOCODE_PROVIDERS', 'offline,nominatim').split(',') if p.strip()
+)
 
 # ============================================================================
 # PRE-DEFINED BATAM/KEPRI LOCATIONS (Most Accurate)
@@ -53,27 +77,92 @@ BATAM_LOCATIONS = {
 # GEOCODING FUNCTIONS
 # ============================================================================
 
+_gazetteer_index = None
+
+def get_gazetteer_index() -> GazetteerIndex:
+    """Index over BATAM_LOCATIONS, rebuilt if the table was edited at runtime"""
+    global _gazetteer_index
+    if _gazetteer_index is None or _gazetteer_index.locations is not BATAM_LOCATIONS \
+            or _gazetteer_index.source_size != len(BATAM_LOCATIONS):
+        _gazetteer_index = GazetteerIndex(BATAM_LOCATIONS)
+    return _gazetteer_index
+
 def geocode_from_database(location_name: str) -> Optional[Dict]:
     """
     Check if location exists in our pre-defined database
     This is the most accurate method for Batam/Kepri
+    
+    Uses the prebuilt GazetteerIndex: exact names first, then the most
+    specific database name mentioned in the query, then the shortest
+    database name that contains the query. Misspelled names are left to
+    geocode_fuzzy(), after every other provider.
     """
-    location_lower = location_name.lower().strip()
+    match = get_gazetteer_index().lookup(location_name)
+    if not match:
+        return None
     
-    # Direct match
-    if location_lower in BATAM_LOCATIONS:
-        result = BATAM_LOCATIONS[location_lower].copy()
+    key, match_type = match
+    result = BATAM_LOCATIONS[key].copy()
+    if match_type == 'exact':
+        # Direct match
         result['method'] = 'database'
         result['confidence'] = 'high'
+    else:
+        # Partial match
+        result['method'] = 'database_partial'
+        result['confidence'] = 'medium'
+    return result
+
+def geocode_fuzzy(location_name: str, providers: Tuple[str, ...] = DEFAULT_PROVIDERS) -> Optional[Dict]:
+    """
+    Closest misspelled database (or offline index) name, low confidence
+    
+    Only tried once the offline index, the cache and Nominatim found
+    nothing: a near miss ("Sembulan", OCR noise) is often a typo, but it can
+    also be a real place that is simply not in the database.
+    """
+    candidates = get_gazetteer_index().fuzzy_lookup(location_name, limit=1)
+    if candidates:
+        key, score = candidates[0]
+        result = BATAM_LOCATIONS[key].copy()
+        result['method'] = 'database_fuzzy'
+        result['confidence'] = 'low'
+        result['score'] = score
         return result
+    geocoder = get_offline_geocoder() if 'offline' in providers else None
+    return geocoder.fuzzy_geocode(location_name) if geocoder else None
+
+def query_nominatim(location_name: str) -> Optional[Dict]:
+    """
+    Query Nominatim, returning None when the place is not found
     
-    # Partial match
-    for key, value in BATAM_LOCATIONS.items():
-        if key in location_lower or location_lower in key:
-            result = value.copy()
-            result['method'] = 'database_partial'
-            result['confidence'] = 'medium'
-            return result
+    Network and HTTP errors are raised, so callers can tell "not found"
+    (safe to cache) from "could not ask" (not safe to cache).
+    """
+    # Add "Batam" or "Kepulauan Riau" to improve accuracy
+    search_query = f"{location_name}, Batam, Kepulauan Riau, Indonesia"
+    
+    params = {
+        'q': search_query,
+        'format': 'json',
+        'limit': 1,
+        'countrycodes': 'id',  # Indonesia only
+    }
+    
+    # Pooled session: keep-alive, retry/backoff on 429/5xx
+    response = get_session().get(NOMINATIM_URL, params=params, timeout=5, conditional=False)
+    response.raise_for_status()
+    
+    results = response.json()
+    if results:
+        result = results[0]
+        return {
+            'lat': float(result['lat']),
+            'lng': float(result['lon']),
+            'address': result.get('display_name', location_name),
+            'method': 'nominatim',
+            'confidence': 'medium'
+        }
     
     return None
 
@@ -82,48 +171,32 @@ def geocode_nominatim(location_name: str) -> Optional[Dict]:
     Geocode using Nominatim (OpenStreetMap) - Free, no API key required
     """
     try:
-        # Add "Batam" or "Kepulauan Riau" to improve accuracy
-        search_query = f"{location_name}, Batam, Kepulauan Riau, Indonesia"
-        
-        url = "https://nominatim.openstreetmap.org/search"
-        params = {
-            'q': search_query,
-            'format': 'json',
-            'limit': 1,
-            'countrycodes': 'id',  # Indonesia only
-        }
-        headers = {
-            'User-Agent': 'P2M-Interactive-Map/1.0'
-        }
-        
-        response = requests.get(url, params=params, headers=headers, timeout=5)
-        response.raise_for_status()
-        
-        results = response.json()
-        if results:
-            result = results[0]
-            return {
-                'lat': float(result['lat']),
-                'lng': float(result['lon']),
-                'address': result.get('display_name', location_name),
-                'method': 'nominatim',
-                'confidence': 'medium'
-            }
-        
-        return None
-        
+        return query_nominatim(location_name)
     except Exception as e:
         print(f"  ⚠️  Nominatim error: {e}")
         return None
 
-def geocode_location(location_name: str, delay: float = 1.0) -> Optional[Dict]:
+def geocode_offline(location_name: str) -> Optional[Dict]:
+    """Look up the imported OSM place index, if there is one"""
+    geocoder = get_offline_geocoder()
+    return geocoder.geocode(location_name) if geocoder else None
+
+def geocode_location(location_name: str, delay: float = 1.0,
+                     cache: Optional[GeocodeCache] = None,
+                     providers: Tuple[str, ...] = DEFAULT_PROVIDERS) -> Optional[Dict]:
     """
     Geocode a location using multiple methods (fallback chain)
     
     Priority:
     1. Pre-defined database (most accurate for Batam)
-    2. Nominatim (free, no API key)
-    3. Manual input (fallback)
+    2. Offline place index (imported OSM extract, no network)
+    3. Geocode cache (previous Nominatim answers, found or not)
+    4. Nominatim (free, no API key)
+    5. Fuzzy match against the database / offline index (low confidence)
+    6. Manual input (fallback)
+    
+    Steps 2 and 4 only run when listed in `providers`.
+    cache defaults to the shared persistent cache (get_default_cache()).
     """
     print(f"\n📍 Geocoding: {location_name}")
     
@@ -133,14 +206,44 @@ def geocode_location(location_name: str, delay: float = 1.0) -> Optional[Dict]:
         print(f"  ✓ Found in database ({result['confidence']} confidence)")
         return result
     
-    # Method 2: Nominatim
-    time.sleep(delay)  # Rate limiting
-    result = geocode_nominatim(location_name)
+    # Method 2: Offline index
+    if 'offline' in providers:
+        result = geocode_offline(location_name)
+        if result:
+            print(f"  ✓ Found in offline index ({result['confidence']} confidence)")
+            return result
+    
+    # Method 3: Cache lookup
+    if cache is None:
+        cache = get_default_cache()
+    cached = cache.get(location_name) if cache else None
+    if cached and cached['found']:
+        print(f"  ✓ Found in cache ({cached['result']['method']})")
+        return cached['result']
+    
+    # Method 4: Nominatim
+    if cached:
+        print(f"  ✓ Known miss in cache (skipping Nominatim)")
+    elif 'nominatim' in providers:
+        time.sleep(delay)  # Rate limiting
+        try:
+            result = query_nominatim(location_name)
+            if cache:
+                cache.put(location_name, result)
+        except Exception as e:
+            print(f"  ⚠️  Nominatim error: {e}")
+            result = None
+        if result:
+            print(f"  ✓ Found via Nominatim")
+            return result
+    
+    # Method 5: Misspelled database names
+    result = geocode_fuzzy(location_name, providers)
     if result:
-        print(f"  ✓ Found via Nominatim")
+        print(f"  ✓ Fuzzy match {result['address']} (low confidence, score {result['score']})")
         return result
     
-    # Method 3: Manual fallback
+    # Method 6: Manual fallback
     print(f"  ❌ Could not geocode automatically")
     print(f"  💡 Please find coordinates manually:")
     print(f"     1. Go to https://www.google.com/maps")
@@ -153,25 +256,140 @@ def geocode_location(location_name: str, delay: float = 1.0) -> Optional[Dict]:
 # BATCH GEOCODING
 # ============================================================================
 
-def geocode_batch(locations: list) -> Dict:
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter
+    
+    acquire() blocks until a token is available. Tokens refill at `rate` per
+    second up to `capacity`, so capacity=1 spaces requests evenly.
+    """
+    
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+def _rate_limited_query(bucket: TokenBucket, location_name: str) -> Optional[Dict]:
+    bucket.acquire()
+    return query_nominatim(location_name)
+
+def geocode_batch(locations: list, cache: Optional[GeocodeCache] = None,
+                  rate: float = 1.0, workers: int = 2,
+                  providers: Tuple[str, ...] = DEFAULT_PROVIDERS) -> Dict:
     """
     Geocode a batch of locations
+    
+    Names are de-duplicated after normalization ("Tg. Uncang" and
+    "Tanjung Uncang" are looked up once). Database, offline index and cache
+    hits resolve immediately; only true misses go to Nominatim, through a token bucket
+    that allows `rate` requests per second. Requests run on `workers`
+    threads, so one request's latency overlaps the wait for the next token
+    and the local lookups still in progress. Names still unresolved after
+    that get a last, low-confidence fuzzy match (geocode_fuzzy).
     """
     print("🌍 Starting batch geocoding...")
     print("=" * 60)
     
+    if cache is None:
+        cache = get_default_cache()
+    
+    start = time.perf_counter()
+    
+    # De-duplicate: normalized name -> original spellings
+    groups = {}
+    for location in locations:
+        groups.setdefault(normalize_location_name(location), []).append(location)
+    
+    resolved = {}
+    sources = {'database': 0, 'offline': 0, 'cache': 0, 'nominatim': 0, 'fuzzy': 0}
+    bucket = TokenBucket(rate)
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = {}
+        for key, names in groups.items():
+            name = names[0]
+            result = geocode_from_database(name)
+            if result:
+                resolved[key] = result
+                sources['database'] += 1
+                continue
+            
+            result = geocode_offline(name) if 'offline' in providers else None
+            if result:
+                resolved[key] = result
+                sources['offline'] += 1
+                continue
+            
+            cached = cache.get(name) if cache else None
+            if cached:
+                resolved[key] = cached['result']
+                if cached['found']:
+                    sources['cache'] += 1
+                continue
+            
+            if 'nominatim' not in providers:
+                continue
+            pending[executor.submit(_rate_limited_query, bucket, name)] = (key, name)
+        
+        if pending:
+            print(f"🌐 Querying Nominatim for {len(pending)} names ({rate:g} req/s)...")
+        
+        for future in as_completed(pending):
+            key, name = pending[future]
+            try:
+                result = future.result()
+                # SQLite connections stay on this thread; workers only do HTTP
+                if cache:
+                    cache.put(name, result)
+            except Exception as e:
+                print(f"  ⚠️  Nominatim error for {name}: {e}")
+                result = None
+            resolved[key] = result
+            if result:
+                sources['nominatim'] += 1
+            print(f"  {'✓' if result else '❌'} {name}")
+    
+    # Last resort for whatever is still unresolved: misspelled database names
+    for key, names in groups.items():
+        if not resolved.get(key):
+            resolved[key] = geocode_fuzzy(names[0], providers)
+            if resolved[key]:
+                sources['fuzzy'] += 1
+    
     results = {}
     failed = []
     
     for location in locations:
-        result = geocode_location(location)
+        result = resolved.get(normalize_location_name(location))
         if result:
             results[location] = result
         else:
             failed.append(location)
     
+    elapsed = time.perf_counter() - start
+    
     print("\n" + "=" * 60)
     print(f"✅ Successfully geocoded: {len(results)}/{len(locations)}")
+    print(f"🔁 Unique names: {len(groups)} (from {len(locations)} inputs)")
+    print(f"📊 Sources: {sources['database']} database, {sources['offline']} offline, "
+          f"{sources['cache']} cache, {sources['nominatim']} Nominatim, {sources['fuzzy']} fuzzy")
+    print(f"⏱️  {elapsed:.2f}s total, {len(locations) / elapsed if elapsed else 0:.1f} locations/s")
+    if cache:
+        print(f"🗄️  Cache: {cache.hits} hits, {cache.misses} misses ({cache.path})")
     
     if failed:
         print(f"\n❌ Failed to geocode ({len(failed)}):")
@@ -204,6 +422,7 @@ def interactive_mode():
     
     if locations:
         results = geocode_batch(locations)
+        get_session().print_metrics()
         
         # Save results
         output_file = "geocoded_locations.json"
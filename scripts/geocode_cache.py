@@ -0,0 +1,150 @@
+"""
+Geocode Cache
+Persistent SQLite cache of geocoding results shared by all scripts
+
+Stores both found coordinates and "not found" answers, keyed by a
+normalized location name ("Tg. Uncang" and "tanjung uncang" share a key),
+so rerunning the pipeline makes no network
+requests for places that were already resolved (or already known to fail).
+
+Usage:
+    from geocode_cache import get_default_cache
+
+    cache = get_default_cache()
+    hit = cache.get('Tanjung Uncang')   # None on a miss
+    cache.put('Tanjung Uncang', {'lat': 1.0856, 'lng': 103.9456, ...})
+    cache.put('Nowhere', None)          # negative result
+
+Location:
+    scripts/.cache/geocode.sqlite3 (override with GEOCODE_CACHE_PATH,
+    disable with GEOCODE_CACHE_PATH=off)
+"""
+
+import os
+import re
+import json
+import time
+import sqlite3
+from typing import Dict, Optional
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'geocode.sqlite3')
+
+# Found places rarely move; "not found" may change as OSM data improves
+POSITIVE_TTL = 90 * 24 * 3600
+NEGATIVE_TTL = 7 * 24 * 3600
+
+# Abbreviations seen in journal text and OCR/LLM output
+ABBREVIATIONS = {
+    'tg': 'tanjung',
+    'tj': 'tanjung',
+    'tjg': 'tanjung',
+    'kel': 'kelurahan',
+    'kec': 'kecamatan',
+    'ds': 'desa',
+    'kp': 'kampung',
+    'kpg': 'kampung',
+    'pl': 'pulau',
+    'kab': 'kabupaten',
+}
+
+# A bare "p" is too common (initials, "p. 12") to expand everywhere; "P."
+# only means Pulau directly in front of a capitalised name ("P. Galang")
+PULAU_ABBREVIATION_RE = re.compile(r'\b[Pp]\.\s*(?=[A-Z])')
+
+def normalize_location_name(location_name: str) -> str:
+    """
+    Lowercase, drop punctuation, collapse whitespace and expand abbreviations
+    
+    The one normalizer for location names: cache keys, batch de-duplication
+    and the gazetteer indexes all use it, so names that are the same place
+    to one of them are the same place to all.
+    """
+    name = PULAU_ABBREVIATION_RE.sub('Pulau ', location_name).lower()
+    name = re.sub(r'[^\w\s]', ' ', name)
+    return ' '.join(ABBREVIATIONS.get(token, token) for token in name.split())
+
+class GeocodeCache:
+    """
+    SQLite-backed geocode cache
+    
+    get() distinguishes three outcomes: a miss (returns None), a cached
+    result (returns {'found': True, 'result': {...}}) and a cached negative
+    answer (returns {'found': False, 'result': None}). Expired rows count as
+    misses. Each process opens its own connection, so the cache can be shared
+    between worker processes.
+    """
+    
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, positive_ttl: int = POSITIVE_TTL,
+                 negative_ttl: int = NEGATIVE_TTL):
+        self.path = path
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.pid = os.getpid()
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS geocode (
+                key TEXT PRIMARY KEY,
+                query TEXT NOT NULL,
+                result TEXT,
+                created_at REAL NOT NULL
+            )
+        ''')
+        self.conn.commit()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, location_name: str) -> Optional[Dict]:
+        key = normalize_location_name(location_name)
+        row = self.conn.execute(
+            'SELECT result, created_at FROM geocode WHERE key = ?', (key,)
+        ).fetchone()
+        if row:
+            result = json.loads(row[0]) if row[0] else None
+            ttl = self.positive_ttl if result else self.negative_ttl
+            if time.time() - row[1] <= ttl:
+                self.hits += 1
+                return {'found': result is not None, 'result': result}
+        self.misses += 1
+        return None
+    
+    def put(self, location_name: str, result: Optional[Dict]):
+        """Store a result, or None for "could not be geocoded" """
+        self.conn.execute(
+            'INSERT OR REPLACE INTO geocode (key, query, result, created_at) VALUES (?, ?, ?, ?)',
+            (
+                normalize_location_name(location_name),
+                location_name,
+                json.dumps(result, ensure_ascii=False) if result else None,
+                time.time(),
+            ),
+        )
+        self.conn.commit()
+    
+    def purge_expired(self) -> int:
+        """Delete expired rows, returning how many were removed"""
+        now = time.time()
+        cursor = self.conn.execute(
+            'DELETE FROM geocode WHERE (result IS NOT NULL AND created_at < ?) '
+            'OR (result IS NULL AND created_at < ?)',
+            (now - self.positive_ttl, now - self.negative_ttl),
+        )
+        self.conn.commit()
+        return cursor.rowcount
+    
+    def close(self):
+        self.conn.close()
+
+_default_cache = None
+
+def get_default_cache() -> Optional[GeocodeCache]:
+    """Process-wide cache at GEOCODE_CACHE_PATH, or None when disabled"""
+    global _default_cache
+    path = os.environ.get('GEOCODE_CACHE_PATH', DEFAULT_CACHE_PATH)
+    if path.lower() == 'off':
+        return None
+    # SQLite connections must not cross fork(), so worker processes reopen
+    if _default_cache is None or _default_cache.path != path or _default_cache.pid != os.getpid():
+        _default_cache = GeocodeCache(path)
+    return _default_cache
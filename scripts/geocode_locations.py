@@ -0,0 +1,22 @@
+"""
+Geocoding Import Alias
+Makes geocode-locations.py importable (its filename is not a valid module name)
+
+Usage:
+    from geocode_locations import geocode_location, geocode_batch, BATAM_LOCATIONS
+
+Importing this module loads geocode-locations.py from the same folder and
+registers it under the name geocode_locations, so every script (and every
+worker process) shares one copy of the database, caches and HTTP session.
+"""
+
+import os
+import sys
+import importlib.util
+
+_spec = importlib.util.spec_from_file_location(
+    __name__, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'geocode-locations.py')
+)
+_module = importlib.util.module_from_spec(_spec)
+sys.modules[__name__] = _module
+_spec.loader.exec_module(_module)
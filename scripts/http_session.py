@@ -0,0 +1,161 @@
+"""
+HTTP Session
+Shared HTTP layer for the geocoding and scraping scripts
+
+Features:
+    - keep-alive connection pooling (one TCP/TLS handshake per host, not per request)
+    - retry with exponential backoff on 429 and 5xx (honours Retry-After)
+    - conditional requests: ETag / Last-Modified validators are replayed as
+      If-None-Match / If-Modified-Since, and a 304 returns the stored body
+    - per-host timing metrics
+
+Usage:
+    from http_session import get_session
+
+    session = get_session()
+    response = session.get('https://p2m.polibatam.ac.id/?page_id=6998')
+    session.print_metrics()
+
+Requirements:
+    pip install requests
+"""
+
+import time
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_USER_AGENT = 'P2M-Interactive-Map/1.0'
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+class HttpSession:
+    """
+    requests.Session with pooling, retries, conditional GETs and metrics
+    
+    `validators` maps a full URL to {'etag', 'last_modified', 'status',
+    'headers', 'content'} of the last successful response. Pass a dict that
+    you persist yourself to keep validators across runs; by default they only
+    live for the session. Responses served from a 304 carry
+    `response.not_modified = True`.
+    """
+    
+    def __init__(self, user_agent: str = DEFAULT_USER_AGENT, retries: int = 3,
+                 backoff: float = 0.5, pool_size: int = 10, timeout: float = 10,
+                 validators: Optional[Dict] = None):
+        self.timeout = timeout
+        self.validators = validators if validators is not None else {}
+        self.metrics = {}
+        self.lock = threading.Lock()
+        
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = user_agent
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=('GET', 'HEAD'),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+    
+    def _record(self, url: str, elapsed_ms: float, status: Optional[int]):
+        host = urlsplit(url).netloc
+        with self.lock:
+            stats = self.metrics.setdefault(host, {
+                'requests': 0, 'errors': 0, 'not_modified': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+            })
+            stats['requests'] += 1
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+            if status is None or status >= 400:
+                stats['errors'] += 1
+            elif status == 304:
+                stats['not_modified'] += 1
+    
+    def get(self, url: str, params: Optional[Dict] = None, headers: Optional[Dict] = None,
+            timeout: Optional[float] = None, conditional: bool = True,
+            stream: bool = False) -> requests.Response:
+        """
+        GET with pooling, retries and (optionally) a conditional request
+        
+        stream=True leaves the body unread (for large downloads) and is never
+        conditional; close the response or read it fully to free the connection.
+        """
+        conditional = conditional and not stream
+        full_url = requests.Request('GET', url, params=params).prepare().url
+        headers = dict(headers or {})
+        
+        stored = self.validators.get(full_url) if conditional else None
+        if stored:
+            if stored.get('etag'):
+                headers['If-None-Match'] = stored['etag']
+            if stored.get('last_modified'):
+                headers['If-Modified-Since'] = stored['last_modified']
+        
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url, params=params, headers=headers,
+                                        timeout=timeout or self.timeout, stream=stream)
+        except requests.RequestException:
+            self._record(url, (time.perf_counter() - start) * 1000, None)
+            raise
+        self._record(url, (time.perf_counter() - start) * 1000, response.status_code)
+        
+        if response.status_code == 304 and stored:
+            # Rebuild the previous response from the stored body
+            cached = requests.Response()
+            cached.status_code = stored.get('status', 200)
+            cached.headers.update(stored.get('headers', {}))
+            cached._content = stored['content'].encode('latin-1')
+            cached.url = full_url
+            cached.encoding = response.encoding or stored.get('encoding')
+            cached.not_modified = True
+            return cached
+        
+        response.not_modified = False
+        if conditional and response.ok:
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if etag or last_modified:
+                self.validators[full_url] = {
+                    'etag': etag,
+                    'last_modified': last_modified,
+                    'status': response.status_code,
+                    'headers': {'Content-Type': response.headers.get('Content-Type', '')},
+                    'encoding': response.encoding,
+                    # latin-1 round-trips arbitrary bytes through JSON-friendly text
+                    'content': response.content.decode('latin-1'),
+                }
+        return response
+    
+    def print_metrics(self):
+        """Per-host request counts and latency"""
+        if not self.metrics:
+            return
+        print("🌐 HTTP metrics:")
+        for host, stats in sorted(self.metrics.items()):
+            average = stats['total_ms'] / stats['requests']
+            print(f"   {host}: {stats['requests']} requests, avg {average:.0f} ms, "
+                  f"max {stats['max_ms']:.0f} ms, {stats['not_modified']} not modified, {stats['errors']} errors")
+    
+    def close(self):
+        self.session.close()
+
+_default_session = None
+_default_session_lock = threading.Lock()
+
+def get_session() -> HttpSession:
+    """Process-wide shared session (safe to call from worker threads)"""
+    global _default_session
+    if _default_session is None:
+        with _default_session_lock:
+            if _default_session is None:
+                _default_session = HttpSession()
+    return _default_session
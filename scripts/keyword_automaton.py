@@ -0,0 +1,167 @@
+"""
+Keyword Automaton
+Multi-keyword matcher shared by the data collection scripts
+
+Finds every occurrence of every keyword in one linear pass over the text,
+so matching cost does not grow with the size of the keyword list (e.g. a
+gazetteer of thousands of kelurahan/desa names).
+
+Usage:
+    from keyword_automaton import KeywordAutomaton
+
+    automaton = KeywordAutomaton(['batam', 'batu aji', 'pulau galang'])
+    automaton.find_all('pelatihan di pulau galang, batam')
+    # [(13, 'pulau galang'), (27, 'batam')]
+
+Backends:
+    1. pyahocorasick (Aho-Corasick in C) - one pass for any keyword count,
+       used whenever installed: pip install pyahocorasick
+    2. One literal scan per keyword - without pyahocorasick, for keyword
+       lists below FIND_LOOP_MAX_KEYWORDS, where a handful of C-speed scans
+       beat a regex automaton pass
+    3. Trie-shaped regular expression - pure Python fallback for large
+       keyword lists, also one pass
+"""
+
+import re
+from typing import Dict, Iterable, List, Tuple
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Keyword count from which the regex automaton beats a str.find per keyword
+# (on a 40 KB document the crossover is at roughly 200 keywords)
+FIND_LOOP_MAX_KEYWORDS = 200
+
+def build_trie(keywords: Iterable[str]) -> Dict:
+    """Character trie; the '' key marks the end of a keyword"""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = True
+    return trie
+
+def trie_to_pattern(node: Dict) -> str:
+    """
+    Turn a trie into a regex that shares common prefixes
+    
+    The regex engine then tests one character class per position instead of
+    every keyword in turn, which is what keeps large keyword lists cheap.
+    Longer continuations are tried first, so the longest keyword wins.
+    """
+    branches = [re.escape(char) + trie_to_pattern(child)
+                for char, child in sorted(node.items()) if char != '']
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    return f'(?:{body})?' if '' in node else body
+
+def keyword_pattern(keyword: str, longer: Iterable[str]) -> str:
+    """
+    Whole-word regex for one keyword that skips offsets where a longer
+    keyword also matches
+    
+    The pattern starts with the literal keyword (the boundary check comes
+    after it as a lookbehind), so re can scan for it as fast as str.find.
+    """
+    pattern = re.escape(keyword) + r'(?<!\w' + re.escape(keyword) + r')(?!\w)'
+    for other in longer:
+        pattern += '(?!' + re.escape(other[len(keyword):]) + r'(?!\w))'
+    return pattern
+
+class KeywordAutomaton:
+    """
+    Matches a fixed keyword set against text in a single pass
+    
+    Keywords are matched case-sensitively; callers lowercase both keywords
+    and text. Only whole-word matches are reported ("desa" does not match
+    inside "desain"), and at each start offset only the longest keyword
+    ("pulau galang" rather than "pulau"). Keywords starting later inside a
+    longer match ("galang") are still reported at their own offset.
+    
+    Without pyahocorasick, keyword sets smaller than `find_loop_max` are
+    scanned for one keyword at a time instead (see keyword_pattern); the
+    results are the same.
+    """
+    
+    def __init__(self, keywords: Iterable[str], find_loop_max: int = FIND_LOOP_MAX_KEYWORDS):
+        self.keywords = sorted({k for k in keywords if k})
+        self._native = None
+        self._regex = None
+        self._scans = None
+        
+        if ahocorasick is not None and self.keywords:
+            self._native = ahocorasick.Automaton()
+            for keyword in self.keywords:
+                self._native.add_word(keyword, keyword)
+            self._native.make_automaton()
+        elif len(self.keywords) < find_loop_max:
+            self._scans = [
+                re.compile(keyword_pattern(keyword, [
+                    other for other in self.keywords if len(other) > len(keyword) and other.startswith(keyword)
+                ]))
+                for keyword in self.keywords
+            ]
+        else:
+            pattern = trie_to_pattern(build_trie(self.keywords))
+            # Zero-width lookahead so overlapping matches are all found
+            self._regex = re.compile(r'(?<!\w)(?=(' + pattern + r')(?!\w))') if pattern else None
+    
+    def _scan(self, text: str, index: int, start: int) -> int:
+        """Offset of the next match of keyword `index` at or after start, or -1"""
+        # Most keywords do not occur at all; str.find rules them out cheapest
+        start = text.find(self.keywords[index], start)
+        if start == -1:
+            return -1
+        match = self._scans[index].search(text, start)
+        return match.start() if match else -1
+    
+    def find_all(self, text: str) -> List[Tuple[int, str]]:
+        """All (start, keyword) occurrences, ordered by start offset"""
+        if self._scans is not None:
+            matches = []
+            for i, keyword in enumerate(self.keywords):
+                start = self._scan(text, i, 0)
+                while start != -1:
+                    matches.append((start, keyword))
+                    start = self._scan(text, i, start + 1)
+            return sorted(matches)
+        
+        if self._native is None:
+            if self._regex is None:
+                return []
+            return [(match.start(), match.group(1)) for match in self._regex.finditer(text)]
+        
+        longest = {}
+        for end, keyword in self._native.iter(text):
+            start = end - len(keyword) + 1
+            before = text[start - 1] if start > 0 else ' '
+            after = text[end + 1] if end + 1 < len(text) else ' '
+            if before.isalnum() or before == '_' or after.isalnum() or after == '_':
+                continue
+            if len(keyword) > len(longest.get(start, '')):
+                longest[start] = keyword
+        return sorted(longest.items())
+    
+    def find_first(self, text: str) -> List[Tuple[int, str]]:
+        """The first (start, keyword) occurrence of each keyword found, ordered by start offset"""
+        if self._scans is not None:
+            firsts = ((self._scan(text, i, 0), keyword) for i, keyword in enumerate(self.keywords))
+            return sorted((start, keyword) for start, keyword in firsts if start != -1)
+        
+        firsts = {}
+        for start, keyword in self.find_all(text):
+            firsts.setdefault(keyword, start)
+        return sorted((start, keyword) for keyword, start in firsts.items())
+    
+    def contains_any(self, text: str) -> bool:
+        """Whether at least one keyword occurs in text"""
+        if self._scans is not None:
+            return any(self._scan(text, i, 0) != -1 for i in range(len(self.keywords)))
+        if self._native is None:
+            return self._regex is not None and self._regex.search(text) is not None
+        return bool(self.find_all(text))
@@ -4,24 +4,69 @@ Converts reviewed markdown files to TypeScript program data
 
 Usage:
     python scripts/md-to-programs.py <md_folder>
+    python scripts/md-to-programs.py <md_folder> --workers 4
+    python scripts/md-to-programs.py <md_folder> --full    # ignore the manifest
+    python scripts/md-to-programs.py <md_folder> --id-registry data/program_ids.json
+    python scripts/md-to-programs.py <md_folder> --bundle public/data --shards public/data/programs
 
 Requirements:
     - Markdown files with structured format
     - Manual review completed (locations, categories filled in)
 
+Parallel mode (--workers N > 1):
+    Markdown is parsed on a process pool, and the location hints of all
+    files are geocoded centrally with geocode_batch (de-duplicated and
+    rate-limited) instead of file by file. Programs come out in the same
+    order, with the same IDs, as a serial run.
+
+Incremental runs:
+    <md_folder>/.programs_manifest.json keeps each file's content hash and
+    the program generated from it. Only new or edited files are parsed and
+    geocoded again; the rest are reused, and output files are only rewritten
+    when their content changes. Programs whose location is only a guess
+    (random fallback, low-confidence fuzzy match) are not kept, so they are
+    geocoded again on every run until a real location is found.
+
+Program IDs:
+    IDs look like p2m-2023-1a2b3c: the year plus a hash of the markdown
+    filename, so they do not depend on which other files exist. Every ID
+    handed out is recorded in <md_folder>/program_ids.json, next to the
+    manifest (--id-registry to keep it elsewhere); a file keeps its ID even if
+    its year is edited later, IDs are never reused for another file, and a
+    hash collision is resolved by taking more hash characters.
+
 Output:
     - programs.ts (ready to paste into src/data/programs.ts)
     - programs.json (backup)
+    - <md_folder>/program_ids.json (ID registry - keep it with the markdown)
+    - with --bundle DIR: DIR/markers.json plus description / media / address
+      chunks, so the map can load markers first and details on demand
+      (see BundleWriter in program_export.py); a size report is printed
+    - with --shards DIR: DIR/<id>.json per program plus DIR/manifest.json
+      (id -> shard file and content hash) for the program/[id] page
 """
 
 import os
 import sys
 import json
 import re
+import random
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Dict, Optional
 
 # Import geocoding
-from geocode_locations import geocode_location, BATAM_LOCATIONS
+from geocode_locations import geocode_location, geocode_batch, BATAM_LOCATIONS
+from geocode_cache import get_default_cache
+from http_session import get_session
+from program_export import BundleWriter, DEFAULT_CHUNK_SIZE, ShardWriter, bundle_report, export_programs
+
+# Bump when program generation changes, so manifests from older versions are ignored
+CONVERTER_VERSION = 2
+MANIFEST_NAME = '.programs_manifest.json'
+ID_REGISTRY_NAME = 'program_ids.json'
 
 # ============================================================================
 # CATEGORY MAPPING
@@ -110,14 +155,24 @@ def parse_markdown(md_path: str) -> dict:
 # PROGRAM GENERATION
 # ============================================================================
 
-def create_program_from_md(md_path: str, index: int) -> dict:
-    """Create program data from markdown file"""
+def create_program_from_md(md_path: str, registry: 'ProgramIdRegistry', data: Optional[dict] = None,
+                           geocoded: Optional[Dict] = None, provisional: Optional[set] = None) -> dict:
+    """
+    Create program data from markdown file
+    
+    `data` is the already parsed markdown, if available. `geocoded` maps
+    location hints to results from a batch geocoding run; without it each
+    hint is geocoded on the spot. The filename is added to `provisional`
+    when the location is only a guess (the random fallback or a
+    low-confidence fuzzy match), so it is geocoded again on the next run.
+    """
     
     filename = Path(md_path).stem
     print(f"\n📄 Processing: {filename}")
     
     # Parse markdown
-    data = parse_markdown(md_path)
+    if data is None:
+        data = parse_markdown(md_path)
     
     # Determine category
     category = data['manual_category'] or auto_categorize(data['title'], data['abstract'])
@@ -133,16 +188,17 @@ def create_program_from_md(md_path: str, index: int) -> dict:
         location_result = None
         if data['location_hints']:
             for hint in data['location_hints']:
-                location_result = geocode_location(hint)
+                location_result = geocoded.get(hint) if geocoded is not None else geocode_location(hint)
                 if location_result:
                     break
         
-        # Fallback to random Batam location
+        # Fallback to random Batam location, seeded by filename so reruns agree
         if not location_result:
-            import random
-            location_key = random.choice(list(BATAM_LOCATIONS.keys()))
-            location_result = BATAM_LOCATIONS[location_key]
+            location_key = random.Random(filename).choice(sorted(BATAM_LOCATIONS))
+            location_result = dict(BATAM_LOCATIONS[location_key], confidence='fallback')
             print(f"  ⚠️  Using fallback location: {location_key}")
+        if provisional is not None and location_result.get('confidence') in ('low', 'fallback'):
+            provisional.add(filename)
         
         lat = location_result['lat']
         lng = location_result['lng']
@@ -150,7 +206,6 @@ def create_program_from_md(md_path: str, index: int) -> dict:
     
     # Create program
     program = {
-        'id': f'p2m-{data["year"]}-{index:03d}',
         'name': data['title'],
         'category': category,
         'description': data['abstract'] if len(data['abstract']) > 50 else f"Program {category.lower()} yang dilaksanakan di {address}. Detail program dapat dilihat pada publikasi jurnal terkait.",
@@ -159,89 +214,289 @@ def create_program_from_md(md_path: str, index: int) -> dict:
             'lng': lng,
             'address': address,
         },
-        'images': [
-            f'https://images.unsplash.com/photo-{1500000000000 + index}?w=800',  # Placeholder
-            f'https://images.unsplash.com/photo-{1500000000000 + index + 1}?w=800',
-            f'https://images.unsplash.com/photo-{1500000000000 + index + 2}?w=800',
-        ],
         'videoUrl': None,  # Can be added manually
         'detailsUrl': 'https://jurnal.polibatam.ac.id',
         'year': data['year'],
         'status': 'Completed',
     }
     
+    assign_id(program, registry.assign(filename, data['year']))
     print(f"  ✓ Generated program: {program['id']}")
     
     return program
 
+def assign_id(program: dict, program_id: str) -> dict:
+    """Set the ID and the fields derived from it"""
+    program['id'] = program_id
+    # Placeholder images keyed by the ID, so they stay with the program
+    seed = int(hashlib.sha1(program_id.encode('utf-8')).hexdigest()[:8], 16) % 10**9
+    program['images'] = [
+        f'https://images.unsplash.com/photo-{1500000000000 + seed}?w=800',  # Placeholder
+        f'https://images.unsplash.com/photo-{1500000000000 + seed + 1}?w=800',
+        f'https://images.unsplash.com/photo-{1500000000000 + seed + 2}?w=800',
+    ]
+    # Keep the original key order: id first, images before videoUrl
+    order = ['id', 'name', 'category', 'description', 'location', 'images']
+    for key in order + [key for key in list(program) if key not in order]:
+        program[key] = program.pop(key)
+    return program
+
+# ============================================================================
+# PROGRAM IDS
+# ============================================================================
+
+class ProgramIdRegistry:
+    """
+    Persisted {markdown filename stem: program ID}
+    
+    assign() returns the recorded ID for a known file. A new file gets
+    p2m-{year}-{first 6 hex chars of sha1(stem)}, lengthened one character
+    at a time while it collides with an ID already handed out. Entries are
+    never removed, so a deleted file's ID is not given to another program.
+    """
+    
+    HASH_LENGTH = 6
+    
+    def __init__(self, path: str, legacy_path: Optional[str] = None):
+        self.path = path
+        self.ids = {}
+        if not os.path.exists(path) and legacy_path and os.path.exists(legacy_path):
+            # Registries used to default to the working directory
+            print(f"🆔 Importing ID registry {legacy_path} into {path} (the old file can be deleted)")
+            path = legacy_path
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.ids = json.load(f)['ids']
+        self.taken = set(self.ids.values())
+        self.added = 0
+    
+    def assign(self, key: str, year: int) -> str:
+        if key in self.ids:
+            return self.ids[key]
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        for length in range(self.HASH_LENGTH, len(digest) + 1):
+            program_id = f'p2m-{year}-{digest[:length]}'
+            if program_id not in self.taken:
+                break
+        else:
+            raise ValueError(f"cannot find a free ID for {key}")
+        self.ids[key] = program_id
+        self.taken.add(program_id)
+        self.added += 1
+        return program_id
+    
+    def save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'ids': dict(sorted(self.ids.items()))}, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+# ============================================================================
+# MANIFEST
+# ============================================================================
+
+class ProgramManifest:
+    """
+    {filename: {'sha256', 'program'}} for the files of one markdown folder
+    
+    A file is reused when its content hash matches; its ID is looked up in
+    the registry again on every run.
+    """
+    
+    def __init__(self, md_folder: str, enabled: bool = True):
+        self.path = os.path.join(md_folder, MANIFEST_NAME)
+        self.files = {}
+        if enabled and os.path.exists(self.path):
+            with open(self.path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('version') == CONVERTER_VERSION:
+                self.files = manifest['files']
+    
+    @staticmethod
+    def hash_file(md_path: Path) -> str:
+        return hashlib.sha256(md_path.read_bytes()).hexdigest()
+    
+    def get(self, md_path: Path, sha256: str) -> Optional[dict]:
+        entry = self.files.get(md_path.name)
+        return dict(entry['program']) if entry and entry['sha256'] == sha256 else None
+    
+    def save(self, entries: Dict):
+        """Replace the manifest with `entries` (files that no longer exist drop out)"""
+        self.files = entries
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': CONVERTER_VERSION, 'files': entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
 # ============================================================================
 # BATCH CONVERSION
 # ============================================================================
 
-def convert_md_folder(md_folder: str):
+def _parse_or_error(md_path: str) -> dict:
+    """parse_markdown for the process pool: errors come back as values"""
+    try:
+        return {'data': parse_markdown(md_path)}
+    except Exception as e:
+        return {'error': str(e)}
+
+def geocode_hints_batched(parsed: list) -> Dict:
+    """
+    Geocode the location hints of every file with as few lookups as possible
+    
+    A serial run stops at each file's first hint that geocodes, so hints are
+    batched in rounds: every file's first hint, then the second hint of files
+    still unresolved, and so on. Returns {hint: result or None}.
+    """
+    geocoded = {}
+    unresolved = [
+        data['location_hints'] for data in parsed
+        if data and not data['manual_coords'] and data['location_hints']
+    ]
+    round_index = 0
+    while unresolved:
+        todo = sorted({hints[round_index] for hints in unresolved} - set(geocoded))
+        if todo:
+            results = geocode_batch(todo)
+            for hint in todo:
+                geocoded[hint] = results.get(hint)
+        round_index += 1
+        unresolved = [
+            hints for hints in unresolved
+            if not geocoded.get(hints[round_index - 1]) and len(hints) > round_index
+        ]
+    return geocoded
+
+def convert_parallel(jobs: list, workers: int, registry: ProgramIdRegistry,
+                     provisional: Optional[set] = None) -> Dict:
+    """
+    Parse on a process pool, geocode centrally
+    
+    `jobs` is [(index, md_path)]; returns {index: program} for the files
+    that converted.
+    """
+    md_files = [md_path for _, md_path in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        parsed = list(executor.map(_parse_or_error, map(str, md_files), chunksize=8))
+    
+    for md_path, outcome in zip(md_files, parsed):
+        if 'error' in outcome:
+            print(f"  ❌ Error parsing {md_path.name}: {outcome['error']}")
+    parsed = [outcome.get('data') for outcome in parsed]
+    
+    geocoded = geocode_hints_batched(parsed)
+    
+    programs = {}
+    for (i, md_path), data in zip(jobs, parsed):
+        if data is None:
+            continue
+        try:
+            programs[i] = create_program_from_md(str(md_path), registry, data, geocoded, provisional)
+        except Exception as e:
+            print(f"  ❌ Error: {e}")
+    return programs
+
+def convert_serial(jobs: list, registry: ProgramIdRegistry, provisional: Optional[set] = None) -> Dict:
+    """Convert each file in turn; returns {index: program}"""
+    programs = {}
+    for i, md_path in jobs:
+        try:
+            programs[i] = create_program_from_md(str(md_path), registry, provisional=provisional)
+        except Exception as e:
+            print(f"  ❌ Error: {e}")
+            continue
+    return programs
+
+def convert_md_folder(md_folder: str, workers: int = 1, incremental: bool = True,
+                      id_registry: Optional[str] = None, bundle_dir: Optional[str] = None,
+                      chunk_size: int = DEFAULT_CHUNK_SIZE, shard_dir: Optional[str] = None):
     """Convert all markdown files to programs"""
     
     print("🚀 Markdown to Programs Converter")
     print("=" * 60)
     
-    # Find all markdown files
-    md_files = list(Path(md_folder).glob("*.md"))
+    # Find all markdown files (sorted, so output order and ID collision
+    # resolution do not depend on directory order)
+    md_files = sorted(Path(md_folder).glob("*.md"))
     
     if not md_files:
         print(f"❌ No markdown files found in: {md_folder}")
         return
     
     print(f"📁 Found {len(md_files)} markdown files")
+    if workers > 1:
+        print(f"⚙️  Workers: {workers}")
     print("=" * 60)
     
-    # Convert each file
-    programs = []
+    # Reuse programs of files whose content is unchanged
+    manifest = ProgramManifest(md_folder, enabled=incremental)
+    if id_registry:
+        registry = ProgramIdRegistry(id_registry)
+    else:
+        registry = ProgramIdRegistry(os.path.join(md_folder, ID_REGISTRY_NAME), legacy_path=ID_REGISTRY_NAME)
+    hashes = {}
+    reused = {}
+    jobs = []
     for i, md_path in enumerate(md_files, 1):
-        try:
-            program = create_program_from_md(str(md_path), i)
-            programs.append(program)
-        except Exception as e:
-            print(f"  ❌ Error: {e}")
-            continue
+        hashes[i] = ProgramManifest.hash_file(md_path)
+        program = manifest.get(md_path, hashes[i])
+        if program:
+            reused[i] = assign_id(program, registry.assign(md_path.stem, program['year']))
+        else:
+            jobs.append((i, md_path))
     
-    # Save JSON
-    json_path = "programs.json"
-    with open(json_path, 'w', encoding='utf-8') as f:
-        json.dump(programs, f, indent=2, ensure_ascii=False)
+    if reused:
+        print(f"♻️  Unchanged: {len(reused)} files, converting {len(jobs)}")
+    
+    provisional = set()
+    if workers > 1 and jobs:
+        converted = convert_parallel(jobs, workers, registry, provisional)
+    else:
+        converted = convert_serial(jobs, registry, provisional)
+    registry.save()
+    
+    by_index = {**reused, **converted}
+    programs = [by_index[i] for i in sorted(by_index)]
     
-    # Save TypeScript
+    # Failed files, and programs placed by a guess, stay out of the manifest,
+    # so they are retried next run (the gazetteer, offline index or
+    # Nominatim may know the place by then)
+    manifest.save({
+        md_files[i - 1].name: {'sha256': hashes[i], 'program': program}
+        for i, program in by_index.items() if md_files[i - 1].stem not in provisional
+    })
+    if provisional:
+        print(f"📍 {len(provisional)} programs have a guessed location and will be geocoded again next run")
+    
+    # Save JSON and TypeScript (outputs whose content is unchanged keep their mtime)
+    json_path = "programs.json"
     ts_path = "programs.ts"
-    with open(ts_path, 'w', encoding='utf-8') as f:
-        f.write("// Auto-generated from journal PDFs\n")
-        f.write(f"// Total programs: {len(programs)}\n\n")
-        f.write("export const programs: Program[] = [\n")
-        
-        for i, prog in enumerate(programs):
-            f.write("  {\n")
-            f.write(f"    id: '{prog['id']}',\n")
-            f.write(f"    name: '{prog['name']}',\n")
-            f.write(f"    category: '{prog['category']}',\n")
-            f.write(f"    description: '{prog['description']}',\n")
-            f.write(f"    location: {{\n")
-            f.write(f"      lat: {prog['location']['lat']},\n")
-            f.write(f"      lng: {prog['location']['lng']},\n")
-            f.write(f"      address: '{prog['location']['address']}',\n")
-            f.write(f"    }},\n")
-            f.write(f"    images: {json.dumps(prog['images'])},\n")
-            if prog['videoUrl']:
-                f.write(f"    videoUrl: '{prog['videoUrl']}',\n")
-            f.write(f"    detailsUrl: '{prog['detailsUrl']}',\n")
-            f.write(f"    year: {prog['year']},\n")
-            f.write(f"    status: '{prog['status']}',\n")
-            f.write("  },\n" if i < len(programs) - 1 else "  }\n")
-        
-        f.write("];\n")
+    targets = []
+    if bundle_dir:
+        targets.append(BundleWriter(bundle_dir, chunk_size))
+    if shard_dir:
+        targets.append(ShardWriter(shard_dir))
+    exporter = export_programs(
+        programs, ts_path=ts_path, json_path=json_path,
+        header=["Auto-generated from journal PDFs", f"Total programs: {len(programs)}"],
+        only_if_changed=True, targets=targets,
+    )
     
     print("\n" + "=" * 60)
     print(f"✅ Conversion complete!")
-    print(f"📊 Generated {len(programs)} programs")
+    print(f"📊 Generated {len(programs)} programs ({len(converted)} converted, {len(reused)} reused)")
+    if not any(exporter.changed.values()):
+        print("   Outputs unchanged")
+    print(f"🆔 IDs: {registry.added} new, {len(registry.ids)} in registry ({registry.path})")
+    cache = get_default_cache()
+    if cache:
+        print(f"🗄️  Geocode cache: {cache.hits} hits, {cache.misses} misses")
     print(f"📄 JSON: {json_path}")
     print(f"📄 TypeScript: {ts_path}")
+    if shard_dir:
+        print(f"📄 Shards: {shard_dir} ({len(programs)} files + {ShardWriter.MANIFEST_NAME})")
+    if bundle_dir:
+        print()
+        bundle_report(bundle_dir, monolithic=[ts_path, json_path])
     print("\n💡 Next steps:")
     print("   1. Review programs.ts")
     print("   2. Copy content to src/data/programs.ts")
@@ -253,18 +508,42 @@ def convert_md_folder(md_folder: str):
 # ============================================================================
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python md-to-programs.py <md_folder>")
-        print("Example: python md-to-programs.py ./pdfs/extracted_data")
-        sys.exit(1)
-    
-    md_folder = sys.argv[1]
+    parser = argparse.ArgumentParser(
+        description='Convert reviewed markdown files to program data',
+        epilog='Example: python md-to-programs.py ./pdfs/extracted_data',
+    )
+    parser.add_argument('md_folder', help='Folder containing the reviewed .md files')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Parse in N processes and batch all geocoding (default: 1, serial)')
+    parser.add_argument('--full', action='store_true',
+                        help='Ignore the manifest and convert every file')
+    parser.add_argument('--id-registry',
+                        help=f'Program ID registry file (default: <md_folder>/{ID_REGISTRY_NAME})')
+    parser.add_argument('--bundle', metavar='DIR',
+                        help='Also write the columnar data bundle to DIR (e.g. public/data)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f'Programs per bundle chunk file (default: {DEFAULT_CHUNK_SIZE})')
+    parser.add_argument('--shards', metavar='DIR',
+                        help='Also write one <id>.json per program plus manifest.json to DIR')
+    args = parser.parse_args()
     
-    if not os.path.exists(md_folder):
-        print(f"❌ Folder not found: {md_folder}")
+    if not os.path.exists(args.md_folder):
+        print(f"❌ Folder not found: {args.md_folder}")
+        sys.exit(1)
+    if args.workers < 1:
+        print("❌ --workers must be at least 1")
+        sys.exit(1)
+    if args.chunk_size < 1:
+        print("❌ --chunk-size must be at least 1")
+        sys.exit(1)
+    if args.shards and args.bundle and os.path.abspath(args.shards) == os.path.abspath(args.bundle):
+        print("❌ --shards and --bundle need separate folders")
         sys.exit(1)
     
-    convert_md_folder(md_folder)
+    convert_md_folder(args.md_folder, workers=args.workers, incremental=not args.full,
+                      id_registry=args.id_registry, bundle_dir=args.bundle, chunk_size=args.chunk_size,
+                      shard_dir=args.shards)
+    get_session().print_metrics()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,221 @@
+"""
+Offline Geocoder
+Local place-name index built from an OpenStreetMap extract
+
+Import a place dump for Kepulauan Riau once, then geocode without network:
+exact names are a single indexed SQLite lookup; partial and misspelled names
+fall back to a GazetteerIndex built from the same table on first use.
+
+Usage:
+    python scripts/offline_geocoder.py import riau-places.geojson
+    python scripts/offline_geocoder.py import riau-places.csv --index places.sqlite3
+    python scripts/offline_geocoder.py query "Tanjung Uncang"
+
+Input formats:
+    - GeoJSON FeatureCollection of Point features with a `name` property
+      (e.g. exported from an OSM extract with place=* filters)
+    - CSV with `name`, `lat` and `lng` (or `lon`) columns; optional
+      `place` and `address` columns
+
+Output:
+    scripts/.cache/places.sqlite3 (override with OFFLINE_GEOCODER_PATH)
+"""
+
+import os
+import sys
+import csv
+import json
+import sqlite3
+import argparse
+from typing import Dict, Iterator, Optional
+
+from gazetteer_index import GazetteerIndex
+from geocode_cache import normalize_location_name
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'places.sqlite3')
+
+# When several places share a name, keep the most significant one
+PLACE_RANK = {
+    'city': 6, 'town': 5, 'suburb': 4, 'village': 4, 'island': 3,
+    'neighbourhood': 2, 'quarter': 2, 'hamlet': 1, 'locality': 0,
+}
+
+# ============================================================================
+# IMPORT
+# ============================================================================
+
+def read_geojson(path: str) -> Iterator[Dict]:
+    """Point features with a name"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    for feature in data.get('features', []):
+        geometry = feature.get('geometry') or {}
+        properties = feature.get('properties') or {}
+        name = properties.get('name') or properties.get('name:id')
+        if geometry.get('type') != 'Point' or not name:
+            continue
+        lng, lat = geometry['coordinates'][:2]
+        yield {
+            'name': name,
+            'lat': float(lat),
+            'lng': float(lng),
+            'place': properties.get('place', ''),
+            'address': properties.get('address') or properties.get('display_name') or name,
+        }
+
+def read_csv(path: str) -> Iterator[Dict]:
+    """Rows with name, lat and lng/lon columns"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        for row in csv.DictReader(f):
+            lng = row.get('lng') or row.get('lon')
+            if not row.get('name') or not row.get('lat') or not lng:
+                continue
+            yield {
+                'name': row['name'],
+                'lat': float(row['lat']),
+                'lng': float(lng),
+                'place': row.get('place', ''),
+                'address': row.get('address') or row['name'],
+            }
+
+def import_places(source_path: str, index_path: str = DEFAULT_INDEX_PATH) -> int:
+    """Build (or replace) the offline index from a GeoJSON or CSV dump"""
+    reader = read_geojson if source_path.lower().endswith(('.geojson', '.json')) else read_csv
+    
+    places = {}
+    for place in reader(source_path):
+        key = normalize_location_name(place['name'])
+        if not key:
+            continue
+        current = places.get(key)
+        if current is None or PLACE_RANK.get(place['place'], 0) > PLACE_RANK.get(current['place'], 0):
+            places[key] = place
+    
+    os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
+    tmp_path = index_path + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    conn.execute('''
+        CREATE TABLE places (
+            key TEXT PRIMARY KEY,
+            lat REAL NOT NULL,
+            lng REAL NOT NULL,
+            address TEXT NOT NULL,
+            place TEXT
+        ) WITHOUT ROWID
+    ''')
+    conn.executemany(
+        'INSERT INTO places (key, lat, lng, address, place) VALUES (?, ?, ?, ?, ?)',
+        ((key, p['lat'], p['lng'], p['address'], p['place']) for key, p in sorted(places.items())),
+    )
+    conn.commit()
+    conn.close()
+    os.replace(tmp_path, index_path)
+    return len(places)
+
+# ============================================================================
+# LOOKUP
+# ============================================================================
+
+class OfflineGeocoder:
+    """
+    Read-only lookups against an imported places index
+    
+    geocode() returns the same shape as the other geocoders
+    ({'lat', 'lng', 'address', 'method', 'confidence'}) or None.
+    """
+    
+    def __init__(self, index_path: str = DEFAULT_INDEX_PATH):
+        self.index_path = index_path
+        self.pid = os.getpid()
+        self.conn = sqlite3.connect(f'file:{index_path}?mode=ro', uri=True)
+        self._gazetteer = None
+    
+    def _row(self, key: str) -> Optional[Dict]:
+        row = self.conn.execute('SELECT lat, lng, address FROM places WHERE key = ?', (key,)).fetchone()
+        return {'lat': row[0], 'lng': row[1], 'address': row[2]} if row else None
+    
+    @property
+    def gazetteer(self) -> GazetteerIndex:
+        """Partial/fuzzy matcher over all names, built on first use"""
+        if self._gazetteer is None:
+            keys = [row[0] for row in self.conn.execute('SELECT key FROM places')]
+            self._gazetteer = GazetteerIndex(dict.fromkeys(keys))
+        return self._gazetteer
+    
+    def geocode(self, location_name: str) -> Optional[Dict]:
+        # Exact name: one primary-key lookup
+        result = self._row(normalize_location_name(location_name))
+        if result:
+            result.update(method='offline', confidence='high')
+            return result
+        
+        match = self.gazetteer.lookup(location_name)
+        if match:
+            result = self._row(match[0])
+            result.update(method='offline_partial', confidence='medium')
+            return result
+        
+        return None
+    
+    def fuzzy_geocode(self, location_name: str) -> Optional[Dict]:
+        """Closest misspelled name; a last resort, after the cache and Nominatim"""
+        candidates = self.gazetteer.fuzzy_lookup(location_name, limit=1)
+        if not candidates:
+            return None
+        key, score = candidates[0]
+        result = self._row(key)
+        result.update(method='offline_fuzzy', confidence='low', score=score)
+        return result
+    
+    def close(self):
+        self.conn.close()
+
+_default_geocoder = None
+
+def get_offline_geocoder() -> Optional[OfflineGeocoder]:
+    """Process-wide geocoder at OFFLINE_GEOCODER_PATH, or None if nothing was imported"""
+    global _default_geocoder
+    path = os.environ.get('OFFLINE_GEOCODER_PATH', DEFAULT_INDEX_PATH)
+    if not os.path.exists(path):
+        return None
+    # SQLite connections must not cross fork(), so worker processes reopen
+    if _default_geocoder is None or _default_geocoder.index_path != path or _default_geocoder.pid != os.getpid():
+        _default_geocoder = OfflineGeocoder(path)
+    return _default_geocoder
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline place-name geocoder')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    import_parser = subparsers.add_parser('import', help='Build the index from a GeoJSON/CSV place dump')
+    import_parser.add_argument('source', help='Path to .geojson or .csv')
+    import_parser.add_argument('--index', default=os.environ.get('OFFLINE_GEOCODER_PATH', DEFAULT_INDEX_PATH))
+    
+    query_parser = subparsers.add_parser('query', help='Geocode a name against the index')
+    query_parser.add_argument('name')
+    query_parser.add_argument('--index', default=os.environ.get('OFFLINE_GEOCODER_PATH', DEFAULT_INDEX_PATH))
+    
+    args = parser.parse_args()
+    
+    if args.command == 'import':
+        if not os.path.exists(args.source):
+            print(f"❌ File not found: {args.source}")
+            sys.exit(1)
+        count = import_places(args.source, args.index)
+        print(f"✅ Imported {count} places into {args.index}")
+    else:
+        if not os.path.exists(args.index):
+            print(f"❌ No index at {args.index} (run the import command first)")
+            sys.exit(1)
+        geocoder = OfflineGeocoder(args.index)
+        result = geocoder.geocode(args.name) or geocoder.fuzzy_geocode(args.name)
+        print(json.dumps(result, indent=2, ensure_ascii=False) if result else "❌ Not found")
+
+if __name__ == "__main__":
+    main()
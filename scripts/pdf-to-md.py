@@ -5,6 +5,9 @@ Extracts text from P2M journal PDFs and converts to structured markdown
 Usage:
     python scripts/pdf-to-md.py <pdf_folder>
     python scripts/pdf-to-md.py "path/to/pdfs"
+    python scripts/pdf-to-md.py ./pdfs --workers 4
+    python scripts/pdf-to-md.py ./pdfs --rebuild      # ignore cached extractions
+    python scripts/pdf-to-md.py ./pdfs --header-pages 2   # front matter only
 
 Requirements:
     pip install PyPDF2 pdfplumber
@@ -12,13 +15,21 @@ Requirements:
 Output:
     - extracted_data/ folder with .md files for each PDF
     - program_data.json with structured data
+    - extracted_data/.cache/ with per-PDF extraction results (content-hash keyed)
 """
 
 import os
 import sys
 import json
 import re
+import argparse
+import hashlib
+import time
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Tuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 
 try:
     import PyPDF2
@@ -28,181 +39,464 @@ except ImportError:
     print("Please install: pip install PyPDF2 pdfplumber")
     sys.exit(1)
 
+from keyword_automaton import KeywordAutomaton
+
+# Gazetteer names make the most specific location hints
+from geocode_locations import BATAM_LOCATIONS
+
 # ============================================================================
 # PDF EXTRACTION
 # ============================================================================
 
-def extract_text_pypdf2(pdf_path: str) -> str:
+def header_complete(text: str) -> bool:
+    """
+    Check whether leading-page text already holds everything the field
+    extractors look for: an abstract with its terminator, plus at least one
+    location keyword (hints are ranked from the front matter)
+    """
+    scanner = FrontMatterScanner(text)
+    span = scanner.abstract_span()
+    return bool(span and span[2] and LOCATION_AUTOMATON.contains_any(scanner.text_lower))
+
+def iter_page_texts(pages, probed_pages: list = ()):
+    """
+    Yield each page's text lazily, one page at a time
+    
+    Pages without a text layer (extract_text() returning None) yield "".
+    probed_pages lets a caller that already extracted the leading pages
+    reuse their texts.
+    """
+    yield from probed_pages
+    for i in range(len(probed_pages), len(pages)):
+        yield pages[i].extract_text() or ""
+
+def join_pages(page_texts, max_chars: int = 0, stop_when=None, check_from: int = 1) -> str:
+    """
+    Accumulate page texts into one document with a single join
+    
+    Stops consuming the page generator early when the text reaches max_chars
+    (the memory ceiling, truncating to exactly that length) or once
+    stop_when(text) is true. stop_when is only evaluated after `check_from`
+    pages and then whenever the page count doubles, so checks stay cheap on
+    long documents.
+    """
+    parts = []
+    size = 0
+    next_check = check_from
+    for text in page_texts:
+        parts.append(text)
+        size += len(text) + 1
+        if max_chars and size >= max_chars:
+            break
+        if stop_when and len(parts) >= next_check:
+            if stop_when("\n".join(parts) + "\n"):
+                break
+            next_check = len(parts) * 2
+    
+    text = "\n".join(parts) + "\n"
+    return text[:max_chars] if max_chars else text
+
+def extract_leading_pages(page_texts, initial_pages: int, max_chars: int = 0) -> str:
+    """
+    Extract only the leading pages needed for metadata
+    
+    Starts with `initial_pages` and doubles the window until header_complete()
+    is satisfied or the document runs out, so long proceedings volumes are not
+    laid out in full just to read their front matter.
+    """
+    return join_pages(page_texts, max_chars, stop_when=header_complete, check_from=initial_pages)
+
+def read_pages(pages, header_pages: int = 0, probed_pages: list = (), max_chars: int = 0) -> str:
+    """Extract text from an open document's pages (optionally header-first)"""
+    page_texts = iter_page_texts(pages, probed_pages)
+    if header_pages:
+        return extract_leading_pages(page_texts, header_pages, max_chars)
+    return join_pages(page_texts, max_chars)
+
+@contextmanager
+def open_pypdf2(pdf_path: str):
+    """Open a PDF with PyPDF2 and yield its page sequence"""
+    with open(pdf_path, 'rb') as file:
+        yield PyPDF2.PdfReader(file).pages
+
+@contextmanager
+def open_pdfplumber(pdf_path: str):
+    """Open a PDF with pdfplumber and yield its page sequence"""
+    with pdfplumber.open(pdf_path) as pdf:
+        yield pdf.pages
+
+# Backends in order of preference (pdfplumber gives better layout quality)
+BACKENDS = [
+    ('pdfplumber', open_pdfplumber),
+    ('pypdf2', open_pypdf2),
+]
+
+# Leading pages probed per backend; together they must yield MIN_PROBE_CHARS
+# characters, otherwise the backend is assumed to find no text layer
+PROBE_PAGES = 3
+MIN_PROBE_CHARS = 50
+
+# Documents with less text than this are flagged for OCR review
+MIN_TEXT_CHARS = 100
+
+def extract_text_pypdf2(pdf_path: str, header_pages: int = 0, max_chars: int = 0) -> str:
     """Extract text using PyPDF2 (fallback method)"""
     try:
-        with open(pdf_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-            return text
+        with open_pypdf2(pdf_path) as pages:
+            return read_pages(pages, header_pages, max_chars=max_chars)
     except Exception as e:
         print(f"  ⚠️  PyPDF2 error: {e}")
         return ""
 
-def extract_text_pdfplumber(pdf_path: str) -> str:
+def extract_text_pdfplumber(pdf_path: str, header_pages: int = 0, max_chars: int = 0) -> str:
     """Extract text using pdfplumber (better quality)"""
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            text = ""
-            for page in pdf.pages:
-                text += page.extract_text() + "\n"
-            return text
+        with open_pdfplumber(pdf_path) as pages:
+            return read_pages(pages, header_pages, max_chars=max_chars)
     except Exception as e:
         print(f"  ⚠️  pdfplumber error: {e}")
         return ""
 
-def extract_pdf_text(pdf_path: str) -> str:
-    """Extract text from PDF using best available method"""
-    # Try pdfplumber first (better quality)
-    text = extract_text_pdfplumber(pdf_path)
-    
-    # Fallback to PyPDF2
-    if not text or len(text) < 100:
-        text = extract_text_pypdf2(pdf_path)
+def extract_pdf_text_adaptive(pdf_path: str, header_pages: int = 0,
+                              max_chars: int = 0) -> Tuple[str, dict]:
+    """
+    Pick one backend per file by probing its leading pages
+    
+    Each backend in BACKENDS extracts only the first PROBE_PAGES pages; the
+    first whose probe yields real text extracts the rest of the document
+    (reusing the probed pages). Only when every probe comes up empty does
+    the first backend that opened the file read on past its probe, so an
+    image-only cover in front of a text layer is still found. The backends
+    read the same text layer, so a later backend is only asked when that
+    read fails: a scanned PDF costs the probes plus one pass. The file is
+    flagged for OCR review when that pass finds fewer than MIN_TEXT_CHARS
+    characters; scanned PDFs of up to PROBE_PAGES pages are settled by the
+    probes alone.
+    
+    Returns the text and an info dict with the chosen backend, the OCR flag
+    and per-backend timings in milliseconds.
+    """
+    info = {'backend': None, 'needs_ocr': False, 'timings_ms': {}}
+    # Backends whose probe came up empty on a longer document -> probed page texts
+    unread = {}
+    
+    for backend, opener in BACKENDS:
+        start = time.perf_counter()
+        try:
+            with opener(pdf_path) as pages:
+                probe = [pages[i].extract_text() or "" for i in range(min(PROBE_PAGES, len(pages)))]
+                probe_ms = (time.perf_counter() - start) * 1000
+                info['timings_ms'][f'{backend}_probe'] = round(probe_ms, 2)
+                if sum(len(text.strip()) for text in probe) < MIN_PROBE_CHARS:
+                    if len(pages) > len(probe):
+                        unread[backend] = probe
+                    continue
+                
+                text = read_pages(pages, header_pages, probed_pages=probe, max_chars=max_chars)
+                info['timings_ms'][backend] = round((time.perf_counter() - start) * 1000, 2)
+                info['backend'] = backend
+                return text, info
+        except Exception as e:
+            print(f"  ⚠️  {backend} error: {e}")
+            info['timings_ms'][f'{backend}_probe'] = round((time.perf_counter() - start) * 1000, 2)
     
+    # No probe found text: read the rest of the document once before giving up
+    for backend, opener in BACKENDS:
+        if backend not in unread:
+            continue
+        start = time.perf_counter()
+        try:
+            with opener(pdf_path) as pages:
+                text = read_pages(pages, header_pages, probed_pages=unread[backend], max_chars=max_chars)
+        except Exception as e:
+            print(f"  ⚠️  {backend} error: {e}")
+            continue
+        finally:
+            info['timings_ms'][backend] = round((time.perf_counter() - start) * 1000, 2)
+        if len(text.strip()) >= MIN_TEXT_CHARS:
+            info['backend'] = backend
+            return text, info
+        break
+    
+    info['needs_ocr'] = True
+    return "", info
+
+def extract_pdf_text(pdf_path: str, header_pages: int = 0, max_chars: int = 0) -> str:
+    """
+    Extract text from PDF using best available method
+    
+    With header_pages > 0 only the front matter is extracted (see
+    extract_leading_pages); 0 extracts the whole document. max_chars > 0
+    caps the accumulated text for very large proceedings volumes.
+    """
+    text, _ = extract_pdf_text_adaptive(pdf_path, header_pages, max_chars)
     return text
 
 # ============================================================================
 # DATA EXTRACTION PATTERNS
 # ============================================================================
 
+TITLE_SKIP_RE = re.compile(r'abstract|jurnal|volume|issn|doi')
+AUTHOR_START_RE = re.compile(r'penulis|author|oleh')
+AUTHOR_END_RE = re.compile(r'abstract|abstrak|pendahuluan')
+AUTHOR_CLEAN_RE = re.compile(r'\d+|,|\*')
+ABSTRACT_KEYWORDS = ['abstract', 'abstrak']
+ABSTRACT_END_RE = re.compile(r'keywords|kata kunci|pendahuluan|introduction|1\.')
+ABSTRACT_LABEL_RE = re.compile(r'abstract|abstrak', re.IGNORECASE)
+YEAR_RE = re.compile(r'20[2-4][0-9]')
+
+# Common location keywords in Batam/Kepri
+LOCATION_KEYWORDS = [
+    'batam', 'nagoya', 'sekupang', 'batu aji', 'bengkong',
+    'galang', 'mubut', 'rempang', 'bintan', 'karimun',
+    'tanjung', 'pulau', 'kelurahan', 'kecamatan', 'desa'
+]
+GENERIC_LOCATION_WORDS = {'tanjung', 'pulau', 'kelurahan', 'kecamatan', 'desa'}
+
+# Ranking weights: gazetteer entries > named areas > administrative words
+def location_weight(keyword: str) -> int:
+    if keyword in BATAM_LOCATIONS:
+        return 3
+    if keyword in GENERIC_LOCATION_WORDS:
+        return 1
+    return 2
+
+LOCATION_AUTOMATON = KeywordAutomaton(LOCATION_KEYWORDS + list(BATAM_LOCATIONS))
+LOCATION_CONTEXT_BEFORE = 50
+LOCATION_CONTEXT_AFTER = 100
+# Front matter length assumed when there is no terminated abstract
+LOCATION_FRONT_CHARS = 4000
+
+class FrontMatterScanner:
+    """
+    Extracts every metadata field from PDF text in one pass
+    
+    The text is lowercased and the leading lines split exactly once; all
+    marker patterns are precompiled at module level. Results match the
+    individual extract_* functions, which are thin wrappers around this class.
+    """
+    
+    TITLE_LINES = 20
+    AUTHOR_LINES = 30
+    
+    def __init__(self, text: str):
+        self.text = text
+        self.text_lower = text.lower()
+        # Only the first AUTHOR_LINES lines are ever inspected; don't split the rest
+        self.lines = [line.strip() for line in text.split('\n', self.AUTHOR_LINES)[:self.AUTHOR_LINES]]
+        self.lines_lower = [line.lower() for line in self.lines]
+        self._abstract_span = None
+    
+    def title(self) -> str:
+        """Extract program title from PDF text"""
+        # Usually in first few lines, often in ALL CAPS or bold
+        for line, line_lower in zip(self.lines[:self.TITLE_LINES], self.lines_lower):
+            # Skip very short lines
+            if len(line) < 20:
+                continue
+            # Skip lines with common header words
+            if TITLE_SKIP_RE.search(line_lower):
+                continue
+            # Likely a title if it's substantial
+            if len(line) > 30 and len(line) < 200:
+                return line
+        
+        return "Program Title (Manual Review Needed)"
+    
+    def authors(self) -> list:
+        """Extract author names from PDF text"""
+        # Look for author section (usually after title, before abstract)
+        authors = []
+        author_section = False
+        
+        for line, line_lower in zip(self.lines, self.lines_lower):
+            # Start of author section
+            if AUTHOR_START_RE.search(line_lower):
+                author_section = True
+                continue
+            # End of author section
+            if author_section and AUTHOR_END_RE.search(line_lower):
+                break
+            # Extract names (simple heuristic: capitalized words)
+            if author_section and line:
+                # Remove common suffixes
+                line = AUTHOR_CLEAN_RE.sub('', line)
+                if len(line) > 5 and len(line) < 50:
+                    authors.append(line.strip())
+        
+        return authors[:5] if authors else ["Author Name (Manual Review Needed)"]
+    
+    def abstract_span(self) -> tuple:
+        """(start, end, terminated) of the abstract, or None without one"""
+        if self._abstract_span is None:
+            abstract_start = -1
+            for keyword in ABSTRACT_KEYWORDS:
+                abstract_start = self.text_lower.find(keyword)
+                if abstract_start != -1:
+                    break
+            if abstract_start == -1:
+                self._abstract_span = False
+            else:
+                # Usually ends at "keywords" or "pendahuluan"
+                match = ABSTRACT_END_RE.search(self.text_lower, abstract_start + 50)
+                end = match.start() if match else len(self.text)
+                self._abstract_span = (abstract_start, end, match is not None)
+        return self._abstract_span or None
+    
+    def abstract(self) -> str:
+        """Extract abstract/description from PDF text"""
+        span = self.abstract_span()
+        if not span:
+            return "Description (Manual Review Needed)"
+        
+        # Extract abstract text and clean up
+        abstract = ABSTRACT_LABEL_RE.sub('', self.text[span[0]:span[1]])
+        abstract = abstract.strip()
+        
+        # Limit length
+        if len(abstract) > 500:
+            abstract = abstract[:500] + "..."
+        
+        return abstract if len(abstract) > 50 else "Description (Manual Review Needed)"
+    
+    def location_region(self) -> int:
+        """End offset of the front matter: the end of the abstract, else LOCATION_FRONT_CHARS"""
+        span = self.abstract_span()
+        if span and span[2]:
+            return span[1]
+        if len(self.text) <= LOCATION_FRONT_CHARS:
+            return len(self.text)
+        # Cut at a space so no word (or keyword) is split
+        cut = self.text_lower.rfind(' ', 0, LOCATION_FRONT_CHARS)
+        return cut if cut > 0 else LOCATION_FRONT_CHARS
+    
+    def location_mentions(self) -> list:
+        """
+        Every location keyword occurrence in the front matter, with its
+        offsets and context window
+        
+        Journals say where a program took place in the title, affiliations
+        and abstract, so occurrences are taken from the front matter
+        (location_region); only when it names no location at all is the
+        whole text matched. Each mention is scored by the weights of the
+        distinct keywords occurring inside its context window, so "Kelurahan
+        Tanjung Uncang, Batu Aji" outranks a lone "pulau".
+        """
+        matches = LOCATION_AUTOMATON.find_all(self.text_lower[:self.location_region()]) \
+            or LOCATION_AUTOMATON.find_all(self.text_lower)
+        mentions = []
+        # Sliding window over the sorted matches: counts of each keyword whose
+        # start falls inside the current window, and the weight of distinct ones
+        counts = {}
+        score = 0
+        entering = leaving = 0
+        for start, keyword in matches:
+            window_start = max(0, start - LOCATION_CONTEXT_BEFORE)
+            window_end = min(len(self.text), start + LOCATION_CONTEXT_AFTER)
+            while entering < len(matches) and matches[entering][0] < window_end:
+                other = matches[entering][1]
+                counts[other] = counts.get(other, 0) + 1
+                if counts[other] == 1:
+                    score += location_weight(other)
+                entering += 1
+            while matches[leaving][0] < window_start:
+                other = matches[leaving][1]
+                counts[other] -= 1
+                if counts[other] == 0:
+                    score -= location_weight(other)
+                leaving += 1
+            mentions.append({
+                'keyword': keyword,
+                'start': start,
+                'end': start + len(keyword),
+                'context_start': window_start,
+                'context_end': window_end,
+                'score': score,
+            })
+        return mentions
+    
+    def location_hints(self, limit: int = 5) -> list:
+        """Extract potential location mentions from PDF text, best first"""
+        ranked = sorted(self.location_mentions(), key=lambda m: (-m['score'], m['start']))
+        
+        # Skip mentions already covered by a better-ranked window, and
+        # passages repeated word for word (running headers, repeated lines)
+        chosen = []
+        hints = []
+        for mention in ranked:
+            if any(c['context_start'] <= mention['start'] < c['context_end'] for c in chosen):
+                continue
+            hint = self.text[mention['context_start']:mention['context_end']].strip()
+            if hint in hints:
+                continue
+            chosen.append(mention)
+            hints.append(hint)
+            if len(hints) == limit:
+                break
+        
+        return hints
+    
+    def year(self, filename: str) -> int:
+        """Extract publication year"""
+        # Try to find year in text (2020-2024), then in the filename
+        match = YEAR_RE.search(self.text, 0, 500) or YEAR_RE.search(filename)
+        if match:
+            return int(match.group(0))
+        
+        return 2023  # Default
+    
+    def scan(self, filename: str) -> dict:
+        """All structured program fields"""
+        return {
+            'title': self.title(),
+            'authors': self.authors(),
+            'abstract': self.abstract(),
+            'location_hints': self.location_hints(),
+            'year': self.year(filename),
+        }
+
 def extract_title(text: str) -> str:
     """Extract program title from PDF text"""
-    # Usually in first few lines, often in ALL CAPS or bold
-    lines = text.split('\n')[:20]
-    
-    # Look for common title patterns
-    for line in lines:
-        line = line.strip()
-        # Skip very short lines
-        if len(line) < 20:
-            continue
-        # Skip lines with common header words
-        if any(word in line.lower() for word in ['abstract', 'jurnal', 'volume', 'issn', 'doi']):
-            continue
-        # Likely a title if it's substantial
-        if len(line) > 30 and len(line) < 200:
-            return line
-    
-    return "Program Title (Manual Review Needed)"
+    return FrontMatterScanner(text).title()
 
 def extract_authors(text: str) -> list:
     """Extract author names from PDF text"""
-    # Look for author section (usually after title, before abstract)
-    lines = text.split('\n')[:30]
-    
-    authors = []
-    author_section = False
-    
-    for line in lines:
-        line = line.strip()
-        # Start of author section
-        if any(word in line.lower() for word in ['penulis', 'author', 'oleh']):
-            author_section = True
-            continue
-        # End of author section
-        if author_section and any(word in line.lower() for word in ['abstract', 'abstrak', 'pendahuluan']):
-            break
-        # Extract names (simple heuristic: capitalized words)
-        if author_section and line:
-            # Remove common suffixes
-            line = re.sub(r'\d+|,|\*', '', line)
-            if len(line) > 5 and len(line) < 50:
-                authors.append(line.strip())
-    
-    return authors[:5] if authors else ["Author Name (Manual Review Needed)"]
+    return FrontMatterScanner(text).authors()
 
 def extract_abstract(text: str) -> str:
     """Extract abstract/description from PDF text"""
-    # Look for abstract section
-    text_lower = text.lower()
-    
-    # Find abstract start
-    abstract_start = -1
-    for keyword in ['abstract', 'abstrak']:
-        pos = text_lower.find(keyword)
-        if pos != -1:
-            abstract_start = pos
-            break
-    
-    if abstract_start == -1:
-        return "Description (Manual Review Needed)"
-    
-    # Find abstract end (usually "keywords" or "pendahuluan")
-    abstract_end = len(text)
-    for keyword in ['keywords', 'kata kunci', 'pendahuluan', 'introduction', '1.']:
-        pos = text_lower.find(keyword, abstract_start + 50)
-        if pos != -1 and pos < abstract_end:
-            abstract_end = pos
-    
-    # Extract abstract text
-    abstract = text[abstract_start:abstract_end]
-    # Clean up
-    abstract = re.sub(r'abstract|abstrak', '', abstract, flags=re.IGNORECASE)
-    abstract = abstract.strip()
-    
-    # Limit length
-    if len(abstract) > 500:
-        abstract = abstract[:500] + "..."
-    
-    return abstract if len(abstract) > 50 else "Description (Manual Review Needed)"
+    return FrontMatterScanner(text).abstract()
 
 def extract_location_hints(text: str) -> list:
     """Extract potential location mentions from PDF text"""
-    # Common location keywords in Batam/Kepri
-    locations = []
-    location_keywords = [
-        'batam', 'nagoya', 'sekupang', 'batu aji', 'bengkong',
-        'galang', 'mubut', 'rempang', 'bintan', 'karimun',
-        'tanjung', 'pulau', 'kelurahan', 'kecamatan', 'desa'
-    ]
-    
-    text_lower = text.lower()
-    for keyword in location_keywords:
-        if keyword in text_lower:
-            # Find context around keyword
-            pos = text_lower.find(keyword)
-            context = text[max(0, pos-50):min(len(text), pos+100)]
-            locations.append(context.strip())
-    
-    return locations[:5]  # Return top 5 mentions
+    return FrontMatterScanner(text).location_hints()
 
 def extract_year(text: str, filename: str) -> int:
     """Extract publication year"""
-    # Try to find year in text (2020-2024)
-    years = re.findall(r'20[2-4][0-9]', text[:500])
-    if years:
-        return int(years[0])
-    
-    # Try to extract from filename
-    years = re.findall(r'20[2-4][0-9]', filename)
-    if years:
-        return int(years[0])
-    
-    return 2023  # Default
+    return FrontMatterScanner(text).year(filename)
 
 # ============================================================================
 # MARKDOWN CONVERSION
 # ============================================================================
 
-def create_markdown(pdf_path: str, text: str, output_dir: str) -> dict:
+def extract_fields(text: str, filename: str) -> dict:
+    """Extract the structured program fields from PDF text"""
+    return FrontMatterScanner(text).scan(filename)
+
+def create_markdown(pdf_path: str, text: str, output_dir: str, fields: dict = None) -> dict:
     """Create markdown file and extract structured data"""
     
     filename = Path(pdf_path).stem
     print(f"\n📄 Processing: {filename}")
     
-    # Extract data
-    title = extract_title(text)
-    authors = extract_authors(text)
-    abstract = extract_abstract(text)
-    location_hints = extract_location_hints(text)
-    year = extract_year(text, filename)
+    # Extract data (unless already known, e.g. from the cache)
+    if fields is None:
+        fields = extract_fields(text, filename)
+    title = fields['title']
+    authors = fields['authors']
+    abstract = fields['abstract']
+    location_hints = fields['location_hints']
+    year = fields['year']
     
     print(f"  ✓ Title: {title[:60]}...")
     print(f"  ✓ Authors: {', '.join(authors[:2])}...")
@@ -262,11 +556,194 @@ Add any additional notes here...
         'md_path': md_path,
     }
 
+# ============================================================================
+# EXTRACTION CACHE
+# ============================================================================
+
+# Bump whenever extraction or field parsing changes so stale entries are ignored
+EXTRACTOR_VERSION = 6
+DEFAULT_CACHE_SIZE_MB = 200
+
+class ExtractionCache:
+    """
+    On-disk cache of extracted text and fields, keyed by PDF content hash
+    
+    One JSON file per entry, named after sha256(pdf bytes) and
+    EXTRACTOR_VERSION, so renamed or moved PDFs still hit and changed PDFs
+    (or a new extractor version) miss. Entries are written atomically, which
+    makes the cache safe to share between worker processes. Eviction drops
+    least-recently-used entries once the directory exceeds max_bytes.
+    """
+    
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_CACHE_SIZE_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+    
+    @staticmethod
+    def hash_file(pdf_path: str) -> str:
+        digest = hashlib.sha256()
+        with open(pdf_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}-v{EXTRACTOR_VERSION}.json")
+    
+    @staticmethod
+    def make_key(file_hash: str, header_pages: int = 0, max_chars: int = 0) -> str:
+        """Header-only or capped extractions hold less text, so they get their own entries"""
+        key = file_hash
+        if header_pages:
+            key += f"-h{header_pages}"
+        if max_chars:
+            key += f"-m{max_chars}"
+        return key
+    
+    def get(self, key: str) -> dict:
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Touch so eviction sees this entry as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+    
+    def put(self, key: str, entry: dict):
+        path = self._entry_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    
+    def clear(self):
+        for entry in Path(self.cache_dir).glob("*.json"):
+            entry.unlink()
+    
+    def evict(self) -> int:
+        """Remove least-recently-used entries until under max_bytes"""
+        entries = []
+        total = 0
+        for entry in Path(self.cache_dir).glob("*.json"):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry))
+            total += stat.st_size
+        
+        removed = 0
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            entry.unlink()
+            total -= size
+            removed += 1
+        return removed
+
 # ============================================================================
 # BATCH PROCESSING
 # ============================================================================
 
-def process_pdf_folder(pdf_folder: str):
+def process_single_pdf(pdf_path: str, output_dir: str, cache: ExtractionCache = None,
+                       options: dict = None) -> dict:
+    """
+    Extract one PDF and write its markdown (runs inside a worker process)
+    
+    options holds extract_pdf_text_adaptive keyword arguments
+    (header_pages, max_chars).
+    """
+    options = options or {}
+    filename = Path(pdf_path).stem
+    key = cache.make_key(cache.hash_file(pdf_path), **options) if cache else None
+    entry = cache.get(key) if cache else None
+    
+    if entry:
+        text = entry['text']
+        extraction = entry['extraction']
+        # Year may fall back to the filename, so only reuse fields for the same name
+        fields = entry['fields'] if entry.get('filename') == filename else None
+        print(f"  ⚡ Cache hit: {filename}")
+    else:
+        # Extract text
+        text, extraction = extract_pdf_text_adaptive(pdf_path, **options)
+        fields = None
+    
+    if not text or len(text) < MIN_TEXT_CHARS:
+        if cache and not entry:
+            cache.put(key, {'filename': filename, 'text': text, 'fields': None, 'extraction': extraction})
+        print(f"  ⚠️  Could not extract text (might be scanned PDF) - flagged for OCR review")
+        extraction = dict(extraction, needs_ocr=True)
+        return {'filename': filename, 'pdf_path': pdf_path, 'extraction': extraction}
+    
+    # Create markdown and extract data
+    data = create_markdown(pdf_path, text, output_dir, fields=fields)
+    data['extraction'] = extraction
+    
+    if cache and fields is None:
+        cache.put(key, {
+            'filename': filename,
+            'text': text,
+            'fields': {name: data[name] for name in ('title', 'authors', 'abstract', 'location_hints', 'year')},
+            'extraction': extraction,
+        })
+    
+    return data
+
+def _run_isolated(pdf_path: str, output_dir: str, cache: ExtractionCache = None,
+                  options: dict = None) -> dict:
+    """Re-run a PDF that killed a shared pool in its own single-use process"""
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        return executor.submit(process_single_pdf, pdf_path, output_dir, cache, options).result()
+
+def process_pdfs_parallel(pdf_files: list, output_dir: str, workers: int,
+                          cache: ExtractionCache = None, options: dict = None) -> list:
+    """
+    Process PDFs across a process pool
+    
+    Results are streamed back as each worker finishes and slotted into the
+    original file order, so program_data.json stays deterministic. A PDF that
+    crashes its worker (e.g. a segfault inside the PDF library) breaks the
+    shared pool; those files are retried one by one in isolated processes so
+    only the bad file is lost.
+    """
+    results = [None] * len(pdf_files)
+    crashed = []
+    done = 0
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(process_single_pdf, str(pdf_path), output_dir, cache, options): i
+            for i, pdf_path in enumerate(pdf_files)
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+                done += 1
+                print(f"[{done}/{len(pdf_files)}] ✓ {pdf_files[i].name}")
+            except BrokenProcessPool:
+                crashed.append(i)
+            except Exception as e:
+                done += 1
+                print(f"[{done}/{len(pdf_files)}] ❌ {pdf_files[i].name}: {e}")
+    
+    for i in sorted(crashed):
+        done += 1
+        try:
+            results[i] = _run_isolated(str(pdf_files[i]), output_dir, cache, options)
+            print(f"[{done}/{len(pdf_files)}] ✓ {pdf_files[i].name} (isolated retry)")
+        except Exception as e:
+            print(f"[{done}/{len(pdf_files)}] ❌ {pdf_files[i].name}: worker crashed ({e})")
+    
+    return [data for data in results if data]
+
+def process_pdf_folder(pdf_folder: str, workers: int = 1, use_cache: bool = True,
+                       rebuild: bool = False, cache_size_mb: int = DEFAULT_CACHE_SIZE_MB,
+                       header_pages: int = 0, max_chars: int = 0):
     """Process all PDFs in a folder"""
     
     print("🚀 PDF to Markdown Converter")
@@ -276,8 +753,8 @@ def process_pdf_folder(pdf_folder: str):
     output_dir = os.path.join(pdf_folder, "extracted_data")
     os.makedirs(output_dir, exist_ok=True)
     
-    # Find all PDFs
-    pdf_files = list(Path(pdf_folder).glob("*.pdf"))
+    # Find all PDFs (sorted so output order does not depend on the filesystem)
+    pdf_files = sorted(Path(pdf_folder).glob("*.pdf"))
     
     if not pdf_files:
         print(f"❌ No PDF files found in: {pdf_folder}")
@@ -285,39 +762,75 @@ def process_pdf_folder(pdf_folder: str):
     
     print(f"📁 Found {len(pdf_files)} PDF files")
     print(f"📂 Output directory: {output_dir}")
+    
+    cache = None
+    if use_cache:
+        cache = ExtractionCache(os.path.join(output_dir, ".cache"), cache_size_mb * 1024 * 1024)
+        if rebuild:
+            cache.clear()
+        print(f"🗄️  Cache: {cache.cache_dir}{' (rebuilding)' if rebuild else ''}")
+    if workers > 1:
+        print(f"⚙️  Workers: {workers}")
+    if header_pages:
+        print(f"📑 Header-first mode: starting with {header_pages} page(s) per PDF")
+    if max_chars:
+        print(f"📏 Text ceiling: {max_chars:,} characters per PDF")
     print("=" * 60)
     
-    # Process each PDF
-    all_data = []
-    for i, pdf_path in enumerate(pdf_files, 1):
-        print(f"\n[{i}/{len(pdf_files)}]")
-        
-        try:
-            # Extract text
-            text = extract_pdf_text(str(pdf_path))
+    options = {'header_pages': header_pages, 'max_chars': max_chars}
+    
+    if workers > 1:
+        results = process_pdfs_parallel(pdf_files, output_dir, workers, cache, options)
+    else:
+        # Process each PDF
+        results = []
+        for i, pdf_path in enumerate(pdf_files, 1):
+            print(f"\n[{i}/{len(pdf_files)}]")
             
-            if not text or len(text) < 100:
-                print(f"  ⚠️  Could not extract text (might be scanned PDF)")
+            try:
+                data = process_single_pdf(str(pdf_path), output_dir, cache, options)
+                if data:
+                    results.append(data)
+                
+            except Exception as e:
+                print(f"  ❌ Error: {e}")
                 continue
-            
-            # Create markdown and extract data
-            data = create_markdown(str(pdf_path), text, output_dir)
-            all_data.append(data)
-            
-        except Exception as e:
-            print(f"  ❌ Error: {e}")
-            continue
+    
+    if cache:
+        evicted = cache.evict()
+        if evicted:
+            print(f"\n🧹 Evicted {evicted} stale cache entries")
+    
+    all_data = [data for data in results if not data['extraction']['needs_ocr']]
+    ocr_review = [data for data in results if data['extraction']['needs_ocr']]
     
     # Save summary JSON
     summary_path = os.path.join(output_dir, "program_data.json")
     with open(summary_path, 'w', encoding='utf-8') as f:
         json.dump(all_data, f, indent=2, ensure_ascii=False)
     
+    # Save PDFs without a usable text layer for OCR review
+    ocr_path = os.path.join(output_dir, "ocr_review.json")
+    if ocr_review:
+        with open(ocr_path, 'w', encoding='utf-8') as f:
+            json.dump(ocr_review, f, indent=2, ensure_ascii=False)
+    elif os.path.exists(ocr_path):
+        os.remove(ocr_path)
+    
+    backend_counts = {}
+    for data in all_data:
+        backend = data['extraction']['backend']
+        backend_counts[backend] = backend_counts.get(backend, 0) + 1
+    
     print("\n" + "=" * 60)
     print(f"✅ Processing complete!")
     print(f"📊 Successfully processed: {len(all_data)}/{len(pdf_files)} files")
+    if backend_counts:
+        print(f"🔧 Backends: {', '.join(f'{name} {count}' for name, count in sorted(backend_counts.items()))}")
     print(f"📁 Markdown files: {output_dir}")
     print(f"📄 Summary data: {summary_path}")
+    if ocr_review:
+        print(f"🔍 Needs OCR review: {len(ocr_review)} files (see {ocr_path})")
     print("\n💡 Next steps:")
     print("   1. Review .md files in extracted_data/")
     print("   2. Fill in missing information (locations, categories)")
@@ -328,18 +841,43 @@ def process_pdf_folder(pdf_folder: str):
 # ============================================================================
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python pdf-to-md.py <pdf_folder>")
-        print("Example: python pdf-to-md.py ./pdfs")
+    parser = argparse.ArgumentParser(description='Convert P2M journal PDFs to markdown')
+    parser.add_argument('pdf_folder', help='Folder containing the journal PDFs')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of worker processes (default: 1, serial)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Disable the content-hash extraction cache')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='Discard cached extractions and re-parse every PDF')
+    parser.add_argument('--cache-size-mb', type=int, default=DEFAULT_CACHE_SIZE_MB,
+                        help=f'Maximum cache size before LRU eviction (default: {DEFAULT_CACHE_SIZE_MB})')
+    parser.add_argument('--header-pages', type=int, default=0,
+                        help='Only extract the first N pages, widening until metadata is found (default: 0, whole PDF)')
+    parser.add_argument('--max-chars', type=int, default=0,
+                        help='Stop reading a PDF once this many characters are collected (default: 0, no limit)')
+    args = parser.parse_args()
+    
+    if not os.path.exists(args.pdf_folder):
+        print(f"❌ Folder not found: {args.pdf_folder}")
         sys.exit(1)
     
-    pdf_folder = sys.argv[1]
+    if args.header_pages < 0 or args.max_chars < 0:
+        print("❌ --header-pages and --max-chars cannot be negative")
+        sys.exit(1)
     
-    if not os.path.exists(pdf_folder):
-        print(f"❌ Folder not found: {pdf_folder}")
+    if args.workers < 1:
+        print("❌ --workers must be at least 1")
         sys.exit(1)
     
-    process_pdf_folder(pdf_folder)
+    process_pdf_folder(
+        args.pdf_folder,
+        workers=args.workers,
+        use_cache=not args.no_cache,
+        rebuild=args.rebuild,
+        cache_size_mb=args.cache_size_mb,
+        header_pages=args.header_pages,
+        max_chars=args.max_chars,
+    )
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,451 @@
+"""
+P2M Data Pipeline
+Runs the whole data refresh as one incremental build
+
+Usage:
+    python scripts/pipeline.py                       # rebuild from the PDFs already on disk
+    python scripts/pipeline.py --refresh             # also scrape the website and download new PDFs
+    python scripts/pipeline.py --places riau.geojson # also (re)build the offline geocoder index
+    python scripts/pipeline.py --dry-run             # show which stages would run
+    python scripts/pipeline.py --force convert       # rerun a stage even if up to date
+    python scripts/pipeline.py --clusters public/data/clusters  # also precompute map clusters
+    python scripts/pipeline.py --spatial public/data/spatial    # also build the spatial index
+
+Stages:
+    scrape    scrape-p2m.py          -> scraped_programs.json        (every --refresh run)
+    download  download-pdfs.py       -> pdfs/*.pdf                   (--refresh only)
+    extract   pdf-to-md.py           -> pdfs/extracted_data/*.md
+    review    copy new .md files     -> pdfs/reviewed/*.md  (never overwrites reviewed files)
+    places    offline_geocoder.py    -> offline place index          (--places only)
+    convert   md-to-programs.py      -> programs.json, programs.ts, pdfs/reviewed/program_ids.json
+    clusters  program_clusters.py    -> <dir>/index.json + tiles     (--clusters DIR only)
+    spatial   spatial_index.py       -> <dir>/spatial.bin + .json    (--spatial DIR only)
+    publish   splice programs.ts     -> src/data/programs.ts
+
+Incremental builds:
+    Each stage is fingerprinted from the contents of its input files, its
+    script and its arguments. A stage runs only when that fingerprint
+    changed or an output is missing, so a stage whose upstream reran but
+    produced identical files is skipped as well. The scrape stage is the
+    exception: the website can change at any time, so --refresh always
+    scrapes (and download then only runs if scraped_programs.json changed). Stages whose dependencies
+    are done run in parallel (--jobs), e.g. `places` alongside
+    download/extract. Each stage's output goes to .pipeline/logs/<stage>.log.
+
+Manual review:
+    Edit the markdown in pdfs/reviewed/, then rerun the pipeline. The review
+    stage only copies files that are not there yet, so re-extracting a PDF
+    never discards review work.
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import threading
+import subprocess
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, List, Optional
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(SCRIPTS_DIR)
+
+STATE_DIR = '.pipeline'
+PROGRAMS_BLOCK_START = 'export const programs: Program[] = ['
+
+# ============================================================================
+# FINGERPRINTS
+# ============================================================================
+
+class FingerprintStore:
+    """
+    Content hashes of files, re-hashed only when size or mtime changed
+    
+    Persisted with the stage fingerprints, so unchanged PDFs are not read
+    again on every run.
+    """
+    
+    def __init__(self, files: Optional[Dict] = None):
+        self.files = files or {}
+        self.lock = threading.Lock()
+    
+    def file_hash(self, path: str) -> Optional[str]:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        entry = self.files.get(path)
+        if entry and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime_ns:
+            return entry['sha256']
+        sha256 = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha256.update(chunk)
+        with self.lock:
+            self.files[path] = {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'sha256': sha256.hexdigest()}
+        return sha256.hexdigest()
+    
+    def snapshot(self) -> Dict:
+        with self.lock:
+            return dict(self.files)
+    
+    def fingerprint(self, paths: List[str], extra: str = '') -> str:
+        digest = hashlib.sha256(extra.encode('utf-8'))
+        for path in sorted(set(paths)):
+            digest.update(f"{path}\0{self.file_hash(path)}\0".encode('utf-8'))
+        return digest.hexdigest()
+
+def expand(patterns: List[str]) -> List[str]:
+    """Glob patterns -> existing files (plain paths are kept even if missing)"""
+    paths = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            paths.extend(path for path in glob.glob(pattern) if os.path.isfile(path))
+        else:
+            paths.append(pattern)
+    return paths
+
+# ============================================================================
+# STAGES
+# ============================================================================
+
+class Stage:
+    """
+    One node of the pipeline graph
+    
+    `action` is either a command (list of arguments, run as a subprocess)
+    or a functools.partial of a Python function whose last argument is the
+    log file. `inputs` and `outputs` are paths or glob patterns relative to
+    the working directory. An `always` stage reads inputs no fingerprint can
+    see (e.g. a website) and runs on every pipeline run.
+    """
+    
+    def __init__(self, name: str, action, inputs: List[str], outputs: List[str],
+                 deps: Optional[List[str]] = None, always: bool = False):
+        self.name = name
+        self.action = action
+        self.inputs = inputs
+        self.outputs = outputs
+        self.deps = deps or []
+        self.always = always
+    
+    def signature(self) -> str:
+        if isinstance(self.action, list):
+            return json.dumps(self.action)
+        # Function arguments (folders, publish target) count like command arguments
+        return json.dumps([self.action.func.__name__, *self.action.args])
+    
+    def outputs_exist(self) -> bool:
+        for pattern in self.outputs:
+            paths = expand([pattern])
+            if not paths or not all(os.path.exists(path) for path in paths):
+                return False
+        return True
+    
+    def run(self, log):
+        if isinstance(self.action, list):
+            env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [SCRIPTS_DIR, os.environ.get('PYTHONPATH')])))
+            subprocess.run(self.action, stdout=log, stderr=subprocess.STDOUT, env=env, check=True)
+        else:
+            self.action(log)
+
+def script(name: str) -> str:
+    return os.path.join(SCRIPTS_DIR, name)
+
+# Modules the stage scripts import: editing them changes the stage output too
+GAZETTEER_SCRIPTS = [script(name) for name in ('geocode-locations.py', 'geocode_locations.py', 'keyword_automaton.py')]
+CONVERT_SCRIPTS = GAZETTEER_SCRIPTS + [
+    script(name) for name in ('geocode_cache.py', 'gazetteer_index.py', 'offline_geocoder.py', 'program_export.py')
+]
+
+def seed_review(extracted_dir: str, reviewed_dir: str, log):
+    os.makedirs(reviewed_dir, exist_ok=True)
+    copied = 0
+    for path in sorted(glob.glob(os.path.join(extracted_dir, '*.md'))):
+        target = os.path.join(reviewed_dir, os.path.basename(path))
+        if not os.path.exists(target):
+            shutil.copy2(path, target)
+            copied += 1
+    print(f"Copied {copied} new markdown files into {reviewed_dir}", file=log)
+
+def publish_programs(generated_ts: str, target_ts: str, log):
+    """Replace the programs array in the app's data file, keeping its types and helpers"""
+    def programs_block(text, path):
+        start = text.find(PROGRAMS_BLOCK_START)
+        end = text.find('\n];', start)
+        if start < 0 or end < 0:
+            raise ValueError(f"no `{PROGRAMS_BLOCK_START} ... ];` block in {path}")
+        return start, end + len('\n];')
+    
+    with open(generated_ts, 'r', encoding='utf-8') as f:
+        generated = f.read()
+    with open(target_ts, 'r', encoding='utf-8') as f:
+        target = f.read()
+    start, end = programs_block(generated, generated_ts)
+    target_start, target_end = programs_block(target, target_ts)
+    updated = target[:target_start] + generated[start:end] + target[target_end:]
+    if updated != target:
+        with open(target_ts, 'w', encoding='utf-8') as f:
+            f.write(updated)
+    print(f"Published {generated_ts} into {target_ts}", file=log)
+
+def build_stages(args) -> List[Stage]:
+    python = sys.executable
+    extracted = os.path.join(args.pdfs, 'extracted_data')
+    stages = []
+    
+    if args.refresh:
+        stages.append(Stage(
+            'scrape', [python, script('scrape-p2m.py'), '--async'],
+            inputs=[script('scrape-p2m.py')],
+            outputs=['scraped_programs.json'],
+            # The website is the real input; download still skips when nothing new was scraped
+            always=True,
+        ))
+        stages.append(Stage(
+            'download', [python, script('download-pdfs.py'), 'scraped_programs.json',
+                         '--output', args.pdfs, '--workers', str(args.workers)],
+            inputs=['scraped_programs.json', script('download-pdfs.py')],
+            outputs=[os.path.join(args.pdfs, '.downloads.json')],
+            deps=['scrape'],
+        ))
+    
+    stages.append(Stage(
+        'extract', [python, script('pdf-to-md.py'), args.pdfs, '--workers', str(args.workers)],
+        inputs=[os.path.join(args.pdfs, '*.pdf'), script('pdf-to-md.py'), *GAZETTEER_SCRIPTS],
+        outputs=[os.path.join(extracted, 'program_data.json')],
+        deps=['download'] if args.refresh else [],
+    ))
+    stages.append(Stage(
+        'review', partial(seed_review, extracted, args.reviewed),
+        inputs=[os.path.join(extracted, '*.md')],
+        outputs=[args.reviewed],
+        deps=['extract'],
+    ))
+    
+    convert_inputs = [os.path.join(args.reviewed, '*.md'), script('md-to-programs.py'), *CONVERT_SCRIPTS]
+    convert_deps = ['review']
+    if args.places:
+        index_path = os.environ.get('OFFLINE_GEOCODER_PATH', os.path.join(SCRIPTS_DIR, '.cache', 'places.sqlite3'))
+        stages.append(Stage(
+            'places', [python, script('offline_geocoder.py'), 'import', args.places, '--index', index_path],
+            inputs=[args.places, script('offline_geocoder.py')],
+            outputs=[index_path],
+        ))
+        convert_inputs.append(index_path)
+        convert_deps.append('places')
+    
+    stages.append(Stage(
+        'convert', [python, script('md-to-programs.py'), args.reviewed, '--workers', str(args.workers)],
+        inputs=convert_inputs,
+        outputs=['programs.json', 'programs.ts', os.path.join(args.reviewed, 'program_ids.json')],
+        deps=convert_deps,
+    ))
+    
+    if args.clusters:
+        stages.append(Stage(
+            'clusters', [python, script('program_clusters.py'), 'programs.json', '--output', args.clusters],
+            inputs=['programs.json', script('program_clusters.py')],
+            outputs=[os.path.join(args.clusters, 'index.json')],
+            deps=['convert'],
+        ))
+    
+    if args.spatial:
+        stages.append(Stage(
+            'spatial', [python, script('spatial_index.py'), 'build', 'programs.json', '--output', args.spatial],
+            inputs=['programs.json', script('spatial_index.py')],
+            outputs=[os.path.join(args.spatial, 'spatial.json')],
+            deps=['convert'],
+        ))
+    
+    if not args.no_publish:
+        stages.append(Stage(
+            'publish', partial(publish_programs, 'programs.ts', args.target),
+            inputs=['programs.ts'],
+            outputs=[args.target],
+            deps=['convert'],
+        ))
+    
+    return stages
+
+# ============================================================================
+# SCHEDULER
+# ============================================================================
+
+class Pipeline:
+    """
+    Runs stages in dependency order, skipping those that are up to date
+    
+    State (file hashes and per-stage fingerprints) lives in
+    .pipeline/state.json and is saved after every finished stage.
+    """
+    
+    def __init__(self, stages: List[Stage], jobs: int = 2, force: Optional[List[str]] = None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.jobs = jobs
+        self.force = set(force or [])
+        self.state_path = os.path.join(STATE_DIR, 'state.json')
+        self.log_dir = os.path.join(STATE_DIR, 'logs')
+        state = {}
+        if os.path.exists(self.state_path):
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        self.fingerprints = FingerprintStore(state.get('files'))
+        self.stage_state = state.get('stages', {})
+        self.results = {}
+        
+        for stage in stages:
+            for dep in stage.deps:
+                if dep not in self.stages:
+                    raise ValueError(f"stage {stage.name} depends on unknown stage {dep}")
+    
+    def save_state(self):
+        os.makedirs(STATE_DIR, exist_ok=True)
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'files': self.fingerprints.snapshot(), 'stages': self.stage_state}, f)
+        os.replace(tmp_path, self.state_path)
+    
+    def fingerprint(self, stage: Stage) -> str:
+        return self.fingerprints.fingerprint(expand(stage.inputs), stage.signature())
+    
+    def is_up_to_date(self, stage: Stage) -> bool:
+        if stage.always or stage.name in self.force:
+            return False
+        stored = self.stage_state.get(stage.name)
+        return bool(stored) and stored == self.fingerprint(stage) and stage.outputs_exist()
+    
+    def run_stage(self, stage: Stage) -> Dict:
+        if self.is_up_to_date(stage):
+            return {'status': 'up to date', 'seconds': 0.0}
+        
+        os.makedirs(self.log_dir, exist_ok=True)
+        log_path = os.path.join(self.log_dir, f"{stage.name}.log")
+        start = time.perf_counter()
+        try:
+            with open(log_path, 'w', encoding='utf-8') as log:
+                stage.run(log)
+        except Exception as e:
+            return {'status': 'failed', 'seconds': time.perf_counter() - start, 'error': str(e), 'log': log_path}
+        # Fingerprint after the run: inputs written by upstream stages are final now
+        return {'status': 'ran', 'seconds': time.perf_counter() - start, 'fingerprint': self.fingerprint(stage),
+                'log': log_path}
+    
+    def run(self, dry_run: bool = False) -> bool:
+        """Run every stage; returns False if any stage failed"""
+        if dry_run:
+            for name, stage in self.stages.items():
+                # Upstream reruns can still change inputs, so this is a lower bound
+                print(f"  {'·' if self.is_up_to_date(stage) else '▶'} {name}")
+            return True
+        
+        pending = dict(self.stages)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    dep_results = [self.results.get(dep) for dep in stage.deps]
+                    if any(result and result['status'] in ('failed', 'blocked') for result in dep_results):
+                        self.results[name] = {'status': 'blocked', 'seconds': 0.0}
+                        print(f"  ⏭️  {name}: blocked by a failed dependency")
+                        del pending[name]
+                    elif all(dep_results):
+                        print(f"  ▶ {name}")
+                        running[executor.submit(self.run_stage, stage)] = name
+                        del pending[name]
+                
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    result = future.result()
+                    self.results[name] = result
+                    if result['status'] == 'ran':
+                        self.stage_state[name] = result['fingerprint']
+                        self.save_state()
+                        print(f"  ✓ {name} ({result['seconds']:.1f}s)")
+                    elif result['status'] == 'failed':
+                        print(f"  ❌ {name}: {result['error']} (see {result['log']})")
+                    else:
+                        print(f"  · {name}: up to date")
+        
+        self.save_state()
+        return not any(result['status'] in ('failed', 'blocked') for result in self.results.values())
+    
+    def print_timings(self):
+        print("⏱️  Stage timings:")
+        for name in self.stages:
+            result = self.results.get(name, {'status': 'not run', 'seconds': 0.0})
+            print(f"   {name:<10} {result['status']:<12} {result['seconds']:>7.2f}s")
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the P2M data pipeline incrementally')
+    parser.add_argument('--workdir', default='.',
+                        help='Directory for scraped data and generated files (default: current directory)')
+    parser.add_argument('--pdfs', default='pdfs',
+                        help='PDF folder, relative to --workdir (default: pdfs)')
+    parser.add_argument('--reviewed', default=None,
+                        help='Reviewed markdown folder, relative to --workdir (default: <pdfs>/reviewed)')
+    parser.add_argument('--target', default=os.path.join(PROJECT_DIR, 'src', 'data', 'programs.ts'),
+                        help='App data file to publish into (default: src/data/programs.ts)')
+    parser.add_argument('--refresh', action='store_true',
+                        help='Scrape the website and download new PDFs first')
+    parser.add_argument('--places', help='GeoJSON/CSV place dump for the offline geocoder')
+    parser.add_argument('--clusters', metavar='DIR',
+                        help='Precompute map marker clusters into DIR after converting')
+    parser.add_argument('--spatial', metavar='DIR',
+                        help='Build the spatial index (R-tree) into DIR after converting')
+    parser.add_argument('--no-publish', action='store_true', help='Do not touch src/data/programs.ts')
+    parser.add_argument('--jobs', type=int, default=2, help='Stages to run at once (default: 2)')
+    parser.add_argument('--workers', type=int, default=4, help='Workers inside each stage (default: 4)')
+    parser.add_argument('--force', nargs='*', default=[], metavar='STAGE',
+                        help='Rerun these stages even if up to date')
+    parser.add_argument('--dry-run', action='store_true', help='Show which stages are out of date')
+    args = parser.parse_args()
+    
+    # Paths given on the command line are relative to where the user ran it
+    args.target = os.path.abspath(args.target)
+    if args.places:
+        args.places = os.path.abspath(args.places)
+    os.makedirs(args.workdir, exist_ok=True)
+    os.chdir(args.workdir)
+    args.reviewed = args.reviewed or os.path.join(args.pdfs, 'reviewed')
+    
+    print("🚀 P2M Data Pipeline")
+    print("=" * 60)
+    
+    try:
+        pipeline = Pipeline(build_stages(args), jobs=args.jobs, force=args.force)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    unknown = set(args.force) - set(pipeline.stages)
+    if unknown:
+        print(f"❌ Unknown stage(s): {', '.join(sorted(unknown))}")
+        sys.exit(1)
+    
+    start = time.perf_counter()
+    ok = pipeline.run(dry_run=args.dry_run)
+    if args.dry_run:
+        return
+    
+    print("\n" + "=" * 60)
+    pipeline.print_timings()
+    print(f"   {'total':<10} {'':<12} {time.perf_counter() - start:>7.2f}s")
+    if not ok:
+        print("❌ Pipeline failed")
+        sys.exit(1)
+    print("✅ Pipeline complete!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""
+Program Clusters
+Precomputes marker clusters for every zoom level and category/year facet
+
+Instead of clustering every filtered program in the browser at each zoom
+or filter change, the map can load pre-aggregated clusters for the tiles
+in view.
+
+Usage:
+    python scripts/program_clusters.py programs.json --output public/data/clusters
+    python scripts/program_clusters.py generated_programs.json --output public/data/clusters \
+        --min-zoom 5 --max-zoom 16 --cell-size 32
+
+    # In Python, e.g. as an export target
+    from program_clusters import ClusterWriter
+    export_programs(programs, ts_path='programs.ts', targets=[ClusterWriter('public/data/clusters')])
+
+How clusters are built:
+    Points are binned into a fixed grid of cell_size x cell_size screen
+    pixels (Web Mercator) at every zoom. The grid is aligned at the world
+    origin, so a cell at zoom z is exactly the four cells below it at
+    z + 1: clusters are built once at max_zoom and merged upwards.
+
+    Cells are kept per (category, year) facet. Because the grid does not
+    depend on the facet, any filter combination is the sum of its facets'
+    rows for the same cell (counts add, centroids are count-weighted), so
+    every facet selection is precomputed without storing each combination.
+
+Output (<output>/):
+    - index.json: {"version", "minZoom", "maxZoom", "cellSize",
+      "facets": [[category, year], ...], "tiles": {"<z>": ["<x>-<y>", ...]}}
+    - <z>/<x>-<y>.json per non-empty 256px map tile: rows
+      [cell, facet, count, lat, lng] sorted by cell, where cell is
+      row * cellsPerTile + column inside the tile; a row with count 1 also
+      carries the program ID as a sixth element
+    Past max_zoom the map shows the individual markers.
+"""
+
+import os
+import sys
+import math
+import json
+import time
+import argparse
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from program_export import compact_json, write_if_changed
+
+DEFAULT_MIN_ZOOM = 5    # Map.tsx minZoom
+DEFAULT_MAX_ZOOM = 16
+DEFAULT_CELL_SIZE = 32  # px; react-leaflet-cluster merges markers within 25 px
+TILE_SIZE = 256
+MAX_LATITUDE = 85.05112878
+CENTROID_DECIMALS = 5
+
+def project(lat: float, lng: float, zoom: int) -> Tuple[float, float]:
+    """Web Mercator pixel coordinates at `zoom`"""
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    scale = TILE_SIZE * 2 ** zoom
+    x = (lng + 180) / 360 * scale
+    sin_lat = math.sin(math.radians(lat))
+    y = (0.5 - math.log((1 + sin_lat) / (1 - sin_lat)) / (4 * math.pi)) * scale
+    return x, y
+
+def build_clusters(points: Iterable[Tuple[str, float, float, int]], min_zoom: int, max_zoom: int,
+                   cell_size: int) -> Dict[int, Dict[Tuple[int, int, int], List]]:
+    """
+    Aggregate (id, lat, lng, facet) points per zoom
+    
+    Returns {zoom: {(cell_x, cell_y, facet): [count, lat_sum, lng_sum, id]}},
+    where id is only set for single-program cells.
+    """
+    world_cells = TILE_SIZE * 2 ** max_zoom // cell_size
+    level = {}
+    for program_id, lat, lng, facet in points:
+        x, y = project(lat, lng, max_zoom)
+        key = (min(int(x // cell_size), world_cells - 1), min(int(y // cell_size), world_cells - 1), facet)
+        cell = level.get(key)
+        if cell:
+            cell[0] += 1
+            cell[1] += lat
+            cell[2] += lng
+            cell[3] = None
+        else:
+            level[key] = [1, lat, lng, program_id]
+    
+    levels = {max_zoom: level}
+    for zoom in range(max_zoom - 1, min_zoom - 1, -1):
+        parent = {}
+        for (cell_x, cell_y, facet), (count, lat_sum, lng_sum, program_id) in level.items():
+            key = (cell_x >> 1, cell_y >> 1, facet)
+            cell = parent.get(key)
+            if cell:
+                cell[0] += count
+                cell[1] += lat_sum
+                cell[2] += lng_sum
+                cell[3] = None
+            else:
+                parent[key] = [count, lat_sum, lng_sum, program_id]
+        levels[zoom] = level = parent
+    return levels
+
+class ClusterWriter:
+    """
+    Export target writing cluster tiles (see the module docstring)
+    
+    Only the id, coordinates and facet of each program are kept while
+    records stream in. Tiles are rewritten only when their content changes,
+    and tiles listed in the previous index.json that are now empty are
+    removed.
+    """
+    
+    VERSION = 1
+    INDEX_NAME = 'index.json'
+    
+    def __init__(self, output_dir: str, min_zoom: int = DEFAULT_MIN_ZOOM, max_zoom: int = DEFAULT_MAX_ZOOM,
+                 cell_size: int = DEFAULT_CELL_SIZE):
+        if cell_size not in (8, 16, 32, 64, 128, 256):
+            raise ValueError("cell_size must be a power of two between 8 and 256")
+        if not 0 <= min_zoom <= max_zoom:
+            raise ValueError("zoom levels must satisfy 0 <= min_zoom <= max_zoom")
+        self.output_dir = output_dir
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self.cell_size = cell_size
+        self.points = []
+        self.facets = {}
+        self.changed = {}
+        self.stats = {}
+    
+    def write(self, program: Dict):
+        facet = self.facets.setdefault((program['category'], program['year']), len(self.facets))
+        location = program['location']
+        self.points.append((program['id'], location['lat'], location['lng'], facet))
+    
+    def _write(self, relative_path: str, value):
+        path = os.path.join(self.output_dir, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.changed[path] = write_if_changed(path, compact_json(value))
+    
+    def close(self) -> Dict[str, bool]:
+        index_path = os.path.join(self.output_dir, self.INDEX_NAME)
+        previous = set()
+        if os.path.exists(index_path):
+            with open(index_path, 'r', encoding='utf-8') as f:
+                previous = {
+                    os.path.join(zoom, f"{tile}.json")
+                    for zoom, tiles in json.load(f)['tiles'].items() for tile in tiles
+                }
+        
+        # Facet numbers in sorted order, so they do not depend on record order
+        facets = sorted(self.facets)
+        renumber = {self.facets[facet]: number for number, facet in enumerate(facets)}
+        points = [(program_id, lat, lng, renumber[facet]) for program_id, lat, lng, facet in self.points]
+        levels = build_clusters(points, self.min_zoom, self.max_zoom, self.cell_size)
+        
+        cells_per_tile = TILE_SIZE // self.cell_size
+        written = set()
+        tile_index = {}
+        for zoom, cells in sorted(levels.items()):
+            tiles = defaultdict(list)
+            for (cell_x, cell_y, facet), (count, lat_sum, lng_sum, program_id) in cells.items():
+                tile_x, column = divmod(cell_x, cells_per_tile)
+                tile_y, row = divmod(cell_y, cells_per_tile)
+                entry = [row * cells_per_tile + column, facet, count,
+                         round(lat_sum / count, CENTROID_DECIMALS), round(lng_sum / count, CENTROID_DECIMALS)]
+                if program_id is not None:
+                    entry.append(program_id)
+                tiles[(tile_x, tile_y)].append(entry)
+            
+            for (tile_x, tile_y), rows in sorted(tiles.items()):
+                relative_path = os.path.join(str(zoom), f"{tile_x}-{tile_y}.json")
+                rows.sort(key=lambda entry: (entry[0], entry[1]))
+                self._write(relative_path, rows)
+                written.add(relative_path)
+            tile_index[str(zoom)] = [f"{tile_x}-{tile_y}" for tile_x, tile_y in sorted(tiles)]
+            self.stats[zoom] = (len(cells), len(tiles))
+        
+        self._write(self.INDEX_NAME, {
+            'version': self.VERSION,
+            'minZoom': self.min_zoom,
+            'maxZoom': self.max_zoom,
+            'cellSize': self.cell_size,
+            'facets': [list(facet) for facet in facets],
+            'tiles': tile_index,
+        })
+        
+        for relative_path in previous - written:
+            path = os.path.join(self.output_dir, relative_path)
+            if os.path.exists(path):
+                os.remove(path)
+                self.changed[path] = True
+        return self.changed
+    
+    def abort(self):
+        """Nothing is written before close()"""
+
+def clusters_in_view(cluster_dir: str, zoom: int, south: float, west: float, north: float, east: float,
+                     categories: Optional[Iterable[str]] = None, years: Optional[Iterable[int]] = None) -> List[Dict]:
+    """
+    Clusters inside a bounding box for a category/year filter, merged across facets
+    
+    What the map does client-side: load the tiles in view, keep the rows of
+    the selected facets and sum them per cell. Returns
+    [{'lat', 'lng', 'count', 'id'}] with 'id' set for single programs.
+    """
+    with open(os.path.join(cluster_dir, ClusterWriter.INDEX_NAME), 'r', encoding='utf-8') as f:
+        index = json.load(f)
+    zoom = max(index['minZoom'], min(index['maxZoom'], zoom))
+    categories = set(categories) if categories else None
+    years = set(years) if years else None
+    selected = {
+        number for number, (category, year) in enumerate(index['facets'])
+        if (categories is None or category in categories) and (years is None or year in years)
+    }
+    
+    west_x, north_y = project(north, west, zoom)
+    east_x, south_y = project(south, east, zoom)
+    available = set(index['tiles'].get(str(zoom), []))
+    merged = {}
+    for tile_x in range(int(west_x // TILE_SIZE), int(east_x // TILE_SIZE) + 1):
+        for tile_y in range(int(north_y // TILE_SIZE), int(south_y // TILE_SIZE) + 1):
+            name = f"{tile_x}-{tile_y}"
+            if name not in available:
+                continue
+            with open(os.path.join(cluster_dir, str(zoom), f"{name}.json"), 'r', encoding='utf-8') as f:
+                rows = json.load(f)
+            for cell, facet, count, lat, lng, *program_id in rows:
+                if facet not in selected or not (south <= lat <= north and west <= lng <= east):
+                    continue
+                cluster = merged.setdefault((name, cell), {'lat': 0.0, 'lng': 0.0, 'count': 0, 'id': None})
+                cluster['lat'] += lat * count
+                cluster['lng'] += lng * count
+                cluster['count'] += count
+                cluster['id'] = program_id[0] if cluster['count'] == 1 and program_id else None
+    
+    clusters = []
+    for cluster in merged.values():
+        cluster['lat'] = round(cluster['lat'] / cluster['count'], CENTROID_DECIMALS)
+        cluster['lng'] = round(cluster['lng'] / cluster['count'], CENTROID_DECIMALS)
+        clusters.append(cluster)
+    return clusters
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute map marker clusters for generated programs')
+    parser.add_argument('programs', help='programs.json from md-to-programs.py or generate-programs.py')
+    parser.add_argument('--output', default='clusters', help='Folder for index.json and tiles (default: clusters)')
+    parser.add_argument('--min-zoom', type=int, default=DEFAULT_MIN_ZOOM,
+                        help=f'Lowest zoom level (default: {DEFAULT_MIN_ZOOM})')
+    parser.add_argument('--max-zoom', type=int, default=DEFAULT_MAX_ZOOM,
+                        help=f'Highest clustered zoom level (default: {DEFAULT_MAX_ZOOM})')
+    parser.add_argument('--cell-size', type=int, default=DEFAULT_CELL_SIZE,
+                        help=f'Grid cell size in pixels, a power of two (default: {DEFAULT_CELL_SIZE})')
+    args = parser.parse_args()
+    
+    if not os.path.exists(args.programs):
+        print(f"❌ File not found: {args.programs}")
+        sys.exit(1)
+    try:
+        writer = ClusterWriter(args.output, args.min_zoom, args.max_zoom, args.cell_size)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    
+    print("🚀 Precomputing marker clusters")
+    print("=" * 60)
+    
+    start = time.perf_counter()
+    with open(args.programs, 'r', encoding='utf-8') as f:
+        for program in json.load(f):
+            writer.write(program)
+    changed = writer.close()
+    elapsed = time.perf_counter() - start
+    
+    for zoom, (cells, tiles) in sorted(writer.stats.items()):
+        print(f"  z{zoom:<3} {cells:8,} clusters in {tiles:5,} tiles")
+    
+    size = sum(os.path.getsize(path) for path in changed if os.path.exists(path))
+    print("\n" + "=" * 60)
+    print(f"✅ Clustered {len(writer.points):,} programs over {len(writer.facets)} category/year facets "
+          f"in {elapsed:.2f}s")
+    print(f"📦 {sum(changed.values())} of {len(changed)} files written ({size / 1024:,.1f} KB in total)")
+    print(f"📁 Output: {args.output}")
+
+if __name__ == "__main__":
+    main()
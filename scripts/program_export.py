@@ -0,0 +1,532 @@
+"""
+Program Export
+Shared writer for programs.ts / programs.json
+
+Streams program records into the TypeScript and JSON outputs at the same
+time, one buffered write per record, so memory stays flat however many
+programs there are. Each record is rendered once with proper escaping
+("Pulau Ngenang's Mangrove", backslashes, newlines), which the old
+hand-quoted f.write exporters got wrong.
+
+Usage:
+    from program_export import export_programs
+
+    export_programs(programs, ts_path='programs.ts', json_path='programs.json',
+                    header=['Auto-generated from journal PDFs'])
+
+    # Or record by record, e.g. from a generator, plus the columnar bundle
+    with ProgramExporter('programs.ts', 'programs.json',
+                         targets=[BundleWriter('public/data')]) as exporter:
+        for program in records():
+            exporter.write(program)
+
+Output format:
+    - JSON: byte-identical to json.dump(programs, f, indent=2, ensure_ascii=False)
+    - TypeScript: `export const programs: Program[] = [ ... ];` holding the
+      same JSON records (the layout of src/data/programs.ts), except that
+      keys whose value is None are left out, as the optional videoUrl must be
+    - Bundle (BundleWriter): markers.json with marker columns for first
+      paint, plus lazily loaded description / media / address chunks
+    - Shards (ShardWriter): one <id>.json per program plus an id -> shard
+      manifest, for pages that need a single record
+"""
+
+import os
+import re
+import json
+import zlib
+import hashlib
+from json.encoder import encode_basestring as encode_string, INFINITY
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+BUFFER_SIZE = 1 << 20
+
+def _number(value) -> str:
+    # float.__repr__ is what json uses too; only NaN / Infinity need spelling out
+    return repr(value) if value == value and value not in (INFINITY, -INFINITY) else json.dumps(value)
+
+def json_value(value, indent: str = '', drop_none: bool = False) -> str:
+    """
+    Same text as json.dumps(value, indent=2, ensure_ascii=False), nested at `indent`
+    
+    json.dumps falls back to its pure-Python encoder whenever indent is set;
+    this is the same walk without the generator machinery. With drop_none,
+    dict entries whose value is None are skipped.
+    """
+    kind = type(value)
+    if kind is str:
+        return encode_string(value)
+    if kind is dict:
+        inner = indent + '  '
+        items = [f"{inner}{encode_string(key)}: {json_value(item, inner, drop_none)}"
+                 for key, item in value.items() if not (drop_none and item is None)]
+        return '{\n' + ',\n'.join(items) + f'\n{indent}}}' if items else '{}'
+    if kind is list or kind is tuple:
+        if not value:
+            return '[]'
+        inner = indent + '  '
+        items = [inner + json_value(item, inner, drop_none) for item in value]
+        return '[\n' + ',\n'.join(items) + f'\n{indent}]'
+    if value is None:
+        return 'null'
+    if kind is bool:
+        return 'true' if value else 'false'
+    if isinstance(value, (int, float)):
+        return _number(value)
+    raise TypeError(f"Object of type {kind.__name__} is not JSON serializable")
+
+def _has_none(value) -> bool:
+    if type(value) is dict:
+        return any(item is None or _has_none(item) for item in value.values())
+    if type(value) is list:
+        return any(_has_none(item) for item in value)
+    return False
+
+def render_record(program: Dict, indent: str = '  ') -> Tuple[str, str]:
+    """(JSON text, TypeScript text) of one program, sharing every field both keep"""
+    inner = indent + '  '
+    json_items, ts_items = [], []
+    for key, value in program.items():
+        item = f"{inner}{encode_string(key)}: {json_value(value, inner)}"
+        json_items.append(item)
+        if value is None:
+            continue
+        if _has_none(value):
+            item = f"{inner}{encode_string(key)}: {json_value(value, inner, drop_none=True)}"
+        ts_items.append(item)
+    
+    def wrap(items):
+        return '{\n' + ',\n'.join(items) + f'\n{indent}}}' if items else '{}'
+    return wrap(json_items), wrap(ts_items)
+
+class ProgramExporter:
+    """
+    Streaming TS + JSON writer
+    
+    Both files are written to temporary paths and moved into place on
+    close(), so readers never see half a file. With only_if_changed=True an
+    output whose new content equals the existing file is left untouched
+    (its mtime too), which keeps file watchers and incremental builds quiet.
+    After close(), `changed` maps each output path to whether it was
+    replaced.
+    
+    `targets` are further writers fed the same records (e.g. BundleWriter);
+    each needs write(program), close() and abort(), and close() may return
+    its own {path: changed} map.
+    """
+    
+    def __init__(self, ts_path: Optional[str] = None, json_path: Optional[str] = None,
+                 header: Iterable[str] = (), variable: str = 'programs', type_name: str = 'Program',
+                 only_if_changed: bool = False, targets: Iterable = ()):
+        self.ts_path = ts_path
+        self.json_path = json_path
+        self.only_if_changed = only_if_changed
+        self.targets = list(targets)
+        self.count = 0
+        self.changed = {}
+        self.ts = open(ts_path + '.tmp', 'w', encoding='utf-8', buffering=BUFFER_SIZE) if ts_path else None
+        self.json = open(json_path + '.tmp', 'w', encoding='utf-8', buffering=BUFFER_SIZE) if json_path else None
+        
+        if self.ts:
+            comments = ''.join(f"// {line}\n" for line in header)
+            if comments:
+                self.ts.write(comments + "\n")
+            self.ts.write(f"export const {variable}: {type_name}[] = [")
+        if self.json:
+            self.json.write('[')
+    
+    def write(self, program: Dict):
+        separator = ',\n  ' if self.count else '\n  '
+        json_text, ts_text = render_record(program)
+        if self.ts:
+            self.ts.write(separator + ts_text)
+        if self.json:
+            self.json.write(separator + json_text)
+        for target in self.targets:
+            target.write(program)
+        self.count += 1
+    
+    def _finish(self, handle, path: str):
+        handle.close()
+        tmp_path = path + '.tmp'
+        if self.only_if_changed and os.path.exists(path) and _same_content(tmp_path, path):
+            os.remove(tmp_path)
+            self.changed[path] = False
+        else:
+            os.replace(tmp_path, path)
+            self.changed[path] = True
+    
+    def close(self):
+        if self.ts:
+            self.ts.write('\n];\n' if self.count else '];\n')
+            self._finish(self.ts, self.ts_path)
+            self.ts = None
+        if self.json:
+            self.json.write('\n]' if self.count else ']')
+            self._finish(self.json, self.json_path)
+            self.json = None
+        for target in self.targets:
+            self.changed.update(target.close() or {})
+        self.targets = []
+    
+    def abort(self):
+        """Drop the temporary files, leaving existing outputs as they were"""
+        for handle, path in ((self.ts, self.ts_path), (self.json, self.json_path)):
+            if handle:
+                handle.close()
+                os.remove(path + '.tmp')
+        self.ts = self.json = None
+        for target in self.targets:
+            target.abort()
+        self.targets = []
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+def _same_content(path_a: str, path_b: str) -> bool:
+    if os.path.getsize(path_a) != os.path.getsize(path_b):
+        return False
+    with open(path_a, 'rb') as a, open(path_b, 'rb') as b:
+        while True:
+            chunk = a.read(BUFFER_SIZE)
+            if chunk != b.read(BUFFER_SIZE):
+                return False
+            if not chunk:
+                return True
+
+def file_holds(path: str, data: bytes) -> bool:
+    """Whether the file at `path` contains exactly `data`"""
+    if not os.path.exists(path) or os.path.getsize(path) != len(data):
+        return False
+    with open(path, 'rb') as f:
+        return f.read() == data
+
+def write_if_changed(path: str, text: Union[str, bytes], only_if_changed: bool = True) -> bool:
+    """Atomically write `text`, skipping files that already hold it; returns whether it was written"""
+    data = text.encode('utf-8') if isinstance(text, str) else text
+    if only_if_changed and file_holds(path, data):
+        return False
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+def compact_json(value) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+# ============================================================================
+# COLUMNAR BUNDLE
+# ============================================================================
+
+# What the map needs for first paint: one array per field, index-aligned
+MARKER_COLUMNS = ['id', 'name', 'lat', 'lng', 'category', 'year', 'status']
+# Dictionary-encoded marker columns (values become indexes into a lookup list)
+MARKER_ENUMS = ['category', 'status']
+# Everything else, fetched lazily per chunk when a popup or page needs it
+CHUNK_GROUPS = {
+    'descriptions': ['description'],
+    'media': ['images', 'videoUrl', 'detailsUrl'],
+    'addresses': ['address'],
+}
+COORDINATE_DECIMALS = 6  # ~10 cm, plenty for a marker
+DEFAULT_CHUNK_SIZE = 500
+# <group>-<n>-<hash>.json, plus the unhashed <group>-<n>.json of older exports
+CHUNK_NAME = re.compile(rf"^(?:{'|'.join(CHUNK_GROUPS)})-\d+(?:-[0-9a-f]+)?\.json$")
+
+class BundleWriter:
+    """
+    Columnar data bundle for the web app
+    
+    <output_dir>/markers.json holds small parallel arrays (MARKER_COLUMNS)
+    for every program. The heavy fields are cut into fixed-size chunks per
+    group, <output_dir>/<group>-<n>-<hash>.json, so program i lives at
+    offset i % chunkSize of chunk i // chunkSize and a popup only loads the
+    chunks it needs:
+        
+        {"version": 1, "count": 2, "chunkSize": 500,
+         "categories": ["Kesehatan", ...], "statuses": ["Completed", ...],
+         "chunks": {"descriptions": ["descriptions-000-3f9a0c12d4.json"], ...},
+         "id": [...], "name": [...], "lat": [...], "lng": [...],
+         "category": [0, 3], "year": [2024, 2025], "status": [0, 0]}
+        
+        descriptions-000-3f9a0c12d4.json: {"start": 0, "description": ["...", "..."]}
+    
+    The hash in a chunk's name comes from its content, so a chunk that
+    changes gets a new name and a cached markers.json can never be paired
+    with newer chunk content; the chunks can be cached forever. Chunks are
+    written as soon as they fill, so only the marker columns (a few dozen
+    bytes per program) stay in memory. New chunks go to hidden staging
+    files (.<chunk>.staged) that close() renames into place right before
+    markers.json, and abort() deletes, so an export that fails halfway
+    leaves the previous bundle intact. Unchanged chunks are not rewritten.
+    Chunks the previous markers.json listed are kept for one more export,
+    so clients still holding it can finish loading; older chunk files are
+    removed.
+    """
+    
+    VERSION = 1
+    
+    def __init__(self, output_dir: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.output_dir = output_dir
+        self.chunk_size = chunk_size
+        os.makedirs(output_dir, exist_ok=True)
+        self.columns = {column: [] for column in MARKER_COLUMNS}
+        self.enums = {column: {} for column in MARKER_ENUMS}
+        self.pending = {group: {field: [] for field in fields} for group, fields in CHUNK_GROUPS.items()}
+        self.chunk_files = {group: [] for group in CHUNK_GROUPS}
+        # Chunks the live markers.json lists, kept until the next export
+        self.previous = set()
+        markers_path = os.path.join(output_dir, 'markers.json')
+        if os.path.exists(markers_path):
+            with open(markers_path, 'r', encoding='utf-8') as f:
+                self.previous = {name for names in json.load(f).get('chunks', {}).values() for name in names}
+        # (staging path, final path) of chunks waiting for close()
+        self.staged = []
+        self.changed = {}
+        self.count = 0
+    
+    def write(self, program: Dict):
+        location = program['location']
+        row = {
+            'id': program['id'],
+            'name': program['name'],
+            'lat': round(location['lat'], COORDINATE_DECIMALS),
+            'lng': round(location['lng'], COORDINATE_DECIMALS),
+            'category': program['category'],
+            'year': program['year'],
+            'status': program['status'],
+        }
+        for column in MARKER_ENUMS:
+            values = self.enums[column]
+            row[column] = values.setdefault(row[column], len(values))
+        for column, value in row.items():
+            self.columns[column].append(value)
+        
+        details = {**program, 'address': location.get('address')}
+        for group, fields in CHUNK_GROUPS.items():
+            for field in fields:
+                self.pending[group][field].append(details.get(field))
+        
+        self.count += 1
+        if self.count % self.chunk_size == 0:
+            self._flush_chunks()
+    
+    def _write(self, name: str, value):
+        path = os.path.join(self.output_dir, name)
+        self.changed[path] = write_if_changed(path, compact_json(value))
+    
+    def _stage(self, prefix: str, value) -> str:
+        """Stage a chunk as <prefix>-<hash>.json unless it already exists; returns its name"""
+        data = compact_json(value).encode('utf-8')
+        name = f"{prefix}-{hashlib.sha256(data).hexdigest()[:10]}.json"
+        path = os.path.join(self.output_dir, name)
+        self.changed[path] = not file_holds(path, data)
+        if self.changed[path]:
+            staged_path = os.path.join(self.output_dir, f".{name}.staged")
+            with open(staged_path, 'wb') as f:
+                f.write(data)
+            self.staged.append((staged_path, path))
+        return name
+    
+    def _flush_chunks(self):
+        index = (self.count - 1) // self.chunk_size
+        for group, columns in self.pending.items():
+            name = self._stage(f"{group}-{index:03d}", {'start': index * self.chunk_size, **columns})
+            self.chunk_files[group].append(name)
+            self.pending[group] = {field: [] for field in columns}
+    
+    def close(self) -> Dict[str, bool]:
+        if self.count % self.chunk_size:
+            self._flush_chunks()
+        
+        for staged_path, path in self.staged:
+            os.replace(staged_path, path)
+        self.staged = []
+        self._write('markers.json', {
+            'version': self.VERSION,
+            'count': self.count,
+            'chunkSize': self.chunk_size,
+            'categories': list(self.enums['category']),
+            'statuses': list(self.enums['status']),
+            'chunks': self.chunk_files,
+            **self.columns,
+        })
+        
+        keep = self.previous.union(*self.chunk_files.values())
+        for name in os.listdir(self.output_dir):
+            if CHUNK_NAME.match(name) and name not in keep:
+                os.remove(os.path.join(self.output_dir, name))
+                self.changed[os.path.join(self.output_dir, name)] = True
+        return self.changed
+    
+    def abort(self):
+        """Drop the staged chunks; the live chunks and markers.json are untouched"""
+        for staged_path, _ in self.staged:
+            if os.path.exists(staged_path):
+                os.remove(staged_path)
+        self.staged = []
+
+def _gzip_size(path: str) -> int:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    size = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(BUFFER_SIZE), b''):
+            size += len(compressor.compress(chunk))
+    return size + len(compressor.flush())
+
+def bundle_report(bundle_dir: str, monolithic: Iterable[str] = ()) -> Dict[str, Dict]:
+    """
+    Print raw / gzip sizes of a bundle next to the monolithic outputs
+    
+    Returns {label: {'files', 'bytes', 'gzip'}}.
+    """
+    with open(os.path.join(bundle_dir, 'markers.json'), 'r', encoding='utf-8') as f:
+        chunks = json.load(f)['chunks']
+    
+    groups = {'markers.json': [os.path.join(bundle_dir, 'markers.json')]}
+    for group, names in chunks.items():
+        groups[group] = [os.path.join(bundle_dir, name) for name in names]
+    for path in monolithic:
+        if os.path.exists(path):
+            groups[os.path.basename(path)] = [path]
+    
+    report = {}
+    for label, paths in groups.items():
+        report[label] = {
+            'files': len(paths),
+            'bytes': sum(os.path.getsize(path) for path in paths),
+            'gzip': sum(_gzip_size(path) for path in paths),
+        }
+    
+    def kb(size):
+        return f"{size / 1024:,.1f} KB"
+    
+    print(f"📦 Bundle size report ({bundle_dir})")
+    for label, sizes in report.items():
+        if label == 'markers.json':
+            kind, note = '', '  ← first paint'
+        else:
+            kind, note = (f"{sizes['files']} chunks" if label in chunks else 'monolithic'), ''
+        print(f"   {label:<24} {kind:<11} {kb(sizes['bytes']):>14}  (gzip {kb(sizes['gzip'])}){note}")
+    return report
+
+# ============================================================================
+# PER-PROGRAM SHARDS
+# ============================================================================
+
+SAFE_SHARD_NAME = re.compile(r'^[A-Za-z0-9_-]+$')
+
+def shard_filename(program_id: str) -> str:
+    """`<id>.json`, or a hash of the ID if it is not safe as a filename"""
+    if SAFE_SHARD_NAME.match(program_id):
+        return f"{program_id}.json"
+    return f"_{hashlib.sha1(program_id.encode('utf-8')).hexdigest()[:16]}.json"
+
+class ShardWriter:
+    """
+    One JSON file per program, keyed by its stable ID
+    
+    <output_dir>/<id>.json holds the program record as in programs.json,
+    and <output_dir>/manifest.json maps every ID to its shard:
+        
+        {"version": 1, "count": 2,
+         "shards": {"p2m-2023-1a2b3c": {"file": "p2m-2023-1a2b3c.json", "hash": "9f8e..."}, ...}}
+    
+    The hash (the first 16 hex digits of the shard's SHA-256) lets detail
+    pages and static builds tell which shards changed without opening them.
+    Only shards whose content changed are rewritten: they go to hidden
+    staging files (.<shard>.staged) that close() renames into place right
+    before manifest.json, and abort() deletes, so a failed export leaves
+    the previous shards and manifest intact. Shards of programs that are
+    gone are removed (only files the previous manifest listed, so nothing
+    else in the folder is touched).
+    """
+    
+    VERSION = 1
+    MANIFEST_NAME = 'manifest.json'
+    
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+        os.makedirs(output_dir, exist_ok=True)
+        self.previous = set()
+        manifest_path = os.path.join(output_dir, self.MANIFEST_NAME)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                self.previous = {shard['file'] for shard in json.load(f)['shards'].values()}
+        self.shards = {}
+        # (staging path, final path) of shards waiting for close()
+        self.staged = []
+        self.changed = {}
+    
+    def write(self, program: Dict):
+        program_id = program['id']
+        if program_id in self.shards:
+            raise ValueError(f"duplicate program ID: {program_id}")
+        data = compact_json(program).encode('utf-8')
+        filename = shard_filename(program_id)
+        path = os.path.join(self.output_dir, filename)
+        self.changed[path] = not file_holds(path, data)
+        if self.changed[path]:
+            staged_path = os.path.join(self.output_dir, f".{filename}.staged")
+            with open(staged_path, 'wb') as f:
+                f.write(data)
+            self.staged.append((staged_path, path))
+        self.shards[program_id] = {
+            'file': filename,
+            'hash': hashlib.sha256(data).hexdigest()[:16],
+        }
+    
+    def close(self) -> Dict[str, bool]:
+        for staged_path, final_path in self.staged:
+            os.replace(staged_path, final_path)
+        self.staged = []
+        path = os.path.join(self.output_dir, self.MANIFEST_NAME)
+        self.changed[path] = write_if_changed(path, compact_json({
+            'version': self.VERSION,
+            'count': len(self.shards),
+            'shards': self.shards,
+        }))
+        
+        current = {shard['file'] for shard in self.shards.values()}
+        for name in self.previous - current:
+            stale_path = os.path.join(self.output_dir, name)
+            if os.path.exists(stale_path):
+                os.remove(stale_path)
+                self.changed[stale_path] = True
+        return self.changed
+    
+    def abort(self):
+        """Drop the staged shards; the live shards and manifest.json are untouched"""
+        for staged_path, _ in self.staged:
+            if os.path.exists(staged_path):
+                os.remove(staged_path)
+        self.staged = []
+
+def load_shard(shard_dir: str, program_id: str) -> Optional[Dict]:
+    """One program from a shard folder, via its manifest"""
+    with open(os.path.join(shard_dir, ShardWriter.MANIFEST_NAME), 'r', encoding='utf-8') as f:
+        shard = json.load(f)['shards'].get(program_id)
+    if not shard:
+        return None
+    with open(os.path.join(shard_dir, shard['file']), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def export_programs(programs: Iterable[Dict], ts_path: Optional[str] = None, json_path: Optional[str] = None,
+                    header: Iterable[str] = (), only_if_changed: bool = False,
+                    targets: Iterable = ()) -> ProgramExporter:
+    """Write `programs` (any iterable, e.g. a generator) and return the closed exporter"""
+    with ProgramExporter(ts_path, json_path, header=list(header), only_if_changed=only_if_changed,
+                         targets=targets) as exporter:
+        for program in programs:
+            exporter.write(program)
+    return exporter
@@ -4,17 +4,46 @@ Scrapes program data from p2m.polibatam.ac.id
 
 Usage:
     python scripts/scrape-p2m.py
+    python scripts/scrape-p2m.py --async --concurrency 4
+    python scripts/scrape-p2m.py --async --details
+    python scripts/scrape-p2m.py --full
+
+Modes:
+    default   - fetch year pages one after another
+    --async   - fetch all year pages (and, with --details, every journal
+                page they link to) concurrently, at most --concurrency
+                requests in flight
+
+Parsing uses lxml when installed (pip install lxml), else html.parser.
+
+Incremental runs:
+    Each page's ETag, Last-Modified, content hash and parsed result are kept
+    in a crawl state (see crawl_state.py). Reruns send conditional requests,
+    only re-parse pages that changed, and merge into the existing
+    scraped_programs.json by URL (fields filled in by hand are kept).
+    --full ignores the stored state and re-parses everything.
 
 Output:
     - scraped_programs.json (raw data)
+    - scrape_diff.json (publications added/removed since the last run)
+    - scraped_programs.jsonl (written as pages finish, so an interrupted
+      run keeps what it already scraped)
     - program_links.txt (list of journal URLs)
 """
 
-import requests
 from bs4 import BeautifulSoup
+import os
+import sys
 import json
 import re
-from typing import List, Dict
+import time
+import asyncio
+import argparse
+import importlib.util
+from typing import List, Dict, Optional, Tuple
+
+from crawl_state import CrawlState
+from http_session import get_session
 
 # P2M website URLs by year
 P2M_URLS = {
@@ -25,66 +54,268 @@ P2M_URLS = {
     2020: "https://p2m.polibatam.ac.id/?page_id=6990",
 }
 
-def scrape_year(year: int, url: str) -> List[Dict]:
-    """Scrape programs from a specific year page"""
+# lxml's C parser is several times faster than the pure-Python html.parser
+HTML_PARSER = 'lxml' if importlib.util.find_spec('lxml') else 'html.parser'
+
+OUTPUT_FILE = "scraped_programs.json"
+PARTIAL_FILE = "scraped_programs.jsonl"
+DIFF_FILE = "scrape_diff.json"
+
+def parse_year_page(year: int, content: bytes) -> List[Dict]:
+    """Publication links from a year page"""
+    soup = BeautifulSoup(content, HTML_PARSER)
+    
+    programs = []
+    
+    # Find publication section (usually at the bottom)
+    # Look for headings like "PUBLIKASI LUARAN" or similar
+    publication_section = soup.find(string=re.compile(r'PUBLIKASI|LUARAN', re.I))
+    
+    if publication_section:
+        # Find all links in the publication section
+        parent = publication_section.find_parent()
+        if parent:
+            links = parent.find_all('a', href=True)
+            
+            for link in links:
+                title = link.get_text(strip=True)
+                url = link['href']
+                
+                # Extract author (usually before the title)
+                # This is a simplified extraction - adjust based on actual HTML structure
+                program = {
+                    'title': title,
+                    'url': url,
+                    'year': year,
+                    'authors': [],  # Will need manual extraction
+                    'journal': '',  # Will need manual extraction
+                }
+                programs.append(program)
+    
+    return programs
+
+def parse_detail_page(content: bytes) -> Dict:
+    """
+    Authors, journal and PDF link from a journal article page
+    
+    OJS and most journal platforms publish Highwire Press meta tags
+    (citation_author, citation_journal_title, citation_pdf_url).
+    """
+    soup = BeautifulSoup(content, HTML_PARSER)
+    
+    def meta(name):
+        return [tag['content'].strip() for tag in soup.find_all('meta', attrs={'name': name}) if tag.get('content')]
+    
+    details = {}
+    authors = meta('citation_author')
+    if authors:
+        details['authors'] = authors
+    journal = meta('citation_journal_title')
+    if journal:
+        details['journal'] = journal[0]
+    pdf_url = meta('citation_pdf_url')
+    if pdf_url:
+        details['pdf_url'] = pdf_url[0]
+    return details
+
+def parse_detail_response(response) -> Dict:
+    return parse_detail_page(response.content)
+
+# Publication links can point straight at a PDF; only HTML pages are downloaded
+DETAIL_CONTENT_TYPES = ('html',)
+
+def scrape_year(year: int, url: str, state: CrawlState) -> Optional[List[Dict]]:
+    """Scrape programs from a specific year page (None if the page failed)"""
     print(f"\n📅 Scraping year {year}...")
     
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        programs = []
-        
-        # Find publication section (usually at the bottom)
-        # Look for headings like "PUBLIKASI LUARAN" or similar
-        publication_section = soup.find(string=re.compile(r'PUBLIKASI|LUARAN', re.I))
-        
-        if publication_section:
-            # Find all links in the publication section
-            parent = publication_section.find_parent()
-            if parent:
-                links = parent.find_all('a', href=True)
-                
-                for link in links:
-                    title = link.get_text(strip=True)
-                    url = link['href']
-                    
-                    # Extract author (usually before the title)
-                    # This is a simplified extraction - adjust based on actual HTML structure
-                    program = {
-                        'title': title,
-                        'url': url,
-                        'year': year,
-                        'authors': [],  # Will need manual extraction
-                        'journal': '',  # Will need manual extraction
-                    }
-                    programs.append(program)
-                    print(f"  ✓ Found: {title[:60]}...")
+        # Pooled session: keep-alive, retry/backoff; the crawl state adds
+        # conditional headers and skips re-parsing unchanged pages
+        programs, status = state.fetch(get_session(), url, lambda response: parse_year_page(year, response.content))
+        if status in ('not_modified', 'unchanged'):
+            print(f"  ↺ Page unchanged since last run")
+        else:
+            for program in programs:
+                print(f"  ✓ Found: {program['title'][:60]}...")
         
         print(f"  📊 Total programs found: {len(programs)}")
-        return programs
-        
+        # Copies, so detail fields never leak into the stored page result
+        return [dict(program) for program in programs]
+    
     except Exception as e:
         print(f"  ❌ Error scraping {year}: {e}")
-        return []
+        return None
+
+def scrape_details(program: Dict, state: CrawlState):
+    """Fill in authors/journal from the program's journal page"""
+    try:
+        details, _ = state.fetch(get_session(), program['url'], parse_detail_response,
+                                 content_types=DETAIL_CONTENT_TYPES)
+        program.update(details or {})
+    except Exception as e:
+        print(f"  ⚠️  Could not fetch details for {program['url']}: {e}")
+
+def merge_programs(existing: List[Dict], scraped: List[Dict], failed_years: set) -> Tuple[List[Dict], Dict]:
+    """
+    Merge a fresh scrape into the previous dataset, keyed by URL
+    
+    Scraped values win unless empty, so fields filled in by hand survive.
+    Programs from year pages that failed this run are kept, not reported
+    as removed. Returns (merged programs, {'added': [...], 'removed': [...]}).
+    """
+    previous = {program['url']: program for program in existing}
+    merged = {}
+    added = []
+    for program in scraped:
+        if program['url'] in merged:
+            continue
+        old = previous.get(program['url'])
+        if old is None:
+            added.append(program)
+            merged[program['url']] = program
+        else:
+            merged[program['url']] = {**old, **{key: value for key, value in program.items() if value}}
+    
+    removed = []
+    for url, program in previous.items():
+        if url in merged:
+            continue
+        if program.get('year') in failed_years:
+            merged[url] = program
+        else:
+            removed.append(program)
+    
+    return list(merged.values()), {'added': added, 'removed': removed}
+
+# ============================================================================
+# ASYNC MODE
+# ============================================================================
+
+class AsyncScraper:
+    """
+    Concurrent crawl of year pages and their journal pages
+    
+    Requests go through the shared HttpSession and the crawl state on worker
+    threads, so they keep its connection pool, retries and metrics; the
+    semaphore caps how many are in flight. Programs are appended to
+    `partial_path` as each year page is parsed and again as each detail page
+    completes.
+    """
+    
+    def __init__(self, state: CrawlState, concurrency: int = 4, details: bool = False,
+                 partial_path: Optional[str] = PARTIAL_FILE):
+        self.state = state
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.details = details
+        self.partial_path = partial_path
+        self.partial = None
+    
+    async def fetch(self, url: str, parse, content_types: Optional[tuple] = None):
+        async with self.semaphore:
+            return await asyncio.to_thread(self.state.fetch, get_session(), url, parse,
+                                           content_types=content_types)
+    
+    def write_partial(self, record: Dict):
+        if self.partial:
+            self.partial.write(json.dumps(record, ensure_ascii=False) + '\n')
+            self.partial.flush()
+    
+    async def scrape_detail(self, program: Dict):
+        try:
+            details, _ = await self.fetch(program['url'], parse_detail_response, DETAIL_CONTENT_TYPES)
+            program.update(details or {})
+        except Exception as e:
+            print(f"  ⚠️  Could not fetch details for {program['url']}: {e}")
+        self.write_partial({'type': 'details', 'url': program['url'], 'program': program})
+    
+    async def scrape_year(self, year: int, url: str) -> Optional[List[Dict]]:
+        try:
+            programs, status = await self.fetch(url, lambda response: parse_year_page(year, response.content))
+        except Exception as e:
+            print(f"  ❌ Error scraping {year}: {e}")
+            return None
+        programs = [dict(program) for program in programs]
+        print(f"  📅 {year}: {len(programs)} programs ({status})")
+        for program in programs:
+            self.write_partial({'type': 'program', 'url': program['url'], 'program': program})
+        
+        if self.details:
+            # Journal pages start as soon as their year page is parsed
+            await asyncio.gather(*(self.scrape_detail(program) for program in programs))
+        return programs
+    
+    async def run(self, urls: Dict[int, str]) -> Dict[int, Optional[List[Dict]]]:
+        if self.partial_path:
+            self.partial = open(self.partial_path, 'w', encoding='utf-8')
+        try:
+            per_year = await asyncio.gather(*(self.scrape_year(year, url) for year, url in urls.items()))
+        finally:
+            if self.partial:
+                self.partial.close()
+        # Same order as the sequential mode, whatever order pages finished in
+        return dict(zip(urls, per_year))
+
+def scrape_all(state: CrawlState, use_async: bool = False, concurrency: int = 4,
+               details: bool = False) -> Tuple[List[Dict], set]:
+    """All programs in year order, plus the years whose page failed"""
+    if use_async:
+        print(f"⚡ Async mode: {concurrency} concurrent requests, parser: {HTML_PARSER}")
+        per_year = asyncio.run(AsyncScraper(state, concurrency, details).run(P2M_URLS))
+    else:
+        per_year = {}
+        for year, url in P2M_URLS.items():
+            per_year[year] = scrape_year(year, url, state)
+            if details and per_year[year]:
+                for program in per_year[year]:
+                    scrape_details(program, state)
+    
+    all_programs = [program for programs in per_year.values() if programs for program in programs]
+    failed_years = {year for year, programs in per_year.items() if programs is None}
+    return all_programs, failed_years
 
 def main():
     """Main scraping function"""
+    parser = argparse.ArgumentParser(description='Scrape program data from p2m.polibatam.ac.id')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='Fetch all pages concurrently')
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help='Maximum requests in flight in async mode (default: 4)')
+    parser.add_argument('--details', action='store_true',
+                        help='Also fetch each journal page for authors/journal')
+    parser.add_argument('--full', action='store_true',
+                        help='Ignore the stored crawl state and re-parse every page')
+    args = parser.parse_args()
+    
+    if args.concurrency < 1:
+        print("❌ --concurrency must be at least 1")
+        sys.exit(1)
+    
     print("🚀 Starting P2M Website Scraper...")
     print("=" * 60)
     
-    all_programs = []
+    state = CrawlState()
+    if args.full:
+        state.pages = {}
     
-    for year, url in P2M_URLS.items():
-        programs = scrape_year(year, url)
-        all_programs.extend(programs)
+    existing = []
+    if os.path.exists(OUTPUT_FILE):
+        with open(OUTPUT_FILE, 'r', encoding='utf-8') as f:
+            existing = json.load(f)
+    
+    start = time.perf_counter()
+    scraped, failed_years = scrape_all(state, args.use_async, args.concurrency, args.details)
+    elapsed = time.perf_counter() - start
+    state.save()
+    
+    all_programs, diff = merge_programs(existing, scraped, failed_years)
     
     # Save results
-    output_file = "scraped_programs.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
+    with open(OUTPUT_FILE, 'w', encoding='utf-8') as f:
         json.dump(all_programs, f, indent=2, ensure_ascii=False)
     
+    with open(DIFF_FILE, 'w', encoding='utf-8') as f:
+        json.dump(diff, f, indent=2, ensure_ascii=False)
+    
     # Save just the URLs for manual review
     with open("program_links.txt", 'w', encoding='utf-8') as f:
         for prog in all_programs:
@@ -92,9 +323,18 @@ def main():
             f.write(f"    {prog['url']}\n\n")
     
     print("\n" + "=" * 60)
-    print(f"✅ Scraping complete!")
-    print(f"📁 Saved {len(all_programs)} programs to {output_file}")
+    print(f"✅ Scraping complete in {elapsed:.2f}s!")
+    print(f"📁 Saved {len(all_programs)} programs to {OUTPUT_FILE}")
     print(f"📋 Saved links to program_links.txt")
+    print(f"🆕 {len(diff['added'])} added, 🗑️  {len(diff['removed'])} removed (see {DIFF_FILE})")
+    for program in diff['added'][:10]:
+        print(f"   + {program['year']} - {program['title'][:60]}")
+    for program in diff['removed'][:10]:
+        print(f"   - {program['year']} - {program['title'][:60]}")
+    if failed_years:
+        print(f"⚠️  Kept previous data for failed years: {', '.join(map(str, sorted(failed_years)))}")
+    state.print_stats()
+    get_session().print_metrics()
     print("\n💡 Next steps:")
     print("   1. Review scraped_programs.json")
     print("   2. Visit journal URLs to extract details")
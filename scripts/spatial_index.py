@@ -0,0 +1,375 @@
+"""
+Spatial Index
+Packed static R-tree over program coordinates
+
+Built once at export time and emitted next to the data, so viewport
+loading and "programs near me" (LocateControl) touch a few tree nodes
+instead of filtering every program.
+
+Usage:
+    python scripts/spatial_index.py build programs.json --output public/data/spatial
+    python scripts/spatial_index.py bbox 1.0 103.9 1.2 104.1 --index public/data/spatial
+    python scripts/spatial_index.py near 1.1301 104.0529 -n 5 --index public/data/spatial
+
+    from spatial_index import SpatialIndex
+    index = SpatialIndex.load('public/data/spatial')
+    index.search(south, west, north, east)     # -> [program id, ...]
+    index.nearest(lat, lng, n=5, max_km=10)    # -> [(program id, km), ...]
+
+Structure:
+    Programs are sorted along a Hilbert curve and packed bottom-up into
+    nodes of node_size (16) children, the layout of the flatbush library:
+    a bounding-box query descends only into nodes that intersect the box,
+    and nearest-N is a best-first search over node distances.
+
+Output (<output>/):
+    - spatial.bin: the tree in flatbush's serialized format (8-byte header,
+      Float64 boxes as [lng, lat, lng, lat] per node, then Uint16/Uint32
+      node indices), loadable in the browser with Flatbush.from(buffer)
+    - spatial.json: {"version", "count", "nodeSize", "ids": [...]}; search
+      results are positions in "ids", i.e. in export order
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import heapq
+import struct
+import argparse
+from array import array
+from bisect import bisect_right
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from program_export import compact_json, write_if_changed
+
+DEFAULT_NODE_SIZE = 16
+BINARY_NAME = 'spatial.bin'
+IDS_NAME = 'spatial.json'
+
+# flatbush serialization: magic byte, format version 3, Float64Array (type 8)
+FLATBUSH_MAGIC = 0xfb
+FLATBUSH_VERSION = 3
+FLATBUSH_FLOAT64 = 8
+HEADER = struct.Struct('<BBHI')
+
+HILBERT_MAX = (1 << 16) - 1
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+def hilbert(x: int, y: int) -> int:
+    """Position of (x, y) on a 2^16 x 2^16 Hilbert curve"""
+    d = 0
+    s = 1 << 15
+    while s:
+        rx = 1 if x & s else 0
+        ry = 1 if y & s else 0
+        d += s * s * ((3 * rx) ^ ry)
+        if not ry:
+            if rx:
+                x = HILBERT_MAX - x
+                y = HILBERT_MAX - y
+            x, y = y, x
+        s >>= 1
+    return d
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    dlat = math.radians(lat2 - lat1)
+    dlng = math.radians(lng2 - lng1)
+    a = math.sin(dlat / 2) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlng / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+def level_bounds(num_items: int, node_size: int) -> List[int]:
+    """End offset (in box values) of each tree level, leaves first"""
+    n = num_items
+    num_nodes = n
+    bounds = [n * 4]
+    while True:
+        n = math.ceil(n / node_size)
+        num_nodes += n
+        bounds.append(num_nodes * 4)
+        if n == 1:
+            return bounds
+
+class SpatialIndex:
+    """
+    Static R-tree of program points
+    
+    `boxes` holds [min_lng, min_lat, max_lng, max_lat] per node, leaves
+    first and the root last; `indices` holds, per node, the item position
+    (leaves) or the box offset of the first child (inner nodes).
+    """
+    
+    def __init__(self, ids: List[str], node_size: int = DEFAULT_NODE_SIZE,
+                 boxes: Optional[array] = None, indices: Optional[array] = None):
+        self.ids = ids
+        self.node_size = node_size
+        self.boxes = boxes if boxes is not None else array('d')
+        self.indices = indices if indices is not None else array('I')
+        self.bounds = level_bounds(len(ids), node_size) if ids else []
+    
+    @classmethod
+    def build(cls, points: Iterable[Tuple[str, float, float]], node_size: int = DEFAULT_NODE_SIZE) -> 'SpatialIndex':
+        """Index (id, lat, lng) points"""
+        if node_size < 2:
+            raise ValueError("node_size must be at least 2")
+        points = list(points)
+        index = cls([program_id for program_id, lat, lng in points], node_size)
+        if not points:
+            return index
+        
+        min_lng = min(lng for _, lat, lng in points)
+        max_lng = max(lng for _, lat, lng in points)
+        min_lat = min(lat for _, lat, lng in points)
+        max_lat = max(lat for _, lat, lng in points)
+        width = (max_lng - min_lng) or 1
+        height = (max_lat - min_lat) or 1
+        order = sorted(range(len(points)), key=lambda i: hilbert(
+            int(HILBERT_MAX * (points[i][2] - min_lng) / width),
+            int(HILBERT_MAX * (points[i][1] - min_lat) / height),
+        ))
+        
+        num_nodes = index.bounds[-1] // 4
+        boxes = array('d', bytes(num_nodes * 4 * 8))
+        indices = array('H' if num_nodes < 16384 else 'I', bytes(num_nodes * (2 if num_nodes < 16384 else 4)))
+        for position, item in enumerate(order):
+            _, lat, lng = points[item]
+            boxes[position * 4:position * 4 + 4] = array('d', (lng, lat, lng, lat))
+            indices[position] = item
+        
+        # Pack each level's runs of node_size boxes into one parent box
+        pos = 0
+        write = index.bounds[0]
+        for end in index.bounds[:-1]:
+            while pos < end:
+                first = pos
+                run_end = min(pos + node_size * 4, end)
+                boxes[write] = min(boxes[pos:run_end:4])
+                boxes[write + 1] = min(boxes[pos + 1:run_end:4])
+                boxes[write + 2] = max(boxes[pos + 2:run_end:4])
+                boxes[write + 3] = max(boxes[pos + 3:run_end:4])
+                indices[write // 4] = first
+                write += 4
+                pos = run_end
+        
+        index.boxes = boxes
+        index.indices = indices
+        return index
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    # ------------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------------
+    
+    def _children(self, node: int) -> range:
+        end = min(node + self.node_size * 4, self.bounds[bisect_right(self.bounds, node)])
+        return range(node, end, 4)
+    
+    def search(self, south: float, west: float, north: float, east: float) -> List[str]:
+        """IDs of the programs inside a bounding box"""
+        if not self.ids:
+            return []
+        boxes = self.boxes
+        leaves_end = len(self.ids) * 4
+        results = []
+        queue = [len(boxes) - 4]
+        while queue:
+            node = queue.pop()
+            for pos in self._children(node):
+                if east < boxes[pos] or north < boxes[pos + 1] or west > boxes[pos + 2] or south > boxes[pos + 3]:
+                    continue
+                if node >= leaves_end:
+                    queue.append(self.indices[pos // 4])
+                else:
+                    results.append(self.ids[self.indices[pos // 4]])
+        return results
+    
+    def nearest(self, lat: float, lng: float, n: int = 10, max_km: Optional[float] = None) -> List[Tuple[str, float]]:
+        """
+        Up to `n` programs closest to (lat, lng), nearest first, as (id, km)
+        
+        Nodes are ranked by an equirectangular distance around the query
+        point (exact enough at city scale, and a true lower bound for the
+        tree walk); reported distances are haversine.
+        """
+        if not self.ids or n < 1:
+            return []
+        boxes = self.boxes
+        leaves_end = len(self.ids) * 4
+        scale = math.cos(math.radians(lat))
+        limit = (max_km / KM_PER_DEGREE) ** 2 if max_km is not None else math.inf
+        
+        def distance(pos):
+            dx = max(boxes[pos] - lng, 0, lng - boxes[pos + 2]) * scale
+            dy = max(boxes[pos + 1] - lat, 0, lat - boxes[pos + 3])
+            return dx * dx + dy * dy
+        
+        results = []
+        heap = []
+        node = len(boxes) - 4
+        while True:
+            is_node = node >= leaves_end
+            for pos in self._children(node):
+                d = distance(pos)
+                if d <= limit:
+                    # Leaves keep their box offset (for the coordinates), nodes their first child;
+                    # at equal distance leaves (False) come out first
+                    heapq.heappush(heap, (d, is_node, self.indices[pos // 4] if is_node else pos))
+            while heap and not heap[0][1]:
+                pos = heapq.heappop(heap)[2]
+                km = haversine_km(lat, lng, boxes[pos + 1], boxes[pos])
+                results.append((self.ids[self.indices[pos // 4]], round(km, 3)))
+                if len(results) == n:
+                    return results
+            if not heap:
+                return results
+            node = heapq.heappop(heap)[2]
+    
+    # ------------------------------------------------------------------------
+    # Serialization
+    # ------------------------------------------------------------------------
+    
+    def to_bytes(self) -> bytes:
+        boxes, indices = self.boxes, self.indices
+        if sys.byteorder == 'big':
+            boxes, indices = array(boxes.typecode, boxes), array(indices.typecode, indices)
+            boxes.byteswap()
+            indices.byteswap()
+        header = HEADER.pack(FLATBUSH_MAGIC, (FLATBUSH_VERSION << 4) + FLATBUSH_FLOAT64, self.node_size, len(self.ids))
+        return header + boxes.tobytes() + indices.tobytes()
+    
+    @classmethod
+    def from_bytes(cls, data: bytes, ids: List[str]) -> 'SpatialIndex':
+        magic, version_and_type, node_size, num_items = HEADER.unpack_from(data)
+        if magic != FLATBUSH_MAGIC or version_and_type != (FLATBUSH_VERSION << 4) + FLATBUSH_FLOAT64:
+            raise ValueError("not a Float64 flatbush index")
+        if num_items != len(ids):
+            raise ValueError(f"index holds {num_items} items but {len(ids)} IDs were given")
+        index = cls(ids, node_size)
+        num_nodes = index.bounds[-1] // 4
+        boxes_end = HEADER.size + num_nodes * 4 * 8
+        index.boxes = array('d', data[HEADER.size:boxes_end])
+        index.indices = array('H' if num_nodes < 16384 else 'I', data[boxes_end:])
+        if sys.byteorder == 'big':
+            index.boxes.byteswap()
+            index.indices.byteswap()
+        return index
+    
+    def save(self, output_dir: str) -> Dict[str, bool]:
+        """Write spatial.bin and spatial.json, skipping files whose content is unchanged"""
+        os.makedirs(output_dir, exist_ok=True)
+        binary_path = os.path.join(output_dir, BINARY_NAME)
+        ids_path = os.path.join(output_dir, IDS_NAME)
+        changed = {}
+        if self.ids:
+            changed[binary_path] = write_if_changed(binary_path, self.to_bytes())
+        elif os.path.exists(binary_path):
+            # flatbush cannot hold an empty tree
+            os.remove(binary_path)
+            changed[binary_path] = True
+        changed[ids_path] = write_if_changed(ids_path, compact_json({
+            'version': 1,
+            'count': len(self.ids),
+            'nodeSize': self.node_size,
+            'ids': self.ids,
+        }))
+        return changed
+    
+    @classmethod
+    def load(cls, index_dir: str) -> 'SpatialIndex':
+        with open(os.path.join(index_dir, IDS_NAME), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if not meta['ids']:
+            return cls([], meta['nodeSize'])
+        with open(os.path.join(index_dir, BINARY_NAME), 'rb') as f:
+            return cls.from_bytes(f.read(), meta['ids'])
+
+class SpatialIndexWriter:
+    """Export target building the index from the streamed programs"""
+    
+    def __init__(self, output_dir: str, node_size: int = DEFAULT_NODE_SIZE):
+        self.output_dir = output_dir
+        self.node_size = node_size
+        self.points = []
+        self.index = None
+    
+    def write(self, program: Dict):
+        location = program['location']
+        self.points.append((program['id'], location['lat'], location['lng']))
+    
+    def close(self) -> Dict[str, bool]:
+        self.index = SpatialIndex.build(self.points, self.node_size)
+        return self.index.save(self.output_dir)
+    
+    def abort(self):
+        """Nothing is written before close()"""
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Spatial index over program coordinates')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    build_parser = subparsers.add_parser('build', help='Build the index from programs.json')
+    build_parser.add_argument('programs', help='programs.json from md-to-programs.py or generate-programs.py')
+    build_parser.add_argument('--output', default='spatial', help='Output folder (default: spatial)')
+    build_parser.add_argument('--node-size', type=int, default=DEFAULT_NODE_SIZE,
+                              help=f'Children per tree node (default: {DEFAULT_NODE_SIZE})')
+    
+    bbox_parser = subparsers.add_parser('bbox', help='Programs inside a bounding box')
+    for name in ('south', 'west', 'north', 'east'):
+        bbox_parser.add_argument(name, type=float)
+    bbox_parser.add_argument('--index', default='spatial', help='Index folder (default: spatial)')
+    
+    near_parser = subparsers.add_parser('near', help='Programs nearest to a point')
+    near_parser.add_argument('lat', type=float)
+    near_parser.add_argument('lng', type=float)
+    near_parser.add_argument('-n', type=int, default=10, help='Number of programs (default: 10)')
+    near_parser.add_argument('--max-km', type=float, help='Ignore programs further away')
+    near_parser.add_argument('--index', default='spatial', help='Index folder (default: spatial)')
+    args = parser.parse_args()
+    
+    if args.command == 'build':
+        if not os.path.exists(args.programs):
+            print(f"❌ File not found: {args.programs}")
+            sys.exit(1)
+        with open(args.programs, 'r', encoding='utf-8') as f:
+            programs = json.load(f)
+        start = time.perf_counter()
+        writer = SpatialIndexWriter(args.output, args.node_size)
+        for program in programs:
+            writer.write(program)
+        changed = writer.close()
+        elapsed = time.perf_counter() - start
+        size = sum(os.path.getsize(path) for path in changed if os.path.exists(path))
+        print(f"✅ Indexed {len(writer.index):,} programs in {elapsed:.2f}s "
+              f"({size / 1024:,.1f} KB, {sum(changed.values())} of {len(changed)} files written)")
+        print(f"📁 Output: {args.output}")
+        return
+    
+    if not os.path.exists(os.path.join(args.index, IDS_NAME)):
+        print(f"❌ No index in {args.index}")
+        print("   Run: python scripts/spatial_index.py build programs.json --output " + args.index)
+        sys.exit(1)
+    index = SpatialIndex.load(args.index)
+    
+    start = time.perf_counter()
+    if args.command == 'bbox':
+        results = [(program_id, None) for program_id in index.search(args.south, args.west, args.north, args.east)]
+    else:
+        results = index.nearest(args.lat, args.lng, args.n, args.max_km)
+    elapsed = (time.perf_counter() - start) * 1e6
+    
+    for program_id, km in results[:50]:
+        print(f"  {program_id}" + (f"  {km:.2f} km" if km is not None else ''))
+    if len(results) > 50:
+        print(f"  ... and {len(results) - 50} more")
+    print(f"🔎 {len(results)} of {len(index):,} programs in {elapsed:,.0f} µs")
+
+if __name__ == "__main__":
+    main()
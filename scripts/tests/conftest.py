@@ -0,0 +1,21 @@
+"""
+Shared pytest setup for the data collection scripts
+
+Run from the repository root:
+    python -m pytest scripts/tests
+"""
+
+import os
+import sys
+import importlib.util
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIR)
+
+def load_script(filename: str):
+    """Import a hyphenated script (its filename is not a valid module name)"""
+    name = filename[:-3].replace('-', '_')
+    spec = importlib.util.spec_from_file_location(name, os.path.join(SCRIPTS_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
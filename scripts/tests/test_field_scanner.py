@@ -0,0 +1,49 @@
+"""FrontMatterScanner against the legacy per-field extractors kept in benchmark-fields.py"""
+
+import pytest
+
+from conftest import load_script
+
+pdf_to_md = load_script('pdf-to-md.py')
+benchmark = load_script('benchmark-fields.py')
+
+FRONT_MATTER = benchmark.SAMPLE_FRONT_MATTER
+BODY = benchmark.SAMPLE_BODY
+
+VARIANTS = {
+    'synthetic': benchmark.synthetic_documents(count=1)[0][1],
+    'front matter only': FRONT_MATTER,
+    'no abstract': FRONT_MATTER.replace('Abstrak\n', '') + BODY * 10,
+    'english abstract': FRONT_MATTER.replace('Abstrak', 'Abstract').replace('Kata kunci', 'Keywords'),
+    'no keywords': FRONT_MATTER.replace('Kata kunci: UMKM, pemasaran digital, Batam\n', '') + BODY,
+    'short': 'Pelatihan Komputer\nPulau Mubut 2021',
+    'body only': BODY * 30,
+    'empty': '',
+}
+
+def comparable(fields: dict) -> dict:
+    # Location hints are ranked by keyword weight now, not keyword-list order
+    return {name: value for name, value in fields.items() if name != 'location_hints'}
+
+@pytest.mark.parametrize('name', sorted(VARIANTS))
+@pytest.mark.parametrize('filename', ['jurnal-001-2023', 'jurnal-tanpa-tahun'])
+def test_scanner_matches_baseline(name, filename):
+    text = VARIANTS[name]
+    assert comparable(pdf_to_md.extract_fields(text, filename)) == comparable(benchmark.legacy_extract_fields(text, filename))
+
+def test_scanner_matches_baseline_on_benchmark_documents():
+    for filename, text in benchmark.synthetic_documents(count=5, body_pages=3):
+        assert comparable(pdf_to_md.extract_fields(text, filename)) == comparable(benchmark.legacy_extract_fields(text, filename))
+
+def test_location_hints_rank_front_matter_occurrences():
+    hints = pdf_to_md.extract_location_hints(VARIANTS['synthetic'])
+    # The abstract sentence names the kelurahan, kecamatan and city
+    assert 'Kelurahan Tanjung Uncang,\nKecamatan Batu Aji, Kota Batam' in hints[0]
+    assert all('PENDAHULUAN' not in hint for hint in hints)
+
+def test_location_hints_fall_back_to_body():
+    front_matter = 'Pelatihan Komputer untuk Warga Pesisir\nAbstrak\n' + 'Kegiatan pelatihan komputer. ' * 5 + '\nKata kunci: komputer\n'
+    hints = pdf_to_md.extract_location_hints(front_matter + BODY * 10)
+    assert hints and 'Pulau Galang dan Pulau Rempang' in hints[0]
+    # Repeated body lines give one hint, not one per repetition
+    assert len(hints) == len(set(hints))
@@ -0,0 +1,40 @@
+"""GazetteerIndex lookups, in particular fuzzy matching of misspelled names"""
+
+import random
+import string
+
+from gazetteer_index import GazetteerIndex
+from geocode_locations import BATAM_LOCATIONS
+
+def test_lookup_match_types():
+    index = GazetteerIndex(BATAM_LOCATIONS)
+    assert index.lookup('Nagoya') == ('nagoya', 'exact')
+    assert index.lookup('Kel. Tanjung Uncang, Batu Aji') == ('tanjung uncang', 'contains')
+    assert index.lookup('Uncang') == ('tanjung uncang', 'within')
+    assert index.lookup('Pulau Abang') is None
+
+def test_fuzzy_finds_typos():
+    index = GazetteerIndex(BATAM_LOCATIONS)
+    assert index.fuzzy_lookup('Sembulan') == [('sembulang', 0.89)]
+    assert index.fuzzy_lookup('Kegiatan di Batam Centr, Kota Batam', limit=1) == [('batam centre', 0.92)]
+
+def test_fuzzy_ignores_shared_place_words():
+    index = GazetteerIndex(BATAM_LOCATIONS)
+    # Real islands that are not in the database, one or two letters from Pulau Galang
+    assert index.fuzzy_lookup('Pulau Abang') == []
+    assert index.fuzzy_lookup('Pulau Bulang') == []
+    # A typo of the distinctive part under a different place word
+    locations = {'pulau sembulang': {}, 'tanjung sembilang': {}}
+    assert GazetteerIndex(locations).fuzzy_lookup('Tanjung Sembulang') == [('tanjung sembilang', 0.89)]
+
+def test_fuzzy_finds_typos_in_large_gazetteer():
+    rng = random.Random(3)
+    locations = {}
+    while len(locations) < 20000:
+        prefix = rng.choice(['pulau', 'tanjung', 'kelurahan'])
+        locations[prefix + ' ' + ''.join(rng.choices(string.ascii_lowercase, k=9))] = {}
+    index = GazetteerIndex(locations)
+    for name in rng.sample(sorted(locations), 50):
+        # Drop one letter of the distinctive word
+        i = rng.randrange(len(name) - 8, len(name))
+        assert index.fuzzy_lookup(f"Kegiatan di {name[:i] + name[i + 1:]}, Kota Batam", limit=1) == [(name, 0.89)]
@@ -0,0 +1,153 @@
+"""HttpSession against a local http.server: retries, conditional GETs, metrics"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import http_session
+from http_session import HttpSession, get_session
+
+class ScriptedServer:
+    """
+    Serves a queue of (status, headers, body) responses per path and records
+    the headers of every request it receives
+    """
+    
+    def __init__(self):
+        self.responses = {}
+        self.requests = []
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+            
+            def do_GET(self):
+                server.requests.append((self.path, dict(self.headers)))
+                queue = server.responses[self.path]
+                status, headers, body = queue.pop(0) if len(queue) > 1 else queue[0]
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+        
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_port}'
+        self.host = f'127.0.0.1:{self.httpd.server_port}'
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+    
+    def script(self, path: str, *responses):
+        self.responses[path] = list(responses)
+    
+    def hits(self, path: str) -> list:
+        return [headers for request_path, headers in self.requests if request_path == path]
+
+@pytest.fixture
+def server():
+    server = ScriptedServer()
+    yield server
+    server.httpd.shutdown()
+    server.httpd.server_close()
+
+@pytest.fixture
+def session():
+    session = HttpSession(backoff=0, timeout=5)
+    yield session
+    session.close()
+
+def test_retries_server_errors(server, session):
+    server.script('/flaky', (503, {}, b''), (502, {}, b''), (200, {}, b'ok'))
+    
+    response = session.get(server.url + '/flaky')
+    
+    assert response.status_code == 200
+    assert response.text == 'ok'
+    assert len(server.hits('/flaky')) == 3
+    # Retries happen inside one logical request
+    assert session.metrics[server.host]['requests'] == 1
+    assert session.metrics[server.host]['errors'] == 0
+
+def test_retries_rate_limit_with_retry_after(server, session):
+    server.script('/limited', (429, {'Retry-After': '0'}, b''), (200, {}, b'ok'))
+    
+    response = session.get(server.url + '/limited')
+    
+    assert response.status_code == 200
+    assert len(server.hits('/limited')) == 2
+
+def test_gives_up_after_retries(server, session):
+    server.script('/down', (500, {}, b'error'))
+    
+    response = session.get(server.url + '/down')
+    
+    assert response.status_code == 500
+    assert len(server.hits('/down')) == 4  # first attempt + 3 retries
+    assert session.metrics[server.host]['errors'] == 1
+
+def test_conditional_get_replays_stored_body(server, session):
+    server.script(
+        '/page',
+        (200, {'ETag': '"v1"', 'Last-Modified': 'Mon, 05 Oct 2026 10:00:00 GMT',
+               'Content-Type': 'text/html; charset=utf-8'}, 'Pulau Galang ✓'.encode('utf-8')),
+        (304, {}, b''),
+    )
+    
+    first = session.get(server.url + '/page')
+    second = session.get(server.url + '/page')
+    
+    assert first.not_modified is False
+    assert second.not_modified is True
+    assert second.status_code == 200
+    assert second.content == first.content
+    assert second.text == 'Pulau Galang ✓'
+    
+    revalidation = server.hits('/page')[1]
+    assert revalidation['If-None-Match'] == '"v1"'
+    assert revalidation['If-Modified-Since'] == 'Mon, 05 Oct 2026 10:00:00 GMT'
+    
+    stats = session.metrics[server.host]
+    assert stats['requests'] == 2
+    assert stats['not_modified'] == 1
+    assert stats['errors'] == 0
+
+def test_unconditional_and_streamed_requests_send_no_validators(server, session):
+    server.script('/file', (200, {'ETag': '"v1"'}, b'%PDF-1.4'))
+    
+    session.get(server.url + '/file')
+    session.get(server.url + '/file', conditional=False)
+    session.get(server.url + '/file', stream=True).close()
+    
+    assert [headers.get('If-None-Match') for headers in server.hits('/file')] == [None, None, None]
+
+def test_metrics_count_errors_per_host(server, session):
+    server.script('/missing', (404, {}, b''))
+    server.script('/ok', (200, {}, b'ok'))
+    
+    session.get(server.url + '/missing')
+    session.get(server.url + '/ok')
+    session.get(server.url + '/ok')
+    
+    stats = session.metrics[server.host]
+    assert stats['requests'] == 3
+    assert stats['errors'] == 1
+    assert stats['max_ms'] >= stats['total_ms'] / stats['requests']
+
+def test_get_session_creates_one_session_across_threads(monkeypatch):
+    monkeypatch.setattr(http_session, '_default_session', None)
+    sessions = []
+    barrier = threading.Barrier(8)
+    
+    def worker():
+        barrier.wait()
+        sessions.append(get_session())
+    
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len({id(session) for session in sessions}) == 1
@@ -0,0 +1,28 @@
+"""KeywordAutomaton: the per-keyword scan and the automaton backends must agree"""
+
+import random
+
+from conftest import load_script
+from keyword_automaton import KeywordAutomaton
+
+pdf_to_md = load_script('pdf-to-md.py')
+
+def test_backends_agree():
+    keywords = pdf_to_md.LOCATION_KEYWORDS
+    per_keyword = KeywordAutomaton(keywords)
+    automaton = KeywordAutomaton(keywords, find_loop_max=0)
+    rng = random.Random(7)
+    # Prefixes, suffixes and glued words around the real keywords
+    words = keywords + ['pulau', 'desa', 'di', 'batamindo', 'xbatam', 'kota', '-', ',']
+    texts = ['', 'batam', 'pulau galang baru', 'kota batam, pulau rempang.']
+    texts += [' '.join(rng.choices(words, k=40)) for _ in range(100)]
+    texts += [''.join(rng.choices(words, k=20)) for _ in range(100)]
+    for text in texts:
+        assert per_keyword.find_all(text) == automaton.find_all(text)
+        assert per_keyword.find_first(text) == automaton.find_first(text)
+        assert per_keyword.contains_any(text) == automaton.contains_any(text)
+
+def test_whole_words_only():
+    automaton = KeywordAutomaton(['batam', 'batam centre'])
+    assert automaton.find_all('di batamindo dan batam centre') == [(17, 'batam centre')]
+    assert not automaton.contains_any('xbatam')
@@ -0,0 +1,57 @@
+"""extract_pdf_text_adaptive: backend probing and the scanned-PDF fallback"""
+
+from contextlib import contextmanager
+
+import pytest
+
+from conftest import load_script
+
+pdf_to_md = load_script('pdf-to-md.py')
+
+TEXT_PAGE = 'Pelatihan pengabdian masyarakat di Pulau Galang, Kota Batam. ' * 3
+
+class Page:
+    def __init__(self, text, reads, backend):
+        self.text = text
+        self.reads = reads
+        self.backend = backend
+    
+    def extract_text(self):
+        self.reads[self.backend] = self.reads.get(self.backend, 0) + 1
+        return self.text
+
+@pytest.fixture
+def backends(monkeypatch):
+    """Replace the PDF libraries with page lists; returns the page reads per backend"""
+    reads = {}
+    
+    def install(page_texts):
+        def opener(backend):
+            @contextmanager
+            def open_pages(pdf_path):
+                yield [Page(text, reads, backend) for text in page_texts]
+            return open_pages
+        monkeypatch.setattr(pdf_to_md, 'BACKENDS', [(name, opener(name)) for name, _ in pdf_to_md.BACKENDS])
+        return reads
+    return install
+
+def test_text_layer_uses_first_backend(backends):
+    reads = backends([TEXT_PAGE] * 6)
+    text, info = pdf_to_md.extract_pdf_text_adaptive('paper.pdf')
+    assert info['backend'] == 'pdfplumber' and not info['needs_ocr']
+    assert text.count('Pulau Galang') == 18
+    assert reads == {'pdfplumber': 6}
+
+def test_scanned_pdf_is_read_once(backends):
+    reads = backends([None] * 8)
+    text, info = pdf_to_md.extract_pdf_text_adaptive('scan.pdf')
+    assert text == '' and info['needs_ocr']
+    # Both probes, then one pass over the rest by the first backend only
+    assert reads == {'pdfplumber': 8, 'pypdf2': pdf_to_md.PROBE_PAGES}
+
+def test_image_cover_before_text_layer(backends):
+    reads = backends([None] * 4 + [TEXT_PAGE] * 2)
+    text, info = pdf_to_md.extract_pdf_text_adaptive('cover.pdf')
+    assert info['backend'] == 'pdfplumber' and not info['needs_ocr']
+    assert 'Pulau Galang' in text
+    assert reads == {'pdfplumber': 6, 'pypdf2': pdf_to_md.PROBE_PAGES}
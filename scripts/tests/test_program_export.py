@@ -0,0 +1,96 @@
+"""program_export output against json.dumps(..., indent=2, ensure_ascii=False)"""
+
+import json
+
+import pytest
+
+from conftest import load_script
+from program_export import BundleWriter, ShardWriter, export_programs, json_value, load_shard
+
+benchmark = load_script('benchmark-export.py')
+
+VALUES = [
+    None, True, False, 0, -7, 2 ** 70, 1.5, 1e-7, 1e22, -0.0, float('nan'), float('inf'), float('-inf'),
+    '', 'plain', "Pulau Ngenang's Mangrove", 'quote " and \\ backslash', 'line\nbreak\ttab',
+    'control \x00\x1f', 'separators \u2028 \u2029', 'Ø unicode ✓ 🌊', '</script>',
+    [], {}, [[]], [{}], {'': ''}, {'nested': {'list': [1, [2, {'deep': None}]], 'empty': []}},
+    ('tuple', 1),
+]
+
+@pytest.mark.parametrize('value', VALUES, ids=repr)
+def test_json_value_matches_json_dumps(value):
+    assert json_value(value) == json.dumps(value, indent=2, ensure_ascii=False)
+
+def test_json_value_drop_none():
+    value = {'id': 'a', 'videoUrl': None, 'location': {'address': None, 'lat': 1.0}}
+    expected = {'id': 'a', 'location': {'lat': 1.0}}
+    assert json_value(value, drop_none=True) == json.dumps(expected, indent=2, ensure_ascii=False)
+
+@pytest.mark.parametrize('count', [0, 1, 50])
+def test_export_matches_json_dumps(tmp_path, count):
+    programs = list(benchmark.synthetic_programs(count, seed=count))
+    if programs:
+        programs[0]['name'] = 'Quote " backslash \\ separator \u2028 and Ø'
+    ts_path, json_path = tmp_path / 'programs.ts', tmp_path / 'programs.json'
+    export_programs(iter(programs), ts_path=str(ts_path), json_path=str(json_path), header=['Test'])
+    
+    assert json_path.read_bytes() == json.dumps(programs, indent=2, ensure_ascii=False).encode('utf-8')
+    
+    # The TypeScript array holds the same records, minus keys whose value is None
+    ts = ts_path.read_text(encoding='utf-8')
+    array = ts[ts.index('= [') + 2:ts.rindex('];') + 1]
+    expected = [{key: value for key, value in program.items() if value is not None} for program in programs]
+    assert json.loads(array) == expected
+
+def test_shards_swap_in_on_close(tmp_path):
+    programs = list(benchmark.synthetic_programs(5))
+    export_programs(iter(programs), targets=[ShardWriter(str(tmp_path))])
+    before = {path.name: path.read_bytes() for path in tmp_path.iterdir()}
+    manifest = json.loads(before['manifest.json'])
+    assert set(manifest['shards']) == {program['id'] for program in programs}
+    assert all(len(shard['hash']) == 16 for shard in manifest['shards'].values())
+    assert load_shard(str(tmp_path), programs[2]['id']) == programs[2]
+    
+    # A failed export leaves the previous shards and manifest as they were
+    def failing():
+        for program in programs[:3]:
+            yield {**program, 'name': program['name'] + ' (revised)'}
+        raise RuntimeError('source failed')
+    
+    with pytest.raises(RuntimeError):
+        export_programs(failing(), targets=[ShardWriter(str(tmp_path))])
+    assert {path.name: path.read_bytes() for path in tmp_path.iterdir()} == before
+
+def test_bundle_chunks_named_by_content(tmp_path):
+    def export(programs):
+        export_programs(iter(programs), targets=[BundleWriter(str(tmp_path), chunk_size=2)])
+        return json.loads((tmp_path / 'markers.json').read_text(encoding='utf-8'))['chunks']
+    
+    programs = list(benchmark.synthetic_programs(5))
+    first = export(programs)
+    assert [len(names) for names in first.values()] == [3, 3, 3]
+    
+    # Only the chunk holding the edited description gets a new name
+    programs[3]['description'] = 'Deskripsi baru'
+    second = export(programs)
+    changed = [i for i, (old, new) in enumerate(zip(first['descriptions'], second['descriptions'])) if old != new]
+    assert changed == [1]
+    assert second['media'] == first['media'] and second['addresses'] == first['addresses']
+    chunk = json.loads((tmp_path / second['descriptions'][1]).read_text(encoding='utf-8'))
+    assert chunk == {'start': 2, 'description': [programs[2]['description'], 'Deskripsi baru']}
+    
+    # The chunk the previous markers.json listed survives one more export
+    assert (tmp_path / first['descriptions'][1]).exists()
+    export(programs)
+    assert not (tmp_path / first['descriptions'][1]).exists()
+    
+    # A failed export leaves the bundle as it was
+    before = {path.name: path.read_bytes() for path in tmp_path.iterdir()}
+    def failing():
+        yield {**programs[0], 'description': 'Lain lagi'}
+        yield from programs[1:3]
+        raise RuntimeError('source failed')
+    
+    with pytest.raises(RuntimeError):
+        export_programs(failing(), targets=[BundleWriter(str(tmp_path), chunk_size=2)])
+    assert {path.name: path.read_bytes() for path in tmp_path.iterdir()} == before
@@ -0,0 +1,60 @@
+"""SpatialIndex bounding-box and nearest-N queries against a brute-force scan"""
+
+import random
+
+import pytest
+
+from spatial_index import SpatialIndex, haversine_km
+
+SIZES = [0, 1, 2, 16, 17, 300, 5000]
+
+def random_points(size: int, rng: random.Random) -> list:
+    # Rounded coordinates, so duplicates and points on box edges occur
+    return [(f'p2m-{i}', round(0.8 + rng.random() * 0.4, 3), round(103.3 + rng.random() * 1.2, 3))
+            for i in range(size)]
+
+@pytest.mark.parametrize('size', SIZES)
+def test_search_matches_brute_force(size):
+    rng = random.Random(size)
+    points = random_points(size, rng)
+    index = SpatialIndex.build(points)
+    for _ in range(50):
+        south, west = 0.8 + rng.random() * 0.4, 103.3 + rng.random() * 1.2
+        north, east = south + rng.random() * 0.2, west + rng.random() * 0.2
+        expected = {program_id for program_id, lat, lng in points if south <= lat <= north and west <= lng <= east}
+        assert set(index.search(south, west, north, east)) == expected
+        assert len(index.search(south, west, north, east)) == len(expected)
+
+@pytest.mark.parametrize('size', SIZES)
+def test_nearest_matches_brute_force(size):
+    rng = random.Random(size)
+    points = random_points(size, rng)
+    coordinates = {program_id: (lat, lng) for program_id, lat, lng in points}
+    index = SpatialIndex.build(points)
+    for _ in range(50):
+        lat, lng = 0.8 + rng.random() * 0.4, 103.3 + rng.random() * 1.2
+        n = rng.choice([1, 5, 20])
+        max_km = rng.choice([None, 5.0])
+        results = index.nearest(lat, lng, n, max_km)
+        
+        distances = sorted(haversine_km(lat, lng, p_lat, p_lng) for _, p_lat, p_lng in points)
+        if max_km is not None:
+            distances = [km for km in distances if km <= max_km]
+        expected = distances[:n]
+        
+        assert len(results) == len(expected)
+        assert [km for _, km in results] == sorted(km for _, km in results)
+        # Ties and the equirectangular ranking may swap equally distant ids
+        for (program_id, km), expected_km in zip(results, expected):
+            assert km == pytest.approx(expected_km, abs=1e-3)
+            assert km == round(haversine_km(lat, lng, *coordinates[program_id]), 3)
+
+def test_bytes_round_trip():
+    rng = random.Random(1)
+    points = random_points(300, rng)
+    index = SpatialIndex.build(points)
+    restored = SpatialIndex.from_bytes(index.to_bytes(), index.ids)
+    assert restored.search(0.9, 103.5, 1.1, 104.0) == index.search(0.9, 103.5, 1.1, 104.0)
+    assert restored.nearest(1.13, 104.05, 10) == index.nearest(1.13, 104.05, 10)
+    with pytest.raises(ValueError):
+        SpatialIndex.from_bytes(index.to_bytes(), index.ids[:-1])